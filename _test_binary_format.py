@@ -0,0 +1,82 @@
+"""
+.. module:: _test_binary_format
+
+   :synopsis: Test module for binary_format.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import struct
+import unittest
+import numpy
+from binary_format import ALIGNMENT, MAGIC, decode_binary, encode_binary
+from data_series import DataSeries, PlotSeries
+from json_writer import dumps
+from precision import DECIMALS_8, SIGNIFICANT_9
+
+#--------------------
+
+def make_data_series():
+    """ Returns two DataSeries, one with plot series that share their x values
+    and plot series that are not data points. """
+    x = numpy.array([2454964.5, 2454964.52, numpy.nan, 2454964.56123456789])
+    y = numpy.array([1.23456789012E4, -0., numpy.inf, 5.E-300])
+    return [DataSeries('kepler', 'kplr000000001_lc_Q111111111111111111',
+                       [PlotSeries(x, y, DECIMALS_8, SIGNIFICANT_9),
+                        PlotSeries(x, -y, DECIMALS_8, SIGNIFICANT_9),
+                        '', [(1.5, 2.), (3., -4.)]],
+                       ['SAP', 'PDCSAP', '', 'List'], ['BJD'] * 4,
+                       ['e-/s'] * 4, 0, is_ancillary=[0, 0, 1, 1]),
+            DataSeries('iue', 'swp01687', [], [], [], [], 4)]
+#--------------------
+
+#--------------------
+
+class TestBinaryFormat(unittest.TestCase):
+    """ Main test class. """
+
+    def test_round_trip(self):
+        """ Decoding gives back the same values, bit for bit, and the same
+        JSON. """
+        all_data_series = make_data_series()
+        decoded = decode_binary(encode_binary(all_data_series))
+        self.assertEqual(dumps(decoded), dumps(all_data_series))
+        for old, new in zip(all_data_series, decoded):
+            for old_series, new_series in zip(old.plot_series,
+                                              new.plot_series):
+                if not isinstance(old_series, PlotSeries):
+                    continue
+                self.assertEqual(old_series.x.tobytes(),
+                                 new_series.raw_x.tobytes())
+                self.assertEqual(old_series.y.tobytes(),
+                                 new_series.raw_y.tobytes())
+
+    def test_layout(self):
+        """ The header length, the column alignment and the shared x
+        column. """
+        payload = encode_binary(make_data_series())
+        self.assertEqual(payload[:len(MAGIC)], MAGIC)
+        header_length = struct.unpack(
+            '<I', payload[len(MAGIC):len(MAGIC)+4])[0]
+        columns_start = len(MAGIC) + 4 + header_length
+        self.assertEqual(columns_start % ALIGNMENT, 0)
+        # One shared x column and two y columns of 4 values, and the two
+        # columns of the list of 2 data points.
+        self.assertEqual(len(payload) - columns_start, (3 * 4 + 2 * 2) * 8)
+        decoded = decode_binary(payload)[0].plot_series
+        self.assertTrue(numpy.shares_memory(decoded[0].raw_x,
+                                            decoded[1].raw_x))
+
+    def test_empty(self):
+        """ No DataSeries at all. """
+        self.assertEqual(decode_binary(encode_binary([])), [])
+
+    def test_not_binary(self):
+        """ Payloads that are not in the binary format are rejected. """
+        for payload in [b'', b'[{"errcode": 0}]', MAGIC[:4]]:
+            with self.assertRaises(ValueError):
+                decode_binary(payload)
+#--------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+.. module:: _test_data_series
+
+   :synopsis: Test module for data_series.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import json
+import unittest
+from collections import namedtuple
+import numpy
+from data_series import DataSeries, PlotSeries
+from json_writer import dumps, iter_json_pieces
+from precision import DECIMALS_8, SIGNIFICANT_9
+
+#--------------------
+
+class TestPlotSeries(unittest.TestCase):
+    """ Main test class. """
+
+    def test_storage(self):
+        """ The x and y values are stored as float64 arrays. """
+        plot_series = PlotSeries([1., 2., 3.], numpy.array([4., 5., 6.],
+                                                           dtype='>f4'))
+        for values in [plot_series.raw_x, plot_series.raw_y]:
+            self.assertEqual(values.dtype, numpy.float64)
+        self.assertEqual(len(plot_series), 3)
+        self.assertEqual(list(plot_series), [(1., 4.), (2., 5.), (3., 6.)])
+        self.assertEqual(plot_series.tolist(1, 3), [[2., 5.], [3., 6.]])
+        self.assertFalse(plot_series.has_precision)
+
+    def test_from_points(self):
+        """ Only lists of (x,y) pairs of floats are converted, since only
+        those keep their JSON as float64. """
+        data_point = namedtuple('DataPoint', ['x', 'y'])
+        plot_series = PlotSeries.from_points([data_point(1.5, -2.),
+                                              (3., numpy.float64(4.))])
+        self.assertEqual(plot_series.tolist(), [[1.5, -2.], [3., 4.]])
+        for points in [[], [(1, 2.)], [(1., 'a')], [(1., 2., 3.)], ['ab'],
+                       [(1., True)]]:
+            self.assertIsNone(PlotSeries.from_points(points))
+#--------------------
+
+#--------------------
+
+class TestDataSeries(unittest.TestCase):
+    """ Main test class. """
+
+    def test_json(self):
+        """ The JSON is the same as that of the lists of tuples the plot
+        series are made from. """
+        points = [(2454964.5, 1.25E4), (2454964.52, float('nan'))]
+        data_series = DataSeries('kepler', 'kplr000000001', [points, '', []],
+                                 ['Flux', '', 'Empty'], ['BJD'] * 3,
+                                 ['e-/s'] * 3, 0, is_ancillary=[0, 1, 1])
+        self.assertIsInstance(data_series.plot_series[0], PlotSeries)
+        self.assertEqual(data_series.plot_series[1:], ['', []])
+        expected = {'mission':'kepler', 'obsid':'kplr000000001',
+                    'plot_series':[points, '', []],
+                    'plot_labels':['Flux', '', 'Empty'],
+                    'xunits':['BJD'] * 3, 'yunits':['e-/s'] * 3,
+                    'errcode':0, 'is_ancillary':[0, 1, 1]}
+        self.assertEqual(dumps(data_series),
+                         json.dumps(expected, sort_keys=True))
+
+    def test_is_ancillary(self):
+        """ is_ancillary is only serialized if it was set, and no other
+        attributes can be added. """
+        data_series = DataSeries('iue', 'swp01687', [], [], [], [], 4)
+        self.assertNotIn('is_ancillary', data_series.to_dict())
+        with self.assertRaises(AttributeError):
+            data_series.other = 1
+#--------------------
+
+#--------------------
+
+class TestPlotSeriesPrecision(unittest.TestCase):
+    """ Main test class. """
+    x = [2454964.512345678912, -1.E-9, 0.1 + 0.2, float('nan')]
+    y = [123456.789012345, 1.E-12, -2.5E20, float('inf')]
+
+    def test_rounded_values(self):
+        """ The x and y values are rounded to their precision, and the raw
+        values kept. """
+        plot_series = PlotSeries(self.x, self.y, DECIMALS_8, SIGNIFICANT_9)
+        self.assertTrue(plot_series.has_precision)
+        self.assertEqual(plot_series.raw_x.tolist()[:3], self.x[:3])
+        self.assertEqual(
+            [repr(v) for v in plot_series.tolist()[0]],
+            [repr(float("{0:.8f}".format(self.x[0]))),
+             repr(float("{0:.8e}".format(self.y[0])))])
+
+    def test_json(self):
+        """ The JSON written from the rounded digits is the same as that of
+        the values rounded with string formatting. """
+        plot_series = PlotSeries(self.x, self.y, DECIMALS_8, SIGNIFICANT_9)
+        expected = [[float("{0:.8f}".format(x)), float("{0:.8e}".format(y))]
+                    for x, y in zip(self.x, self.y)]
+        self.assertEqual(''.join(iter_json_pieces(plot_series)),
+                         json.dumps(expected))
+        self.assertEqual(dumps(plot_series), json.dumps(expected))
+
+    def test_one_precision(self):
+        """ Only one of the x and y values has a precision. """
+        plot_series = PlotSeries(self.x, self.y, None, SIGNIFICANT_9)
+        expected = [[x, float("{0:.8e}".format(y))] for x, y in
+                    zip(self.x, self.y)]
+        self.assertEqual(''.join(iter_json_pieces(plot_series)),
+                         json.dumps(expected))
+#--------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+.. module:: _test_decompressed_cache
+
+   :synopsis: Test module for decompressed_cache.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from astropy.io import fits
+import decompressed_cache
+from decompressed_cache import (COPY_EXTENSION, configure_decompressed_cache,
+                                evict_copies, get_copy_path,
+                                get_decompressed_cache, get_decompressed_file)
+from fits_access import open_fits
+
+#--------------------
+
+def write_gzip_fits_file(file_name):
+    """ Writes a gzip-compressed FITS file with a binary table. """
+    table = fits.BinTableHDU.from_columns([
+        fits.Column(name='WAVELENGTH', format='D', array=[1200., 1201.]),
+        fits.Column(name='FLUX', format='D', array=[1.5E-14, 2.5E-14])])
+    fits_bytes = io.BytesIO()
+    fits.HDUList([fits.PrimaryHDU(), table]).writeto(fits_bytes)
+    with gzip.open(file_name, 'wb') as ofile:
+        ofile.write(fits_bytes.getvalue())
+#--------------------
+
+#--------------------
+
+class TestDecompressedCache(unittest.TestCase):
+    """ Main test class. """
+
+    def setUp(self):
+        """ Writes a compressed file and configures a cache directory. """
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "copies")
+        self.file_name = os.path.join(self.temp_dir, "swp01687.mxlo.gz")
+        write_gzip_fits_file(self.file_name)
+        self.addCleanup(configure_decompressed_cache,
+                        *get_decompressed_cache())
+        configure_decompressed_cache(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_copy(self):
+        """ The copy has the decompressed contents, and is reused. """
+        copy_path = get_decompressed_file(self.file_name)
+        self.assertEqual(copy_path, get_copy_path(self.cache_dir,
+                                                  self.file_name))
+        with gzip.open(self.file_name, 'rb') as ifile:
+            with open(copy_path, 'rb') as copy_file:
+                self.assertEqual(ifile.read(), copy_file.read())
+        self.assertEqual(get_decompressed_file(self.file_name), copy_path)
+
+    def test_not_cached(self):
+        """ Uncompressed and missing files, and all files when no cache
+        directory is configured, are read as they are. """
+        plain_file = os.path.join(self.temp_dir, "plain.fits")
+        open(plain_file, 'w').close()
+        missing_file = os.path.join(self.temp_dir, "missing.gz")
+        for file_name in [plain_file, missing_file]:
+            self.assertEqual(get_decompressed_file(file_name), file_name)
+        configure_decompressed_cache(None)
+        self.assertEqual(get_decompressed_file(self.file_name),
+                         self.file_name)
+
+    def test_corrupt(self):
+        """ A corrupt compressed file is read as it is, and no partial copy
+        is left in the cache directory. """
+        with open(self.file_name, 'rb') as ifile:
+            data = bytearray(ifile.read())
+        # Overwrites part of the compressed data, after the gzip header.
+        data[20:28] = b'\xff' * 8
+        with open(self.file_name, 'wb') as ofile:
+            ofile.write(data)
+        self.assertEqual(get_decompressed_file(self.file_name),
+                         self.file_name)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_file_changed(self):
+        """ A changed file has a new copy, since copies are named after the
+        modification time and size of their file. """
+        copy_path = get_decompressed_file(self.file_name)
+        stat_result = os.stat(self.file_name)
+        os.utime(self.file_name, ns=(stat_result.st_atime_ns,
+                                     stat_result.st_mtime_ns + 1000))
+        new_copy_path = get_decompressed_file(self.file_name)
+        self.assertNotEqual(new_copy_path, copy_path)
+        self.assertTrue(os.path.isfile(new_copy_path))
+
+    def test_eviction(self):
+        """ The least recently used copies are evicted first, but not those
+        used in the last EVICT_MIN_AGE seconds. """
+        os.makedirs(self.cache_dir)
+        now = time.time()
+        ages = {'old': 1000., 'older': 2000., 'recent': 1.}
+        for name, age in ages.items():
+            copy_path = os.path.join(self.cache_dir, name + COPY_EXTENSION)
+            with open(copy_path, 'wb') as ofile:
+                ofile.write(b'\0' * 100)
+            os.utime(copy_path, (now - age, now - age))
+        self.assertEqual(evict_copies(self.cache_dir, 250), 1)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)),
+                         ['old' + COPY_EXTENSION, 'recent' + COPY_EXTENSION])
+        self.assertEqual(evict_copies(self.cache_dir, 0), 1)
+        self.assertEqual(os.listdir(self.cache_dir),
+                         ['recent' + COPY_EXTENSION])
+        self.assertGreater(decompressed_cache.EVICT_MIN_AGE, ages['recent'])
+
+    def read_after_eviction(self):
+        """ Reads the file after its copy is found, but removed (as if by
+        another process) before it is opened. """
+        with open_fits(self.file_name) as fits_file:
+            os.remove(fits_file._get_read_name())
+            values = fits_file.columns(1, ['WAVELENGTH', 'FLUX'])
+            self.assertEqual(values['FLUX'].tolist(), [1.5E-14, 2.5E-14])
+
+    def test_copy_evicted(self):
+        """ A file whose copy is removed by another process before it is
+        opened is read from the compressed file, both when it is opened with
+        astropy and when its columns are memory-mapped. """
+        # Nothing is cached about the file yet, so it is opened with astropy.
+        get_decompressed_file(self.file_name)
+        self.read_after_eviction()
+        # Once the file is changed and read from its new copy, the table
+        # layout of the copy is cached and its columns are memory-mapped.
+        stat_result = os.stat(self.file_name)
+        os.utime(self.file_name, ns=(stat_result.st_atime_ns,
+                                     stat_result.st_mtime_ns + 1000))
+        with open_fits(self.file_name) as fits_file:
+            fits_file.columns(1, ['FLUX'])
+        self.read_after_eviction()
+#--------------------
+
+if __name__ == "__main__":
+    unittest.main()
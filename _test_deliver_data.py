@@ -8,6 +8,8 @@
 
 import gzip
 import os
+import shutil
+import tempfile
 import unittest
 import deliver_data
 
@@ -45,9 +47,11 @@ class TestGetDataKepler(unittest.TestCase):
             self.fail(msg="Reference file not found.  Looking for " + old_file)
         self.assertEqual(old_str, new_str)
 
-    # You can't plot more than one lightcurve at a time, so turn this off for
-    # now (it's broken currently witch caches anyways).
-    @unittest.skip("Skipping test of two Kepler lightcurves - unsupported.")
+    # There is no reference file for this case yet.  The splicing of Kepler
+    # short cadence cache files into multi-obsID requests is covered by
+    # TestKeplerSCCache below instead.
+    @unittest.skip("Skipping test of two Kepler lightcurves - no reference"
+                   " file.")
     def test_case03(self):
         """ This uses both Kepler 16 and KIC 757450 to test more than one obsID
         in a single request.  It also includes a mix of cadence types. """
@@ -456,5 +460,70 @@ class TestGetDataKepler(unittest.TestCase):
 
 #--------------------
 
+#--------------------
+
+class TestKeplerSCCache(unittest.TestCase):
+    """ Tests splicing Kepler short cadence cache files into requests for
+    several obsIDs, without reading any data from disk. """
+
+    # A short cadence obsID, which is only ever read from its cache file here.
+    cached_obsid = "kplr000757450_sc_Q000000000033333300"
+
+    # An obsID whose Kepler ID is out of bounds, so it is read (as a DataSeries
+    # with error code 2) without opening any files.
+    read_obsid = "kplr000000001_lc_Q111111111111111111"
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def write_cache_file(self, contents, extension=".cache", opener=open):
+        """ Writes the cache file of the short cadence obsID. """
+        with opener(os.path.join(self.cache_dir, self.cached_obsid +
+                                 extension), 'wt') as ofile:
+            ofile.write(contents + '\n')
+
+    def read_fresh(self):
+        """ Returns the JSON of the other obsID, read on its own. """
+        return deliver_data.deliver_data(["kepler"], [self.read_obsid],
+                                         cache_dir=self.cache_dir)
+
+    def deliver_both(self):
+        """ Returns the JSON of both obsIDs, read in one request. """
+        return deliver_data.deliver_data(
+            ["kepler", "kepler"], [self.cached_obsid, self.read_obsid],
+            cache_dir=self.cache_dir)
+
+    def test_splice(self):
+        """ The cached JSON is spliced in after the freshly read pair (the
+        pairs are sorted by obsID). """
+        fresh_str = self.read_fresh()
+        # The cached JSON is that of the other obsID with a different error
+        # code, so it can only come from the cache file.
+        cached_str = fresh_str.replace('"errcode": 2', '"errcode": 0')
+        self.assertNotEqual(cached_str, fresh_str)
+        self.write_cache_file(cached_str)
+        self.assertEqual(self.deliver_both(),
+                         '[' + fresh_str[1:-1] + ', ' + cached_str[1:-1] +
+                         ']')
+
+    def test_splice_compressed(self):
+        """ A gzip-compressed cache file is spliced in the same way. """
+        fresh_str = self.read_fresh()
+        cached_str = fresh_str.replace('"errcode": 2', '"errcode": 0')
+        self.write_cache_file(cached_str, ".cache.gz", gzip.open)
+        self.assertEqual(self.deliver_both(),
+                         '[' + fresh_str[1:-1] + ', ' + cached_str[1:-1] +
+                         ']')
+
+    def test_splice_empty(self):
+        """ An empty cached list contributes nothing. """
+        self.write_cache_file('[]')
+        self.assertEqual(self.deliver_both(), self.read_fresh())
+
+#--------------------
+
 if __name__ == "__main__":
     unittest.main()
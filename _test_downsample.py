@@ -0,0 +1,115 @@
+"""
+.. module:: _test_downsample
+
+   :synopsis: Test module for downsample.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import unittest
+import numpy
+from data_series import PlotSeries
+from downsample import MIN_MAX_POINTS, downsample_plot_series, lttb_indices
+from precision import DECIMALS_8, SIGNIFICANT_9
+
+#--------------------
+
+def reference_lttb(x, y, max_points):
+    """ A point-by-point Largest-Triangle-Three-Buckets, as in Steinarsson
+    (2013), to check lttb_indices() against. """
+    n_points = len(x)
+
+    def edge(i):
+        """ The start of bucket i. """
+        return int(i * (n_points - 2.) / (max_points - 2)) + 1
+
+    indices = [0]
+    for i in range(max_points - 2):
+        start = edge(i)
+        stop = edge(i + 1)
+        next_stop = min(edge(i + 2), n_points - 1)
+        if i == max_points - 3:
+            stop = n_points - 1
+            next_start, next_stop = n_points - 1, n_points
+        else:
+            next_start = stop
+        average_x = sum(x[next_start:next_stop]) / (next_stop - next_start)
+        average_y = sum(y[next_start:next_stop]) / (next_stop - next_start)
+        kept_x, kept_y = x[indices[-1]], y[indices[-1]]
+        areas = [abs((kept_x - average_x) * (y[j] - kept_y) -
+                     (kept_x - x[j]) * (average_y - kept_y))
+                 for j in range(start, stop)]
+        indices.append(start + areas.index(max(areas)))
+    indices.append(n_points - 1)
+    return indices
+#--------------------
+
+#--------------------
+
+class TestLTTBIndices(unittest.TestCase):
+    """ Main test class. """
+    rng = numpy.random.RandomState(3)
+    x = numpy.sort(rng.uniform(0., 90., 1001))
+    y = rng.normal(0., 1., 1001)
+
+    def test_count_and_endpoints(self):
+        """ Exactly max_points indexes, in increasing order, from the first to
+        the last point. """
+        for max_points in [MIN_MAX_POINTS, 4, 10, 333, 1000]:
+            indices = lttb_indices(self.x, self.y, max_points)
+            self.assertEqual(len(indices), max_points)
+            self.assertEqual(indices[0], 0)
+            self.assertEqual(indices[-1], len(self.x) - 1)
+            self.assertTrue((numpy.diff(indices) > 0).all())
+
+    def test_reference(self):
+        """ The same points as a point-by-point implementation. """
+        x = self.x.tolist()
+        y = self.y.tolist()
+        for max_points in [MIN_MAX_POINTS, 7, 100, 999]:
+            self.assertEqual(lttb_indices(self.x, self.y,
+                                          max_points).tolist(),
+                             reference_lttb(x, y, max_points))
+
+    def test_few_points(self):
+        """ Every point is kept if there are no more than max_points. """
+        for n_points in [0, 1, 2, 50]:
+            self.assertEqual(lttb_indices(self.x[:n_points],
+                                          self.y[:n_points], 50).tolist(),
+                             list(range(n_points)))
+
+    def test_keeps_spike(self):
+        """ A single spike in a flat series is kept. """
+        y = numpy.zeros(1000)
+        y[517] = 10.
+        self.assertIn(517, lttb_indices(numpy.arange(1000.), y, 20))
+#--------------------
+
+#--------------------
+
+class TestDownsamplePlotSeries(unittest.TestCase):
+    """ Main test class. """
+
+    def test_downsample(self):
+        """ Non-finite points are dropped first, and the precision is
+        kept. """
+        y = numpy.arange(100.)
+        y[[0, 50]] = [numpy.nan, numpy.inf]
+        reduced = downsample_plot_series(
+            PlotSeries(numpy.arange(100.), y, DECIMALS_8, SIGNIFICANT_9), 10)
+        self.assertEqual(len(reduced), 10)
+        self.assertTrue(numpy.isfinite(reduced.raw_y).all())
+        self.assertEqual(reduced.raw_x[0], 1.)
+        self.assertEqual(reduced.raw_x[-1], 99.)
+        self.assertEqual((reduced.x_precision, reduced.y_precision),
+                         (DECIMALS_8, SIGNIFICANT_9))
+
+    def test_unchanged(self):
+        """ Short plot series and placeholders are returned as they are. """
+        plot_series = PlotSeries([1., 2.], [3., numpy.nan])
+        self.assertIs(downsample_plot_series(plot_series, 3), plot_series)
+        self.assertEqual(downsample_plot_series('', 3), '')
+#--------------------
+
+if __name__ == "__main__":
+    unittest.main()
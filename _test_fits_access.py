@@ -0,0 +1,122 @@
+"""
+.. module:: _test_fits_access
+
+   :synopsis: Test module for fits_access.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+from astropy.io import fits
+from fits_access import open_fits
+
+#--------------------
+
+def write_fits_file(file_name, n_rows=5):
+    """ Writes a FITS file with a binary table of columns that can be
+    memory-mapped (TIME, FLUX, QUALITY) and columns that can not (a scaled
+    column and a string column). """
+    columns = fits.ColDefs([
+        fits.Column(name='TIME', format='D',
+                    array=2454964.5 + numpy.arange(n_rows) / 48.),
+        fits.Column(name='FLUX', format='E',
+                    array=numpy.linspace(1.E4, 2.E4, n_rows)),
+        fits.Column(name='QUALITY', format='J',
+                    array=numpy.arange(n_rows) * 2),
+        fits.Column(name='SCALED', format='I',
+                    array=numpy.arange(n_rows, dtype=numpy.int16)),
+        fits.Column(name='NAME', format='8A',
+                    array=['row' + str(x) for x in range(n_rows)])])
+    primary = fits.PrimaryHDU()
+    primary.header['OBJECT'] = 'KIC 1'
+    table = fits.BinTableHDU.from_columns(columns)
+    table.header['EXTNAME'] = 'LIGHTCURVE'
+    fits.HDUList([primary, table]).writeto(file_name)
+    # The scaling is added after the raw values are written.
+    fits.setval(file_name, 'TSCAL4', value=0.5, ext=1)
+    fits.setval(file_name, 'TZERO4', value=10., ext=1)
+#--------------------
+
+#--------------------
+
+class TestFITSFile(unittest.TestCase):
+    """ Main test class. """
+    names = ['TIME', 'FLUX', 'QUALITY', 'SCALED', 'NAME']
+
+    def setUp(self):
+        """ Writes a FITS file to read. """
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.temp_dir, "test.fits")
+        write_fits_file(self.file_name)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def check_columns(self, file_name):
+        """ Checks every column against astropy. """
+        with fits.open(self.file_name) as hdulist:
+            expected = {x:numpy.array(hdulist[1].data[x]) for x in
+                        self.names}
+        for _ in range(2):
+            # The second time the file is read with the cached layout.
+            with open_fits(file_name) as fits_file:
+                self.assertEqual(len(fits_file), 2)
+                columns = fits_file.columns(1, [x.lower() for x in
+                                                self.names])
+                for name in self.names:
+                    self.assertEqual(columns[name.lower()].tolist(),
+                                     expected[name].tolist())
+
+    def test_columns(self):
+        """ Mapped and converted columns of an uncompressed file. """
+        self.check_columns(self.file_name)
+        with open_fits(self.file_name) as fits_file:
+            columns = fits_file.columns(1, ['TIME', 'QUALITY'])
+        # Memory-mapped columns can be used after the file is closed.
+        for name in ['TIME', 'QUALITY']:
+            self.assertIsInstance(columns[name].base, numpy.memmap)
+        self.assertEqual(columns['TIME'][0], 2454964.5)
+        self.assertEqual(columns['QUALITY'].dtype.kind, 'i')
+
+    def test_compressed(self):
+        """ A gzip-compressed file is read with astropy. """
+        with open(self.file_name, 'rb') as ifile:
+            with gzip.open(self.file_name + '.gz', 'wb') as ofile:
+                shutil.copyfileobj(ifile, ofile)
+        self.check_columns(self.file_name + '.gz')
+
+    def test_keywords(self):
+        """ Keywords are found in any case. """
+        with open_fits(self.file_name) as fits_file:
+            self.assertEqual(fits_file.keyword(0, 'object'), 'KIC 1')
+            self.assertEqual(fits_file.keyword(1, 'EXTNAME'), 'LIGHTCURVE')
+            with self.assertRaises(KeyError):
+                fits_file.keyword(1, 'NOTTHERE')
+            with self.assertRaises(KeyError):
+                fits_file.columns(1, ['NOTTHERE'])
+
+    def test_file_changed(self):
+        """ A file that is rewritten is read again, not with the layout
+        cached for its old contents. """
+        self.check_columns(self.file_name)
+        os.remove(self.file_name)
+        write_fits_file(self.file_name, n_rows=7)
+        stat_result = os.stat(self.file_name)
+        os.utime(self.file_name, ns=(stat_result.st_atime_ns,
+                                     stat_result.st_mtime_ns + 1000))
+        with open_fits(self.file_name) as fits_file:
+            self.assertEqual(len(fits_file.columns(1, ['TIME'])['TIME']), 7)
+
+    def test_missing(self):
+        """ A file that does not exist raises IOError. """
+        with self.assertRaises(IOError):
+            open_fits(os.path.join(self.temp_dir, "missing.fits"))
+#--------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+.. module:: _test_fits_sidecar
+
+   :synopsis: Test module for fits_sidecar.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+from astropy.io import fits
+from fits_access import open_fits, write_fits_sidecar
+from fits_sidecar import (HEADER_EXTENSION, configure_sidecar_store,
+                          get_sidecar_dir, get_sidecar_path, read_sidecar)
+
+#--------------------
+
+def write_fits_file(file_name):
+    """ Writes a FITS file with a binary table of a numeric column and a
+    string column. """
+    table = fits.BinTableHDU.from_columns([
+        fits.Column(name='TIME', format='D', array=[1.5, 2.5, 3.5]),
+        fits.Column(name='NAME', format='4A', array=['a', 'b', 'c'])])
+    table.header['TELESCOP'] = 'Kepler'
+    fits.HDUList([fits.PrimaryHDU(), table]).writeto(file_name)
+#--------------------
+
+#--------------------
+
+class TestFITSSidecar(unittest.TestCase):
+    """ Main test class. """
+
+    def setUp(self):
+        """ Writes a FITS file and its sidecar. """
+        self.temp_dir = tempfile.mkdtemp()
+        self.sidecar_root = os.path.join(self.temp_dir, "sidecars")
+        self.file_name = os.path.join(self.temp_dir, "test.fits")
+        write_fits_file(self.file_name)
+        write_fits_sidecar(self.file_name, self.sidecar_root)
+        old_sidecar_dir = get_sidecar_dir()
+        self.addCleanup(configure_sidecar_store, old_sidecar_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_fresh(self):
+        """ The sidecar of an unchanged file has its keywords and numeric
+        columns. """
+        header = read_sidecar(self.sidecar_root, self.file_name)
+        self.assertIsNotNone(header)
+        self.assertEqual(header['hdus'][1]['keywords']['TELESCOP'], 'Kepler')
+        self.assertEqual(sorted(header['hdus'][1]['columns']), ['TIME'])
+
+    def test_read_through_sidecar(self):
+        """ With the store configured, keywords and the numeric columns are
+        read from the sidecar, and other columns from the FITS file. """
+        configure_sidecar_store(self.sidecar_root)
+        with open_fits(self.file_name) as fits_file:
+            self.assertEqual(fits_file.keyword(1, 'telescop'), 'Kepler')
+            columns = fits_file.columns(1, ['time'])
+            self.assertIsInstance(columns['time'].base, numpy.memmap)
+            self.assertEqual(columns['time'].tolist(), [1.5, 2.5, 3.5])
+            self.assertEqual(fits_file.columns(1, ['NAME'])['NAME'].tolist(),
+                             ['a', 'b', 'c'])
+
+    def test_file_changed(self):
+        """ The sidecar is ignored once its file's modification time or size
+        changes. """
+        stat_result = os.stat(self.file_name)
+        os.utime(self.file_name, ns=(stat_result.st_atime_ns,
+                                     stat_result.st_mtime_ns + 1000))
+        self.assertIsNone(read_sidecar(self.sidecar_root, self.file_name))
+        write_fits_sidecar(self.file_name, self.sidecar_root)
+        self.assertIsNotNone(read_sidecar(self.sidecar_root, self.file_name))
+        with open(self.file_name, 'ab') as ofile:
+            ofile.write(b'\0' * 2880)
+        os.utime(self.file_name, ns=(stat_result.st_atime_ns,
+                                     stat_result.st_mtime_ns + 1000))
+        self.assertIsNone(read_sidecar(self.sidecar_root, self.file_name))
+
+    def test_old_version(self):
+        """ A sidecar written by another version is ignored. """
+        header_file = (get_sidecar_path(self.sidecar_root, self.file_name) +
+                       HEADER_EXTENSION)
+        with open(header_file) as ifile:
+            header = json.load(ifile)
+        header['version'] -= 1
+        with open(header_file, 'w') as ofile:
+            json.dump(header, ofile)
+        self.assertIsNone(read_sidecar(self.sidecar_root, self.file_name))
+
+    def test_missing(self):
+        """ Files without a sidecar, or that no longer exist, have none. """
+        other_file = os.path.join(self.temp_dir, "other.fits")
+        write_fits_file(other_file)
+        self.assertIsNone(read_sidecar(self.sidecar_root, other_file))
+        os.remove(self.file_name)
+        self.assertIsNone(read_sidecar(self.sidecar_root, self.file_name))
+#--------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+.. module:: _test_json_writer
+
+   :synopsis: Test module for json_writer.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import json
+import unittest
+import numpy
+from data_series import DataSeries, PlotSeries
+from json_writer import (ELEMENTS_PER_PIECE, WIRE_FORMATS, JSONBudgetExceeded,
+                         encode_data_series, iter_json_pieces, json_encoder,
+                         to_wire_format)
+from precision import DECIMALS_8, SIGNIFICANT_9
+
+#--------------------
+
+def make_data_series():
+    """ Returns a DataSeries with plot series of every kind the readers
+    return. """
+    rng = numpy.random.RandomState(7)
+    n_points = 2 * ELEMENTS_PER_PIECE + 5
+    x = numpy.sort(rng.uniform(2454900., 2455000., n_points))
+    y = rng.normal(1.E4, 50., n_points)
+    y[[3, 10, n_points-1]] = [numpy.nan, numpy.inf, -0.]
+    return DataSeries(
+        'kepler', 'kplr000000001_lc_Q111111111111111111',
+        [PlotSeries(x, y, DECIMALS_8, SIGNIFICANT_9),
+         PlotSeries(x, y * 2.),
+         [(1.5, 2.25), (3., -4.)], '', []],
+        ['Flux Å', 'Flux x2', 'Short', '', 'Empty'],
+        ['BJD'] * 5, ['e-/s'] * 5, 0, is_ancillary=[0, 1, 0, 0, 1])
+#--------------------
+
+#--------------------
+
+class TestIterJSONPieces(unittest.TestCase):
+    """ Main test class. """
+
+    def check_pieces(self, obj):
+        """ Checks that the pieces join into json.dumps() of the object. """
+        self.assertEqual(''.join(iter_json_pieces(obj)),
+                         json.dumps(obj, ensure_ascii=False,
+                                    default=json_encoder, sort_keys=True))
+
+    def test_data_series(self):
+        """ A DataSeries with long plot series, with and without declared
+        precisions. """
+        self.check_pieces(make_data_series())
+
+    def test_wire_formats(self):
+        """ The dicts each wire format serializes. """
+        for wire_format in WIRE_FORMATS:
+            self.check_pieces(to_wire_format(make_data_series(),
+                                             wire_format))
+
+    def test_other_objects(self):
+        """ Empty containers, nested lists and long lists of numbers. """
+        self.check_pieces({})
+        self.check_pieces([])
+        self.check_pieces([[], {}, [[1, 2.5]], {'b': [None], 'a': 'x'}])
+        self.check_pieces(list(range(3 * ELEMENTS_PER_PIECE)))
+        self.check_pieces(numpy.arange(ELEMENTS_PER_PIECE + 1.))
+
+    def test_budget(self):
+        """ The budget stops the serialization, but JSON of exactly the budget
+        is returned. """
+        data_series = make_data_series()
+        json_string = encode_data_series(data_series)
+        self.assertEqual(encode_data_series(data_series, len(json_string)),
+                         json_string)
+        with self.assertRaises(JSONBudgetExceeded):
+            encode_data_series(data_series, len(json_string) - 1)
+#--------------------
+
+if __name__ == "__main__":
+    unittest.main()
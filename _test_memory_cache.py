@@ -0,0 +1,99 @@
+"""
+.. module:: _test_memory_cache
+
+   :synopsis: Test module for memory_cache.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from memory_cache import ByteLRUCache
+from response_cache import stat_source_files
+
+#--------------------
+
+class TestByteLRUCache(unittest.TestCase):
+    """ Main test class. """
+    values = {x:['{"obsid": "' + x + '"}'] for x in 'abcd'}
+    size = ByteLRUCache.get_size(values['a'])
+
+    def test_eviction_order(self):
+        """ The least recently used entries are evicted first, and a get
+        counts as a use. """
+        cache = ByteLRUCache(3 * self.size)
+        for key in 'abc':
+            cache.put(key, self.values[key])
+        self.assertEqual(cache.get('a'), self.values['a'])
+        cache.put('d', self.values['d'])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual([cache.get(x) for x in 'acd'],
+                         [self.values[x] for x in 'acd'])
+        self.assertEqual(cache.stats(),
+                         {'hits':4, 'misses':1, 'evictions':1, 'entries':3,
+                          'bytes':3 * self.size, 'max_bytes':3 * self.size})
+
+    def test_replace(self):
+        """ Replacing a value does not count it twice. """
+        cache = ByteLRUCache(2 * self.size)
+        cache.put('a', self.values['a'])
+        cache.put('a', self.values['b'])
+        cache.put('c', self.values['c'])
+        self.assertEqual(cache.get('a'), self.values['b'])
+        self.assertEqual(cache.n_bytes, 2 * self.size)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_too_big(self):
+        """ A value larger than the cache is never cached, and nothing is
+        evicted for it. """
+        cache = ByteLRUCache(2 * self.size)
+        cache.put('a', self.values['a'])
+        cache.put('big', ['x' * (2 * self.size)])
+        self.assertIsNone(cache.get('big'))
+        self.assertEqual(cache.get('a'), self.values['a'])
+        self.assertEqual((cache.hits, cache.misses, cache.evictions),
+                         (1, 1, 0))
+#--------------------
+
+#--------------------
+
+class TestFreshness(unittest.TestCase):
+    """ Main test class. """
+    value = ['{"obsid": "a"}']
+
+    def setUp(self):
+        """ Writes a source file for the cached value. """
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_file = os.path.join(self.temp_dir, "source.fits")
+        with open(self.source_file, 'w') as ofile:
+            ofile.write("data")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_source_changed(self):
+        """ A value is no longer returned once its source file changes, and
+        is removed from the cache. """
+        cache = ByteLRUCache(1000)
+        cache.put('a', self.value, stat_source_files([self.source_file]))
+        self.assertEqual(cache.get('a'), self.value)
+        stat_result = os.stat(self.source_file)
+        os.utime(self.source_file, ns=(stat_result.st_atime_ns,
+                                       stat_result.st_mtime_ns + 1000))
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual((cache.hits, cache.misses, cache.n_bytes), (1, 1, 0))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_max_age(self):
+        """ A value with no source files is only used for max_age seconds,
+        and one stored without sources is always used. """
+        cache = ByteLRUCache(1000, max_age=-1.)
+        cache.put('remote', self.value, [])
+        cache.put('always', self.value)
+        self.assertIsNone(cache.get('remote'))
+        self.assertEqual(cache.get('always'), self.value)
+
+if __name__ == "__main__":
+    unittest.main()
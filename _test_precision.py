@@ -0,0 +1,126 @@
+"""
+.. module:: _test_precision
+
+   :synopsis: Test module for precision.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import json
+import unittest
+import numpy
+from precision import (DECIMALS_8, SIGNIFICANT_9, Precision,
+                       format_json_pairs, round_decimals, round_significant)
+
+#--------------------
+
+def make_values():
+    """ Returns floats of many magnitudes, with the special cases that
+    precision.py handles separately. """
+    rng = numpy.random.RandomState(42)
+    values = [0., -0., numpy.nan, -numpy.nan, numpy.inf, -numpy.inf,
+              # Exact ties, which string formatting rounds to even.
+              2.**-9, -2.**-9, 0.125, 2.5, 0.5, 1.5, 1.25E-5, 2.**-30,
+              # Values written with an exponent, or near where that starts.
+              1.E-4, 9.99999999E-5, 1.5E-5, 1.E16, 9.999999999999998E15,
+              1.234567891E20, 5.E-324, 1.7976931348623157E308,
+              # Values that round to zero or carry into the next digit.
+              4.9E-9, 5.E-9, 9.999999999, 0.999999999996]
+    values += (rng.uniform(-1., 1., 2000) *
+               10.**rng.randint(-12, 20, 2000)).tolist()
+    values += rng.normal(2454970., 500., 500).tolist()
+    values += rng.normal(0., 1.E-6, 500).astype(numpy.float32).tolist()
+    return numpy.array(values)
+#--------------------
+
+#--------------------
+
+class TestRounding(unittest.TestCase):
+    """ Main test class. """
+    values = make_values()
+
+    def check_rounding(self, rounded, string_format):
+        """ Checks that each rounded value is the same float as the value
+        formatted as a string and read back. """
+        expected = [float(string_format.format(x)) for x in
+                    self.values.tolist()]
+        self.assertEqual([repr(x) for x in expected],
+                         [repr(x) for x in rounded.tolist()])
+
+    def test_round_decimals(self):
+        """ Rounding to decimal places matches "{0:.<n>f}". """
+        for decimals in [0, 1, 4, 8, 12]:
+            self.check_rounding(round_decimals(self.values, decimals),
+                                "{0:." + str(decimals) + "f}")
+
+    def test_round_significant(self):
+        """ Rounding to significant digits matches "{0:.<n-1>e}". """
+        for digits in [1, 3, 9, 15, 17]:
+            self.check_rounding(round_significant(self.values, digits),
+                                "{0:." + str(digits - 1) + "e}")
+
+    def test_negative_zero(self):
+        """ Values rounded to zero keep their sign. """
+        rounded = round_decimals([-1.E-12, 1.E-12, -0.], 8)
+        self.assertEqual([repr(x) for x in rounded.tolist()],
+                         ['-0.0', '0.0', '-0.0'])
+
+    def test_shape(self):
+        """ The rounded values keep the shape of the values. """
+        values = self.values[:24].reshape(4, 6)
+        self.assertEqual(round_significant(values).shape, (4, 6))
+#--------------------
+
+#--------------------
+
+class TestFormatJSONPairs(unittest.TestCase):
+    """ Main test class. """
+    values = make_values()
+
+    def check_pairs(self, x, y, x_precision, y_precision):
+        """ Checks the JSON of the pairs against json.dumps() of the rounded
+        values. """
+        def read_back(values, precision):
+            """ Rounds with string formatting. """
+            if precision is None:
+                return values.tolist()
+            if precision.kind == 'decimals':
+                string_format = "{0:." + str(precision.digits) + "f}"
+            else:
+                string_format = "{0:." + str(precision.digits - 1) + "e}"
+            return [float(string_format.format(v)) for v in values.tolist()]
+        pairs = [list(p) for p in zip(read_back(x, x_precision),
+                                      read_back(y, y_precision))]
+        self.assertEqual(json.dumps(pairs)[1:-1],
+                         format_json_pairs(x, y, x_precision, y_precision))
+
+    def test_default_precisions(self):
+        """ The precisions the readers use. """
+        self.check_pairs(self.values, self.values[::-1], DECIMALS_8,
+                         SIGNIFICANT_9)
+
+    def test_other_precisions(self):
+        """ Mixed, unrounded and many-digit precisions. """
+        self.check_pairs(self.values, self.values, None,
+                         Precision('decimals', 3))
+        self.check_pairs(self.values, self.values,
+                         Precision('significant', 17),
+                         Precision('significant', 1))
+
+    def test_special_values(self):
+        """ NaN, infinite values, signed zeros and exponents. """
+        x = numpy.array([numpy.nan, numpy.inf, -numpy.inf, -0., 1.E-7,
+                         1.E17])
+        self.check_pairs(x, x, SIGNIFICANT_9, DECIMALS_8)
+        self.assertEqual(format_json_pairs(x[:3], x[:3], None, None),
+                         '[NaN, NaN], [Infinity, Infinity], '
+                         '[-Infinity, -Infinity]')
+
+    def test_empty(self):
+        """ No pairs give an empty string. """
+        self.assertEqual(format_json_pairs([], [], DECIMALS_8,
+                                           SIGNIFICANT_9), '')
+#--------------------
+
+if __name__ == "__main__":
+    unittest.main()
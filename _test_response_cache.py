@@ -0,0 +1,128 @@
+"""
+.. module:: _test_response_cache
+
+   :synopsis: Test module for response_cache.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+import response_cache
+
+#--------------------
+
+class TestResponseCache(unittest.TestCase):
+    """ Main test class. """
+    mission = "kepler"
+    obsid = "kplr000000001_lc_Q111111111111111111"
+    fragments = ['{"errcode": 0, "mission": "kepler"}']
+
+    def setUp(self):
+        """ Makes a cache directory and a source file, which the requests in
+        these tests read from. """
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_root = os.path.join(self.temp_dir, "cache")
+        self.source_file = os.path.join(self.temp_dir, "source.fits")
+        with open(self.source_file, 'w') as ofile:
+            ofile.write("data")
+        patcher = mock.patch('response_cache.get_source_files',
+                             return_value=[self.source_file])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_entry(self, sources=None):
+        """ Writes an entry for the request, with the source file as stat'ed
+        now if no sources are given. """
+        if sources is None:
+            sources = response_cache.stat_request_sources(self.mission,
+                                                          self.obsid)
+        response_cache.write_entry(self.cache_root, self.mission, self.obsid,
+                                   ' ', ' ', ' ', self.fragments, sources)
+
+    def read_entry(self):
+        """ Reads the entry for the request. """
+        return response_cache.read_entry(self.cache_root, self.mission,
+                                         self.obsid)
+
+    def test_round_trip(self):
+        """ An entry is read back while its source file is unchanged. """
+        self.write_entry()
+        self.assertEqual(self.read_entry(), self.fragments)
+        self.assertTrue(response_cache.has_fresh_entry(
+            self.cache_root, self.mission, self.obsid))
+
+    def test_mtime_changed(self):
+        """ Changing the modification time of the source file invalidates
+        the entry. """
+        self.write_entry()
+        stat_result = os.stat(self.source_file)
+        os.utime(self.source_file, ns=(stat_result.st_atime_ns,
+                                       stat_result.st_mtime_ns + 1000))
+        self.assertIsNone(self.read_entry())
+        self.assertFalse(response_cache.has_fresh_entry(
+            self.cache_root, self.mission, self.obsid))
+
+    def test_size_changed(self):
+        """ Changing the size of the source file, even with the same
+        modification time, invalidates the entry. """
+        self.write_entry()
+        stat_result = os.stat(self.source_file)
+        with open(self.source_file, 'a') as ofile:
+            ofile.write("more data")
+        os.utime(self.source_file, ns=(stat_result.st_atime_ns,
+                                       stat_result.st_mtime_ns))
+        self.assertIsNone(self.read_entry())
+
+    def test_source_removed(self):
+        """ Removing the source file invalidates the entry. """
+        self.write_entry()
+        os.remove(self.source_file)
+        self.assertIsNone(self.read_entry())
+
+    def test_changed_while_read(self):
+        """ Nothing is written if the source file changed after it was
+        stat'ed, or could not be stat'ed. """
+        sources = response_cache.stat_request_sources(self.mission,
+                                                      self.obsid)
+        with open(self.source_file, 'a') as ofile:
+            ofile.write("more data")
+        self.write_entry(sources)
+        self.assertIsNone(self.read_entry())
+        response_cache.write_entry(self.cache_root, self.mission, self.obsid,
+                                   ' ', ' ', ' ', self.fragments, None)
+        self.assertIsNone(self.read_entry())
+        self.assertFalse(os.path.exists(self.cache_root))
+
+    def test_is_entry_fresh(self):
+        """ Entries of another version are never fresh, and those without
+        source files only until they are max_age seconds old. """
+        sources = response_cache.stat_source_files([self.source_file])
+        version = response_cache.RESPONSE_CACHE_VERSION
+        self.assertTrue(response_cache.is_entry_fresh(
+            {'version':version, 'sources':sources}))
+        self.assertFalse(response_cache.is_entry_fresh(
+            {'version':version - 1, 'sources':sources}))
+        remote = {'version':version, 'sources':[],
+                  'created':time.time() - 100.}
+        self.assertTrue(response_cache.is_entry_fresh(remote, 200.))
+        self.assertFalse(response_cache.is_entry_fresh(remote, 50.))
+        # The meta file records the source as stat'ed.
+        self.write_entry()
+        entry_path = response_cache.get_entry_path(
+            self.cache_root, response_cache.get_cache_key(self.mission,
+                                                          self.obsid))
+        with open(entry_path + response_cache.META_EXTENSION) as ifile:
+            self.assertEqual(json.load(ifile)['sources'], sources)
+#--------------------
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+.. module:: _test_size_estimator
+
+   :synopsis: Test module for size_estimator.py
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import unittest
+import numpy
+from data_series import DataSeries, PlotSeries
+from deliver_data import serialize_data_series
+from json_writer import WIRE_FORMATS, JSONBudgetExceeded
+from precision import DECIMALS_8, SIGNIFICANT_9
+from size_estimator import estimate_json_size
+
+#--------------------
+
+def make_data_series(n_points):
+    """ Makes a spectrum on a regular wavelength grid, with fluxes of two
+    significant digits, so that most digits of both are trailing zeros. """
+    wavelengths = 1000. + 0.5 * numpy.arange(n_points)
+    fluxes = numpy.round(numpy.linspace(1., 9.9, n_points), 1) * 1.E-14
+    return DataSeries('hst', 'lbgu22z3q',
+                      [PlotSeries(wavelengths, fluxes, DECIMALS_8,
+                                  SIGNIFICANT_9), ''],
+                      ['Flux', ''], ['Angstroms'] * 2, ['ergs/cm^2/s/A'] * 2,
+                      0)
+#--------------------
+
+#--------------------
+
+class TestSizeEstimator(unittest.TestCase):
+    """ Main test class. """
+
+    def test_trailing_zeros(self):
+        """ The estimate leaves out the trailing zeros that are not written,
+        in every wire format. """
+        data_series = make_data_series(100000)
+        for wire_format in WIRE_FORMATS:
+            fragments = serialize_data_series([data_series], None,
+                                              wire_format)
+            self.assertEqual(estimate_json_size(data_series, wire_format),
+                             len(fragments[0]))
+            self.assertEqual(estimate_json_size([data_series], wire_format),
+                             len(fragments[0]) + 2)
+
+    def test_budget(self):
+        """ JSON that fits in the budget is serialized, and JSON that does
+        not raises JSONBudgetExceeded. """
+        data_series = make_data_series(100000)
+        length = len(serialize_data_series([data_series])[0])
+        self.assertEqual(len(serialize_data_series(
+            [data_series], budget=length * 1.02)[0]), length)
+        with self.assertRaises(JSONBudgetExceeded):
+            serialize_data_series([data_series], budget=length - 1)
+#--------------------
+
+if __name__ == "__main__":
+    unittest.main()
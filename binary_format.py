@@ -0,0 +1,156 @@
+"""
+.. module:: binary_format
+
+   :synopsis: Writes and reads a binary alternative to the returned JSON.  The
+              labels, units, error codes, etc. of each DataSeries are written
+              as a small JSON header, and the x and y values of each plot
+              series as raw little-endian float64 columns, so neither side has
+              to convert floats to or from text and a reader can use the
+              columns in place (e.g., with numpy.frombuffer() or a
+              Float64Array).
+
+              The layout is:
+                * MAGIC (8 bytes).
+                * The length of the header, as a little-endian uint32.
+                * The header, as UTF-8 JSON, padded with spaces so the columns
+                  start at a multiple of ALIGNMENT bytes from the beginning.
+                * The columns, one after another.
+
+              The header is {"dtype": "<f8", "data_series": [...]}, where each
+              DataSeries has the same keys as in the JSON except for
+              "plot_series".  A plot series of data points is written as
+              {"x": <column>, "y": <column>}, where each column is
+              {"offset": <bytes from the start of the columns>, "count": <number
+              of values>}.  Plot series that share their x values point to the
+              same x column.  Any other plot series (e.g., the '' placeholders
+              some readers return) is written as {"values": <its JSON>}.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import json
+import numbers
+import struct
+import numpy
+from data_series import DataSeries, PlotSeries
+from json_writer import dumps, find_x_axis
+
+# The first bytes of every payload.  The last two bytes are the version of the
+# layout.
+MAGIC = b'MASTDD\x01\x00'
+
+# The columns start at a multiple of this many bytes from the beginning of the
+# payload.
+ALIGNMENT = 64
+
+# The type of the values in the columns: little-endian float64.
+COLUMN_DTYPE = numpy.dtype('<f8')
+
+#--------------------
+def _get_float_columns(plot_series):
+    """
+    Returns the x and y values of a plot series as float64 arrays, or None if
+    it is not a list of data points with numeric values.
+    """
+    if isinstance(plot_series, PlotSeries):
+        return plot_series.x, plot_series.y
+    if (isinstance(plot_series, list) and plot_series and
+            all(isinstance(x, (list, tuple)) and len(x) == 2 and
+                all(isinstance(y, numbers.Real) and not isinstance(y, bool)
+                    for y in x) for x in plot_series)):
+        columns = numpy.asarray(plot_series, dtype=COLUMN_DTYPE)
+        return columns[:, 0], columns[:, 1]
+    return None
+#--------------------
+
+#--------------------
+def encode_binary(all_data_series):
+    """
+    Writes a list of DataSeries objects in the binary format.
+
+    :param all_data_series: The DataSeries objects to write.
+
+    :type all_data_series: list
+
+    :returns: bytes -- The binary payload.
+    """
+    columns = []
+    offset = 0
+    header_series = []
+
+    def add_column(values):
+        nonlocal offset
+        columns.append(numpy.ascontiguousarray(values, dtype=COLUMN_DTYPE))
+        column = {'offset':offset, 'count':len(values)}
+        offset += columns[-1].nbytes
+        return column
+
+    for data_series in all_data_series:
+        obj = data_series.to_dict()
+        # The x values of each distinct x axis, and the column they are in.
+        x_axes = []
+        x_columns = []
+        plot_series = []
+        for series in obj['plot_series']:
+            float_columns = _get_float_columns(series)
+            if float_columns is None:
+                plot_series.append({'values':series})
+                continue
+            x_index = find_x_axis(x_axes, float_columns[0])
+            if x_index == len(x_columns):
+                x_columns.append(add_column(float_columns[0]))
+            plot_series.append({'x':x_columns[x_index],
+                                'y':add_column(float_columns[1])})
+        obj['plot_series'] = plot_series
+        header_series.append(obj)
+
+    header = dumps({'dtype':COLUMN_DTYPE.str,
+                    'data_series':header_series}).encode('utf-8')
+    # Pad the header with spaces, ending with a newline, so that the columns
+    # are aligned.
+    header_start = len(MAGIC) + 4
+    padding = -(header_start + len(header) + 1) % ALIGNMENT
+    header = header + b' ' * padding + b'\n'
+    return b''.join([MAGIC, struct.pack('<I', len(header)), header] +
+                    [x.tobytes() for x in columns])
+#--------------------
+
+#--------------------
+def decode_binary(data):
+    """
+    Reads a payload written in the binary format.  The x and y values of each
+    plot series are numpy arrays that use the payload's memory, not copies.
+
+    :param data: The binary payload.
+
+    :type data: bytes
+
+    :returns: list -- The DataSeries objects.
+
+    :raises: ValueError if the payload is not in the binary format.
+    """
+    header_start = len(MAGIC) + 4
+    if len(data) < header_start or data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Payload is not in the binary format.")
+    header_length = struct.unpack('<I', data[len(MAGIC):header_start])[0]
+    header = json.loads(bytes(data[header_start:header_start+header_length])
+                        .decode('utf-8'))
+    columns_start = header_start + header_length
+    dtype = numpy.dtype(header['dtype'])
+
+    def get_column(column):
+        return numpy.frombuffer(data, dtype=dtype, count=column['count'],
+                                offset=columns_start + column['offset'])
+
+    all_data_series = []
+    for obj in header['data_series']:
+        plot_series = [series['values'] if 'values' in series else
+                       PlotSeries(get_column(series['x']),
+                                  get_column(series['y']))
+                       for series in obj['plot_series']]
+        all_data_series.append(DataSeries(
+            obj['mission'], obj['obsid'], plot_series, obj['plot_labels'],
+            obj['xunits'], obj['yunits'], obj['errcode'],
+            obj.get('is_ancillary')))
+    return all_data_series
+#--------------------
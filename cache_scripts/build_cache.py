@@ -0,0 +1,454 @@
+"""
+.. module:: build_cache
+
+   :synopsis: Builds cached results for a list of observations, for any
+              mission, across a pool of worker processes.  Entries whose source
+              files have not changed since they were written are skipped, so
+              the script can be re-run after a reprocessing (or a crash) and
+              only does the work that is left.  It must be run from the same
+              directory as deliver_data.py, since the data paths are relative.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deliver_data import CACHE_DIR_DEFAULT, retrieve_fragments
+from fits_access import write_fits_sidecar
+from fits_sidecar import read_sidecar
+from lightcurve_pyramid import get_pyramid_file, load_pyramid, read_pyramid
+from mission_registry import MISSION_READERS, get_source_files
+from payload_encoding import (ENCODING_DEFAULT, ENCODING_EXTENSIONS,
+                              encode_payload, get_available_encodings)
+from response_cache import (configure_response_cache, has_fresh_entry,
+                            remove_entry, write_atomically)
+
+# The kinds of cache that can be built.  "response" entries are read by
+# deliver_data() when given a response cache directory, "kepler_sc" files are
+# the Kepler short cadence cache files it reads from its cache directory,
+# "pyramid" files are the levels of detail read by lightcurve_pyramid.py, and
+# "sidecar" files are the pre-converted FITS files read by fits_access.py.
+CACHE_FORMATS = ['response', 'kepler_sc', 'pyramid', 'sidecar']
+CACHE_FORMAT_DEFAULT = 'response'
+
+# Temporary files older than this many seconds are left over from a build
+# that stopped part way, and are removed when a build starts.
+TEMP_FILE_MAX_AGE = 3600.
+
+#--------------------
+def read_obsid_list(list_file, mission):
+    """
+    Reads the list of observations to build cached results for.
+
+    :param list_file: CSV file with one observation per line, in the form
+    "obsid[,filter[,url[,target]]]".  A file with one obsID per line (such as
+    Kepler_Lightcurves.csv) is also valid.
+
+    :type list_file: str
+
+    :param mission: The mission the observations come from.
+
+    :type mission: str
+
+    :returns: list -- The (mission, obsid, filter, url, target) of each
+    observation.
+    """
+    requests = []
+    with open(list_file, 'r', newline='') as ifile:
+        for row in csv.reader(ifile):
+            row = [x.strip() for x in row]
+            if not row or not row[0]:
+                continue
+            row = row + [' '] * (4 - len(row))
+            requests.append((mission, row[0], row[1] or ' ', row[2] or ' ',
+                             row[3] or ' '))
+    return requests
+#--------------------
+
+#--------------------
+def remove_temp_files(cache_dir):
+    """
+    Removes temporary files left in a cache directory by a build that stopped
+    part way.
+
+    :param cache_dir: The cache directory.
+
+    :type cache_dir: str
+
+    :returns: int -- The number of files removed.
+    """
+    n_removed = 0
+    now = time.time()
+    for temp_file in (glob.glob(os.path.join(cache_dir, '*.tmp')) +
+                      glob.glob(os.path.join(cache_dir, '*', '*.tmp'))):
+        try:
+            if now - os.path.getmtime(temp_file) > TEMP_FILE_MAX_AGE:
+                os.remove(temp_file)
+                n_removed += 1
+        except OSError:
+            pass
+    return n_removed
+#--------------------
+
+#--------------------
+def is_kepler_sc_cache_fresh(cache_file, source_files):
+    """
+    Checks whether a Kepler short cadence cache file is newer than all of the
+    files it was made from.
+
+    :param cache_file: The cache file.
+
+    :type cache_file: str
+
+    :param source_files: The paths of the source files.
+
+    :type source_files: list
+
+    :returns: bool -- True if the cache file exists and is up to date.
+    """
+    try:
+        cache_mtime = os.stat(cache_file).st_mtime_ns
+        return all(os.stat(x).st_mtime_ns <= cache_mtime for x in
+                   source_files)
+    except OSError:
+        return False
+#--------------------
+
+#--------------------
+def build_kepler_sc_entry(request, cache_dir, force, encoding):
+    """
+    Writes the Kepler short cadence cache file for one observation.
+
+    :param request: The (mission, obsid, filter, url, target) of the
+    observation.
+
+    :type request: tuple
+
+    :param cache_dir: Directory to write the cache file to.
+
+    :type cache_dir: str
+
+    :param force: If True, the cache file is written even if it is up to date.
+
+    :type force: bool
+
+    :param encoding: The encoding to compress the cache file with, or None for
+    no compression.
+
+    :type encoding: str
+
+    :returns: str -- "built", "skipped" or "error".
+    """
+    mission, obsid = request[0], request[1]
+    if mission != 'kepler' or "_sc_" not in obsid:
+        return "error"
+    source_files = get_source_files(*request)
+    if not source_files:
+        return "error"
+    cache_file = os.path.join(cache_dir, obsid + ".cache")
+    if not force and is_kepler_sc_cache_fresh(
+            cache_file + ENCODING_EXTENSIONS[encoding], source_files):
+        return "skipped"
+    # The data are read directly, not through deliver_data(), since that would
+    # return the cache file being replaced.
+    payload = '[' + ', '.join(retrieve_fragments(*request)) + ']'
+    write_atomically(cache_file + ENCODING_EXTENSIONS[encoding],
+                     encode_payload(payload, encoding))
+    # Remove any cache file written with a different encoding, since
+    # deliver_data() would otherwise read whichever it finds first.
+    for extension in ENCODING_EXTENSIONS.values():
+        if (extension != ENCODING_EXTENSIONS[encoding] and
+                os.path.isfile(cache_file + extension)):
+            os.remove(cache_file + extension)
+    return "built"
+#--------------------
+
+#--------------------
+def build_response_entry(request, cache_dir, force):
+    """
+    Writes the response cache entry for one observation.
+
+    :param request: The (mission, obsid, filter, url, target) of the
+    observation.
+
+    :type request: tuple
+
+    :param cache_dir: The response cache directory.
+
+    :type cache_dir: str
+
+    :param force: If True, the entry is written even if it is up to date.
+
+    :type force: bool
+
+    :returns: str -- "built", "skipped" or "error".
+    """
+    if not force and has_fresh_entry(cache_dir, *request):
+        return "skipped"
+    if force:
+        remove_entry(cache_dir, *request)
+    retrieve_fragments(*request, response_cache_dir=cache_dir)
+    # Only data read without any errors are written to the cache.
+    return "built" if has_fresh_entry(cache_dir, *request) else "error"
+#--------------------
+
+#--------------------
+def build_pyramid_entry(request, cache_dir, force):
+    """
+    Writes the pyramid file (see lightcurve_pyramid.py) for one observation.
+
+    :param request: The (mission, obsid, filter, url, target) of the
+    observation.
+
+    :type request: tuple
+
+    :param cache_dir: The pyramid directory.
+
+    :type cache_dir: str
+
+    :param force: If True, the pyramid file is written even if it is up to
+    date.
+
+    :type force: bool
+
+    :returns: str -- "built", "skipped" or "error".
+    """
+    pyramid_file = get_pyramid_file(cache_dir, *request)
+    if read_pyramid(pyramid_file) is not None:
+        if not force:
+            return "skipped"
+        os.remove(pyramid_file)
+    load_pyramid(*request, pyramid_dir=cache_dir)
+    # Only data read without any errors are written to a pyramid file.
+    return "built" if read_pyramid(pyramid_file) is not None else "error"
+#--------------------
+
+#--------------------
+def build_sidecar_entry(request, cache_dir, force):
+    """
+    Writes the sidecar (see fits_sidecar.py) of each FITS file read for one
+    observation.
+
+    :param request: The (mission, obsid, filter, url, target) of the
+    observation.
+
+    :type request: tuple
+
+    :param cache_dir: The sidecar directory.
+
+    :type cache_dir: str
+
+    :param force: If True, the sidecars are written even if they are up to
+    date.
+
+    :type force: bool
+
+    :returns: str -- "built", "skipped" or "error".
+    """
+    source_files = get_source_files(*request)
+    if not source_files:
+        return "error"
+    status = "skipped"
+    for source_file in source_files:
+        if force or read_sidecar(cache_dir, source_file) is None:
+            write_fits_sidecar(source_file, cache_dir)
+            status = "built"
+    return status
+#--------------------
+
+#--------------------
+def build_entry(request, cache_dir, cache_format, force, encoding):
+    """
+    Writes the cached result for one observation.  This is a module-level
+    function so that it can be run in a worker process.
+
+    :param request: The (mission, obsid, filter, url, target) of the
+    observation.
+
+    :type request: tuple
+
+    :param cache_dir: Directory to write the cached result to.
+
+    :type cache_dir: str
+
+    :param cache_format: The kind of cache to build, one of CACHE_FORMATS.
+
+    :type cache_format: str
+
+    :param force: If True, the result is written even if it is up to date.
+
+    :type force: bool
+
+    :param encoding: The encoding to compress the result with, or None for no
+    compression.
+
+    :type encoding: str
+
+    :returns: tuple -- The request, "built", "skipped" or "error", and the
+    type and message of the exception that stopped the build (None if there
+    was not one).
+    """
+    error = None
+    try:
+        if cache_format == 'kepler_sc':
+            status = build_kepler_sc_entry(request, cache_dir, force,
+                                           encoding)
+        elif cache_format == 'pyramid':
+            status = build_pyramid_entry(request, cache_dir, force)
+        elif cache_format == 'sidecar':
+            status = build_sidecar_entry(request, cache_dir, force)
+        else:
+            status = build_response_entry(request, cache_dir, force)
+    except Exception as err:
+        # One bad observation should not stop the rest of the build, but the
+        # cause is reported.
+        status = "error"
+        error = type(err).__name__ + ": " + str(err)
+    return request, status, error
+#--------------------
+
+#--------------------
+def build_cache(requests, cache_dir, cache_format=CACHE_FORMAT_DEFAULT,
+                workers=None, force=False, encoding=ENCODING_DEFAULT):
+    """
+    Writes the cached result for each observation, using a pool of worker
+    processes, and prints the progress to STDERR.
+
+    :param requests: The (mission, obsid, filter, url, target) of each
+    observation.
+
+    :type requests: list
+
+    :param cache_dir: Directory to write the cached results to.
+
+    :type cache_dir: str
+
+    :param cache_format: The kind of cache to build, one of CACHE_FORMATS.
+
+    :type cache_format: str
+
+    :param workers: The number of worker processes.  Default is the number of
+    CPUs.
+
+    :type workers: int
+
+    :param force: If True, every result is written even if it is up to date.
+
+    :type force: bool
+
+    :param encoding: The encoding to compress the results with, or None for no
+    compression.
+
+    :type encoding: str
+
+    :returns: tuple -- The number of observations with each status (a dict),
+    and the request and exception of each observation whose build raised one
+    (a list).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    remove_temp_files(cache_dir)
+    counts = {'built':0, 'skipped':0, 'error':0}
+    errors = []
+    n_requests = len(requests)
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=configure_response_cache,
+                             initargs=(encoding,)) as pool:
+        results = pool.map(build_entry, requests,
+                           [cache_dir] * n_requests,
+                           [cache_format] * n_requests,
+                           [force] * n_requests,
+                           [encoding] * n_requests, chunksize=8)
+        for i, (request, status, error) in enumerate(results):
+            counts[status] += 1
+            sys.stderr.write(str(i+1) + '/' + str(n_requests) + ' ' +
+                             request[1] + ' ' + status + '\n')
+            if error is not None:
+                errors.append((request, error))
+                sys.stderr.write(request[0] + ' ' + request[1] + ': ' +
+                                 error + '\n')
+    return counts, errors
+#--------------------
+
+#--------------------
+def setup_args():
+    """
+    Set up command-line arguments and options.
+
+    :returns: ArgumentParser -- Stores arguments and options.
+    """
+    parser = argparse.ArgumentParser(description="Builds cached results for a"
+                                     " list of observations, skipping those"
+                                     " that are already up to date.")
+
+    parser.add_argument("list_file", action="store", type=str,
+                        help="CSV file with one observation per line, in the"
+                        " form obsid[,filter[,url[,target]]].")
+
+    parser.add_argument("-m", "--mission", action="store", dest="mission",
+                        type=str.lower, required=True,
+                        choices=sorted(MISSION_READERS), help="[Required] The"
+                        " mission the observations come from.")
+
+    parser.add_argument("-c", "--cdir", action="store", dest="cache_dir",
+                        type=str, default=None, help="Directory to write the"
+                        " cached results to.  Required for the response and"
+                        " sidecar formats.  For the kepler_sc and pyramid"
+                        " formats the default is the location deliver_data.py"
+                        " reads the Kepler cache files from.")
+
+    parser.add_argument("--format", action="store", dest="cache_format",
+                        type=str, default=CACHE_FORMAT_DEFAULT,
+                        choices=CACHE_FORMATS, help="The kind of cache to"
+                        " build.  Default = " + CACHE_FORMAT_DEFAULT + ".")
+
+    parser.add_argument("--compression", action="store", dest="encoding",
+                        type=str, default=ENCODING_DEFAULT,
+                        choices=[str(x).lower() for x in
+                                 get_available_encodings()],
+                        help="Compression to write the results with.  Default"
+                        " = " + ENCODING_DEFAULT + ".")
+
+    parser.add_argument("-w", "--workers", action="store", dest="workers",
+                        type=int, default=None, help="Number of worker"
+                        " processes.  Default is the number of CPUs.")
+
+    parser.add_argument("--force", action="store_true", dest="force",
+                        help="Rebuild every result, even those that are up to"
+                        " date.")
+
+    return parser
+#--------------------
+
+#--------------------
+if __name__ == "__main__":
+
+    # Setup command-line arguments.
+    PARSER = setup_args()
+    ARGS = PARSER.parse_args()
+
+    if ARGS.cache_dir is None:
+        if ARGS.cache_format in ['response', 'sidecar']:
+            PARSER.error("A cache directory (-c) is required for the " +
+                         ARGS.cache_format + " format.")
+        ARGS.cache_dir = CACHE_DIR_DEFAULT
+
+    COUNTS, ERRORS = build_cache(read_obsid_list(ARGS.list_file,
+                                                 ARGS.mission),
+                                 ARGS.cache_dir,
+                                 cache_format=ARGS.cache_format,
+                                 workers=ARGS.workers, force=ARGS.force,
+                                 encoding=(None if ARGS.encoding == 'none'
+                                           else ARGS.encoding))
+    print(', '.join(str(COUNTS[x]) + ' ' + x for x in ['built', 'skipped',
+                                                        'error']))
+    for REQUEST, ERROR in ERRORS:
+        print(REQUEST[0] + ' ' + REQUEST[1] + ': ' + ERROR)
+#--------------------
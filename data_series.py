@@ -1,18 +1,162 @@
 """
 .. module:: data_series
 
-   :synopsis: Defines the DataSeries class.
+   :synopsis: Defines the DataSeries and PlotSeries classes.
 
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
+import numpy
+from precision import apply_precision
+
+# The types a data point value can have for its plot series to be stored as
+# float64 arrays.  Serializing a float64 gives the same JSON as the float it
+# came from, which is not true of ints, strings, etc.
+FLOAT_TYPES = frozenset([float, numpy.float64])
+
+#--------------------
+class PlotSeries(object):
+    """
+    Defines a Plot Series object, which stores the (x,y) pairs of a series of
+    data as two contiguous float64 arrays instead of one Python object per
+    point.  It is serialized into JSON as a list of [x, y] pairs, the same as
+    the list of (x,y) tuples it replaces.
+
+    The x and y values can each have a declared precision (see the precision
+    module), in which case the arrays hold the values as read and are rounded
+    only when they are used: the JSON is written straight from the rounded
+    digits, and the x and y attributes are the rounded values.
+    """
+
+    __slots__ = ('raw_x', 'raw_y', 'x_precision', 'y_precision', '_x', '_y')
+
+    def __init__(self, x, y, x_precision=None, y_precision=None):
+        """
+        Create a PlotSeries object.
+
+        :param x: The x values of the data points.
+
+        :type x: numpy.ndarray or list
+
+        :param y: The y values of the data points.
+
+        :type y: numpy.ndarray or list
+
+        :param x_precision: The precision to round the x values to, or None
+        if they are used as they are.
+
+        :type x_precision: precision.Precision
+
+        :param y_precision: The precision to round the y values to, or None
+        if they are used as they are.
+
+        :type y_precision: precision.Precision
+        """
+        self.raw_x = numpy.asarray(x, dtype=numpy.float64)
+        self.raw_y = numpy.asarray(y, dtype=numpy.float64)
+        self.x_precision = x_precision
+        self.y_precision = y_precision
+        self._x = None
+        self._y = None
+
+    @property
+    def x(self):
+        """
+        The x values, rounded to their precision.
+        """
+        if self._x is None:
+            self._x = apply_precision(self.raw_x, self.x_precision)
+        return self._x
+
+    @property
+    def y(self):
+        """
+        The y values, rounded to their precision.
+        """
+        if self._y is None:
+            self._y = apply_precision(self.raw_y, self.y_precision)
+        return self._y
+
+    @property
+    def has_precision(self):
+        """
+        True if the x or y values have a declared precision.
+        """
+        return self.x_precision is not None or self.y_precision is not None
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        Create a PlotSeries object from a list of (x,y) pairs, if they can be
+        stored as float64 without changing their JSON.
+
+        :param points: The (x,y) pairs, e.g., DataPoint namedtuples.
+
+        :type points: list
+
+        :returns: PlotSeries or None -- The PlotSeries, or None if the list is
+        empty or does not contain (x,y) pairs of floats.
+        """
+        if not points or not all(isinstance(x, (tuple, list)) for x in
+                                 points):
+            return None
+        columns = list(zip(*points))
+        if (len(columns) != 2 or len(columns[0]) != len(points) or
+                not set(map(type, columns[0])) <= FLOAT_TYPES or
+                not set(map(type, columns[1])) <= FLOAT_TYPES):
+            return None
+        return cls(columns[0], columns[1])
+
+    def __len__(self):
+        return len(self.raw_x)
+
+    def __iter__(self):
+        return iter(zip(self.x.tolist(), self.y.tolist()))
+
+    def tolist(self, start=None, stop=None):
+        """
+        Returns the data points as a list of [x, y] lists, which is what is
+        serialized into JSON.
+
+        :param start: The index of the first data point to return.
+
+        :type start: int
+
+        :param stop: The index after the last data point to return.
+
+        :type stop: int
+
+        :returns: list -- The [x, y] pairs.
+        """
+        return numpy.column_stack((self.x[start:stop],
+                                   self.y[start:stop])).tolist()
+#--------------------
+
+#--------------------
+def _to_plot_series(points):
+    """
+    Returns a list of (x,y) pairs as a PlotSeries if it can be stored as one,
+    otherwise returns it unchanged (e.g., empty series, or the '' placeholders
+    some readers leave in their list of plot series).
+    """
+    if isinstance(points, list):
+        plot_series = PlotSeries.from_points(points)
+        if plot_series is not None:
+            return plot_series
+    return points
+#--------------------
+
 #--------------------
 class DataSeries(object):
     """
     Defines a Data Series object, which contains the data (plot series) and
-    plot labels for those series.
+    plot labels for those series.  Each plot series that is a list of (x,y)
+    pairs of floats is stored as a PlotSeries.
     """
 
+    __slots__ = ('mission', 'obsid', 'plot_series', 'plot_labels', 'xunits',
+                 'yunits', 'errcode', 'is_ancillary')
+
     def __init__(self, mission, obsid, plot_series, plot_labels,
                  xunits, yunits, errcode, is_ancillary=None):
         """
@@ -27,7 +171,8 @@ class DataSeries(object):
         :type obsid: str
 
         :param plot_series: A 1-D list containing one or more 1-D lists that
-        contain the (x,y) pairs for the given series of data.
+        contain the (x,y) pairs for the given series of data, or PlotSeries
+        objects.
 
         :type plot_series: list
 
@@ -59,11 +204,20 @@ class DataSeries(object):
         """
         self.mission = mission
         self.obsid = obsid
-        self.plot_series = plot_series
+        self.plot_series = [_to_plot_series(x) for x in plot_series]
         self.plot_labels = plot_labels
         self.xunits = xunits
         self.yunits = yunits
         self.errcode = errcode
         if is_ancillary is not None:
             self.is_ancillary = is_ancillary
-        #--------------------
+
+    def to_dict(self):
+        """
+        Returns the attributes that are serialized into JSON, as a dict.  The
+        is_ancillary attribute is only included if it was set.
+
+        :returns: dict -- The attributes, keyed by name.
+        """
+        return {x:getattr(self, x) for x in self.__slots__ if hasattr(self, x)}
+#--------------------
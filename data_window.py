@@ -0,0 +1,125 @@
+"""
+.. module:: data_window
+
+   :synopsis: Restricts plot series to a range of x values (a time range of a
+              lightcurve, or a wavelength range of a spectrum), so that only
+              the part of the data a plot shows is converted and returned.
+              Sorted x values are sliced with a binary search, others are
+              compared one by one.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import numpy
+from data_series import DataSeries, PlotSeries
+
+# The default range of x values: no limit on either side.
+XMIN_DEFAULT = None
+XMAX_DEFAULT = None
+
+#--------------------
+def window_slice(x, xmin=XMIN_DEFAULT, xmax=XMAX_DEFAULT):
+    """
+    Finds the data points whose x values are in a range.
+
+    :param x: The x values of the data points.
+
+    :type x: numpy.ndarray
+
+    :param xmin: The smallest x value to keep, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The largest x value to keep, or None for no limit.
+
+    :type xmax: float
+
+    :returns: slice or numpy.ndarray -- A slice of the data points if the x
+    values are sorted in increasing order, otherwise a boolean mask.  Either
+    can index the x values and any array of the same length.  Data points with
+    a NaN x value are only kept if there is no limit.
+    """
+    if xmin is None and xmax is None:
+        return slice(None)
+    x = numpy.asarray(x, dtype=float)
+    # A NaN anywhere makes this False, and the mask below drops it.
+    if len(x) < 2 or bool(numpy.all(x[1:] >= x[:-1])):
+        return slice(
+            0 if xmin is None else int(numpy.searchsorted(x, xmin, 'left')),
+            len(x) if xmax is None else int(numpy.searchsorted(x, xmax,
+                                                               'right')))
+    in_window = numpy.ones(len(x), dtype=bool)
+    if xmin is not None:
+        in_window &= x >= xmin
+    if xmax is not None:
+        in_window &= x <= xmax
+    return in_window
+#--------------------
+
+#--------------------
+def window_plot_series(plot_series, xmin=XMIN_DEFAULT, xmax=XMAX_DEFAULT):
+    """
+    Restricts a plot series to the data points whose x values are in a range.
+
+    :param plot_series: The plot series, a PlotSeries or a list of [x, y]
+    pairs.  Anything else (e.g., the '' placeholders some readers return) is
+    returned unchanged.
+
+    :type plot_series: PlotSeries
+
+    :param xmin: The smallest x value to keep, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The largest x value to keep, or None for no limit.
+
+    :type xmax: float
+
+    :returns: PlotSeries or list -- The data points in the range, with the same
+    precision.
+    """
+    if xmin is None and xmax is None:
+        return plot_series
+    if isinstance(plot_series, PlotSeries):
+        in_window = window_slice(plot_series.raw_x, xmin, xmax)
+        return PlotSeries(plot_series.raw_x[in_window],
+                          plot_series.raw_y[in_window],
+                          plot_series.x_precision, plot_series.y_precision)
+    if not isinstance(plot_series, list) or not plot_series:
+        return plot_series
+    in_window = window_slice([x[0] for x in plot_series], xmin, xmax)
+    if isinstance(in_window, slice):
+        return plot_series[in_window]
+    return [x for x, keep in zip(plot_series, in_window) if keep]
+#--------------------
+
+#--------------------
+def window_data_series(data_series, xmin=XMIN_DEFAULT, xmax=XMAX_DEFAULT):
+    """
+    Restricts each plot series of a DataSeries object to the data points whose
+    x values are in a range.
+
+    :param data_series: The DataSeries object(s).  Some IUE obsIDs (those
+    that are double-aperture) return already as a list of DataSeries.
+
+    :type data_series: DataSeries or list
+
+    :param xmin: The smallest x value to keep, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The largest x value to keep, or None for no limit.
+
+    :type xmax: float
+
+    :returns: DataSeries or list -- The restricted DataSeries object(s).
+    """
+    if xmin is None and xmax is None:
+        return data_series
+    if isinstance(data_series, list):
+        return [window_data_series(x, xmin, xmax) for x in data_series]
+    attributes = data_series.to_dict()
+    attributes['plot_series'] = [window_plot_series(x, xmin, xmax) for x in
+                                 data_series.plot_series]
+    return DataSeries(**attributes)
+#--------------------
@@ -0,0 +1,200 @@
+"""
+.. module:: decompressed_cache
+
+   :synopsis: On-disk cache of decompressed copies of compressed FITS files
+              (e.g., the .mxlo.gz and .mxhi.gz files of IUE, and the
+              .fits.gz coadds of HSLA), so that repeat requests skip the
+              decompression and can memory-map the copy.  Copies are named
+              after the path, modification time and size of their compressed
+              file, so a changed file is decompressed again.  The cache is
+              bounded by the total size of the copies, and evicts the least
+              recently used copies first.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import bz2
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import zlib
+
+# The default cache directory: None means compressed files are read as they
+# are.
+DECOMPRESSED_CACHE_DIR_DEFAULT = None
+
+# The default maximum total size of the decompressed copies, in MB.
+DECOMPRESSED_CACHE_MB_DEFAULT = 2000.
+
+# The functions that open each kind of compressed file for reading, keyed by
+# file name extension.
+DECOMPRESSORS = {'.gz':gzip.open, '.bz2':bz2.open}
+
+# File name extension of the decompressed copies.
+COPY_EXTENSION = ".fits"
+
+# Copies used less than this many seconds ago are never evicted, since the
+# process that used them may not have opened them yet.
+EVICT_MIN_AGE = 10.
+
+# The directory this process caches decompressed copies in, and the maximum
+# total size of the copies in bytes (see configure_decompressed_cache()).
+_CACHE_DIR = DECOMPRESSED_CACHE_DIR_DEFAULT
+_CACHE_BYTES = int(DECOMPRESSED_CACHE_MB_DEFAULT * 1.E6)
+
+#--------------------
+def configure_decompressed_cache(cache_dir,
+                                 max_mb=DECOMPRESSED_CACHE_MB_DEFAULT):
+    """
+    Sets the directory that this process caches decompressed copies in.
+
+    :param cache_dir: The cache directory, or None to read compressed files as
+    they are.
+
+    :type cache_dir: str
+
+    :param max_mb: The maximum total size of the copies, in MB.
+
+    :type max_mb: float
+    """
+    global _CACHE_DIR, _CACHE_BYTES
+    _CACHE_DIR = cache_dir
+    _CACHE_BYTES = int(max_mb * 1.E6)
+#--------------------
+
+#--------------------
+def get_decompressed_cache():
+    """
+    Returns the directory that this process caches decompressed copies in
+    (or None), and the maximum total size of the copies in MB.
+    """
+    return _CACHE_DIR, _CACHE_BYTES / 1.E6
+#--------------------
+
+#--------------------
+def get_copy_path(cache_root, source_file):
+    """
+    Returns the path of the decompressed copy of a file.
+
+    :param cache_root: Directory containing the copies.
+
+    :type cache_root: str
+
+    :param source_file: The path of the compressed file.
+
+    :type source_file: str
+
+    :returns: str -- The path of the copy.
+
+    :raises: OSError if the file does not exist.
+    """
+    stat_result = os.stat(source_file)
+    key = hashlib.sha1((os.path.abspath(source_file) + '\n' +
+                        str(stat_result.st_mtime_ns) + '\n' +
+                        str(stat_result.st_size)).encode('utf-8')).hexdigest()
+    return os.path.join(cache_root, key + COPY_EXTENSION)
+#--------------------
+
+#--------------------
+def evict_copies(cache_root, max_bytes, keep=None):
+    """
+    Removes the least recently used copies until the total size of those left
+    is at most max_bytes, or only copies used in the last EVICT_MIN_AGE
+    seconds are left.
+
+    :param cache_root: Directory containing the copies.
+
+    :type cache_root: str
+
+    :param max_bytes: The maximum total size of the copies, in bytes.
+
+    :type max_bytes: int
+
+    :param keep: The path of a copy that is never removed (the one just
+    written).
+
+    :type keep: str
+
+    :returns: int -- The number of copies removed.
+    """
+    copies = []
+    min_time = time.time() - EVICT_MIN_AGE
+    for file_name in os.listdir(cache_root):
+        if file_name.endswith(COPY_EXTENSION):
+            copy_path = os.path.join(cache_root, file_name)
+            try:
+                stat_result = os.stat(copy_path)
+            except OSError:
+                # Removed by another process.
+                continue
+            copies.append((max(stat_result.st_atime, stat_result.st_mtime),
+                           stat_result.st_size, copy_path))
+    n_bytes = sum(x[1] for x in copies)
+    n_removed = 0
+    for last_used, size, copy_path in sorted(copies):
+        if n_bytes <= max_bytes or last_used > min_time:
+            break
+        if copy_path == keep:
+            continue
+        try:
+            os.remove(copy_path)
+        except OSError:
+            pass
+        n_bytes -= size
+        n_removed += 1
+    return n_removed
+#--------------------
+
+#--------------------
+def get_decompressed_file(source_file):
+    """
+    Returns the path of a decompressed copy of a compressed file, writing the
+    copy if it is not cached yet.  Files that are not compressed, or that are
+    compressed in a way that can not be cached, are returned as they are, as
+    are all files if no cache directory is configured or the copy can not be
+    written (e.g., the disk is full).
+
+    :param source_file: The path of the file.
+
+    :type source_file: str
+
+    :returns: str -- The path to read the file from.
+    """
+    extension = os.path.splitext(source_file)[1].lower()
+    if _CACHE_DIR is None or extension not in DECOMPRESSORS:
+        return source_file
+    try:
+        copy_path = get_copy_path(_CACHE_DIR, source_file)
+    except OSError:
+        # The reader reports the missing file.
+        return source_file
+    try:
+        # Mark the copy as the most recently used.
+        os.utime(copy_path)
+        return copy_path
+    except OSError:
+        pass
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        file_handle, temp_name = tempfile.mkstemp(dir=_CACHE_DIR,
+                                                  suffix='.tmp')
+        try:
+            with os.fdopen(file_handle, 'wb') as ofile:
+                with DECOMPRESSORS[extension](source_file, 'rb') as ifile:
+                    shutil.copyfileobj(ifile, ofile)
+            os.chmod(temp_name, 0o644)
+            os.replace(temp_name, copy_path)
+        except BaseException:
+            if os.path.isfile(temp_name):
+                os.remove(temp_name)
+            raise
+        evict_copies(_CACHE_DIR, _CACHE_BYTES, keep=copy_path)
+    except (OSError, EOFError, zlib.error):
+        # Corrupt files are left for the reader to report, and their partial
+        # copy is removed.
+        return source_file
+    return copy_path
+#--------------------
@@ -10,29 +10,29 @@
 import argparse
 import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from binary_format import encode_binary
 from data_series import DataSeries
-from get_data_galex import get_data_galex
-from get_data_hlsp_everest import get_data_hlsp_everest
-from get_data_hlsp_k2gap import get_data_hlsp_k2gap
-from get_data_hlsp_kegs import get_data_hlsp_kegs
-from get_data_hlsp_polar import get_data_hlsp_polar
-from get_data_hlsp_k2sc import get_data_hlsp_k2sc
-from get_data_hlsp_k2sff import get_data_hlsp_k2sff
-from get_data_hlsp_k2varcat import get_data_hlsp_k2varcat
-from get_data_hsc_grism import get_data_hsc_grism
-from get_data_hsla import get_data_hsla
-from get_data_iue import get_data_iue
-from get_data_k2 import get_data_k2
-from get_data_kepler import get_data_kepler
-from get_data_states import get_data_states
-
-from mpl_get_data_befs import mpl_get_data_befs
-from mpl_get_data_euve import mpl_get_data_euve
-from mpl_get_data_fuse import mpl_get_data_fuse
-from mpl_get_data_hst import mpl_get_data_hst
-from mpl_get_data_hut import mpl_get_data_hut
-from mpl_get_data_tues import mpl_get_data_tues
-from mpl_get_data_wuppe import mpl_get_data_wuppe
+from data_window import XMAX_DEFAULT, XMIN_DEFAULT
+from decompressed_cache import (DECOMPRESSED_CACHE_DIR_DEFAULT,
+                                DECOMPRESSED_CACHE_MB_DEFAULT,
+                                configure_decompressed_cache,
+                                get_decompressed_cache)
+from downsample import (MAX_POINTS_DEFAULT, MIN_MAX_POINTS,
+                        downsample_data_series)
+from fits_sidecar import (SIDECAR_DIR_DEFAULT, configure_sidecar_store,
+                          get_sidecar_dir)
+from json_writer import (WIRE_FORMAT_DEFAULT, WIRE_FORMATS,
+                         JSONBudgetExceeded, encode_data_series,
+                         join_fragments, json_encoder, to_wire_format,
+                         write_json_pieces)
+from memory_cache import get_memory_cache, get_memory_cache_key
+from mission_registry import MISSION_READERS, get_data_series
+from payload_encoding import (ENCODING_EXTENSIONS, decode_payload,
+                              get_available_encodings, get_decoded_size)
+from response_cache import (read_encoded_entry, read_entry,
+                            stat_request_sources, write_entry)
 
 # Default location of Kepler cache files.
 CACHE_DIR_DEFAULT = (os.path.pardir + os.path.sep + os.path.pardir +
@@ -40,16 +40,13 @@ CACHE_DIR_DEFAULT = (os.path.pardir + os.path.sep + os.path.pardir +
                      os.path.sep + "lightcurves" + os.path.sep + "cache" +
                      os.path.sep)
 FILTERS_DEFAULT = None
+# This defines the maximum allowed size of a return JSON string (roughly in
+# MB).
+MAX_JSON_SIZE = 64.E6
+RESPONSE_CACHE_DIR_DEFAULT = None
 TARGET_DEFAULT = None
 URLS_DEFAULT = None
-
-#--------------------
-def json_encoder(obj):
-    """
-    Defines a method to use when serializing into JSON.
-    """
-    return obj.__dict__
-#--------------------
+WORKERS_DEFAULT = None
 
 #--------------------
 def json_too_big_object(mission, obsid):
@@ -81,9 +78,351 @@ def json_too_big_object(mission, obsid):
 #--------------------
 
 
+#--------------------
+def serialize_data_series(data_series, budget=None,
+                          wire_format=WIRE_FORMAT_DEFAULT):
+    """
+    Serializes each DataSeries object into its own JSON string.  Joining these
+    strings with ', ' inside square brackets gives the same JSON as serializing
+    the whole list of DataSeries objects at once.
+
+    :param data_series: The DataSeries object(s) to serialize.  Some IUE
+    obsIDs (those that are double-aperture) return already as a list of
+    DataSeries.
+
+    :type data_series: DataSeries or list
+
+    :param budget: The maximum length of the JSON strings once joined with
+    ', ', or None for no limit.  Serialization stops as soon as this is
+    exceeded.
+
+    :type budget: float
+
+    :param wire_format: How the plot series are written, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :returns: list -- The JSON string of each DataSeries object.
+
+    :raises: JSONBudgetExceeded if the JSON is longer than the budget.
+    """
+    if not isinstance(data_series, list):
+        data_series = [data_series]
+    fragments = []
+    length = 0
+    for x in data_series:
+        # Each JSON string after the first is preceded by a ', ' separator.
+        separator_length = 2 if fragments else 0
+        fragment = encode_data_series(
+            to_wire_format(x, wire_format), None if budget is None else
+            budget - length - separator_length)
+        length += separator_length + len(fragment)
+        fragments.append(fragment)
+    return fragments
+#--------------------
+
+#--------------------
+def find_kepler_sc_cache(cache_dir, obsid):
+    """
+    Finds the cache file of a Kepler short cadence obsID, which may be
+    compressed.
+
+    :param cache_dir: Directory containing Kepler cache files, ending with a
+    path separator.
+
+    :type cache_dir: str
+
+    :param obsid: The observation ID to find the cache file of.
+
+    :type obsid: str
+
+    :returns: tuple or None -- The cache file and its encoding (None if it is
+    not compressed), or None if this is not a short cadence obsID or it has no
+    cache file.
+    """
+    if "_sc_" not in obsid:
+        return None
+    for encoding in get_available_encodings():
+        cache_file = (cache_dir + obsid + ".cache" +
+                      ENCODING_EXTENSIONS[encoding])
+        if os.path.isfile(cache_file):
+            return cache_file, encoding
+    return None
+#--------------------
+
+#--------------------
+def read_kepler_sc_cache(cache_dir, obsid):
+    """
+    Reads the cached JSON of a Kepler short cadence obsID, as written by the
+    cache_scripts.
+
+    :param cache_dir: Directory containing Kepler cache files, ending with a
+    path separator.
+
+    :type cache_dir: str
+
+    :param obsid: The observation ID to read the cached JSON of.
+
+    :type obsid: str
+
+    :returns: list or None -- The cached JSON, with the enclosing square
+    brackets removed so it can be joined with the JSON of other DataSeries
+    objects.  None if this is not a short cadence obsID or it has no cache
+    file.
+    """
+    found_cache = find_kepler_sc_cache(cache_dir, obsid)
+    if found_cache is None:
+        return None
+    with open(found_cache[0], 'rb') as ifile:
+        cached_string = decode_payload(ifile.read(), found_cache[1])
+    cached_string = cached_string.split('\n', 1)[0].strip()
+    # The cache file holds a JSON list of DataSeries, which is empty if there
+    # is nothing to splice in.
+    cached_string = cached_string[1:-1].strip()
+    return [cached_string] if cached_string else []
+#--------------------
+
+#--------------------
+def retrieve_fragments(mission, obsid, filt, url, targ,
+                       response_cache_dir=RESPONSE_CACHE_DIR_DEFAULT,
+                       budget=None, wire_format=WIRE_FORMAT_DEFAULT,
+                       max_points=MAX_POINTS_DEFAULT, xmin=XMIN_DEFAULT,
+                       xmax=XMAX_DEFAULT):
+    """
+    Reads the data for a single mission + obsid pair and returns its
+    DataSeries object(s) serialized as JSON strings.  This is a module-level
+    function (and returns strings) so that it can be run in a worker process.
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :param response_cache_dir: If not None, the directory of the response
+    cache.  A fresh cache entry is returned instead of reading the data, and
+    data read without any errors are written to the cache.
+
+    :type response_cache_dir: str
+
+    :param budget: The maximum length of the JSON strings once joined with
+    ', ', or None for no limit.  Serialization stops as soon as this is
+    exceeded.  Cached JSON is returned whatever its length.
+
+    :type budget: float
+
+    :param wire_format: How the plot series are written, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :param max_points: The maximum number of data points per plot series, or
+    None for no limit.  Longer plot series are reduced with
+    downsample.downsample_data_series().
+
+    :type max_points: int
+
+    :param xmin: The smallest x value to return, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The largest x value to return, or None for no limit.
+
+    :type xmax: float
+
+    :returns: list -- The JSON string of each DataSeries object.
+
+    :raises: JSONBudgetExceeded if the data read are longer than the budget.
+    """
+    # Data restricted to a range of x values are not cached: each zoom of a
+    # plot asks for a different range, so the entries would rarely be used.
+    if xmin is not None or xmax is not None:
+        memory_cache = None
+        response_cache_dir = None
+    else:
+        # The in-memory cache is checked first, if this process has one (see
+        # memory_cache.configure_memory_cache()).
+        memory_cache = get_memory_cache()
+    if memory_cache is not None:
+        memory_key = get_memory_cache_key(mission, obsid, filt, url, targ,
+                                          wire_format, max_points)
+        fragments = memory_cache.get(memory_key)
+        if fragments is not None:
+            return fragments
+
+    # The source files are stat'ed before they are read, so that a cache entry
+    # is never kept for files that changed while being read.
+    if memory_cache is not None or response_cache_dir is not None:
+        sources = stat_request_sources(mission, obsid, filt, url, targ)
+    fragments = None
+    if response_cache_dir is not None:
+        fragments = read_entry(response_cache_dir, mission, obsid, filt, url,
+                               targ, wire_format=wire_format,
+                               max_points=max_points)
+
+    if fragments is None:
+        data_series = downsample_data_series(
+            get_data_series(mission, obsid, filt, url, targ, xmin, xmax),
+            max_points)
+        fragments = serialize_data_series(data_series, budget, wire_format)
+        if not isinstance(data_series, list):
+            data_series = [data_series]
+        # Only cache data that were read without any errors, since errors may
+        # come from missing files or an unavailable service.
+        if any(x.errcode != 0 for x in data_series):
+            return fragments
+        if response_cache_dir is not None:
+            try:
+                write_entry(response_cache_dir, mission, obsid, filt, url,
+                            targ, fragments, sources, wire_format, max_points)
+            except OSError:
+                # The response is still returned if the cache can't be written.
+                pass
+
+    if (memory_cache is not None and sources is not None and
+            stat_request_sources(mission, obsid, filt, url, targ) == sources):
+        memory_cache.put(memory_key, fragments, sources)
+    return fragments
+#--------------------
+
+#--------------------
+def configure_worker(sidecar_dir, decompressed_cache_dir,
+                     decompressed_cache_mb):
+    """
+    Configures the sidecar store and the cache of decompressed files of a
+    worker process the same as those of the process that started it.  This is
+    the initializer of the process pools that run retrieve_fragments().
+
+    :param sidecar_dir: The sidecar store directory, as returned by
+    fits_sidecar.get_sidecar_dir().
+
+    :type sidecar_dir: str
+
+    :param decompressed_cache_dir: The directory of decompressed copies, as
+    returned by decompressed_cache.get_decompressed_cache().
+
+    :type decompressed_cache_dir: str
+
+    :param decompressed_cache_mb: The maximum total size of the decompressed
+    copies, in MB.
+
+    :type decompressed_cache_mb: float
+    """
+    configure_sidecar_store(sidecar_dir)
+    configure_decompressed_cache(decompressed_cache_dir, decompressed_cache_mb)
+#--------------------
+
+#--------------------
+def retrieve_fragments_concurrently(
+        pairs, workers, response_cache_dir=RESPONSE_CACHE_DIR_DEFAULT,
+        budget=None, wire_format=WIRE_FORMAT_DEFAULT,
+        max_points=MAX_POINTS_DEFAULT, xmin=XMIN_DEFAULT, xmax=XMAX_DEFAULT):
+    """
+    Calls retrieve_fragments() for each mission + obsid pair concurrently.
+    Missions whose readers are I/O-bound (they wait on a remote service) are
+    run in a thread pool, all others are run in a process pool.
+
+    :param pairs: The (mission, obsid, filter, url, target) of each request.
+
+    :type pairs: list
+
+    :param workers: The maximum number of threads, and of processes, to use.
+
+    :type workers: int
+
+    :param response_cache_dir: If not None, the directory of the response
+    cache.
+
+    :type response_cache_dir: str
+
+    :param budget: The maximum length of the JSON strings of any one pair, or
+    None for no limit.
+
+    :type budget: float
+
+    :param wire_format: How the plot series are written, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :param max_points: The maximum number of data points per plot series, or
+    None for no limit.
+
+    :type max_points: int
+
+    :param xmin: The smallest x value to return, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The largest x value to return, or None for no limit.
+
+    :type xmax: float
+
+    :returns: list -- The list of JSON strings for each pair, in the same order
+    as 'pairs'.
+
+    :raises: JSONBudgetExceeded if the data of any pair are longer than the
+    budget.
+    """
+    cpu_pairs = [x for x in pairs if not MISSION_READERS[x[0]].io_bound]
+    # The pools are shut down explicitly, rather than by a with statement, so
+    # that a response that is too big is returned without waiting for them.
+    thread_pool = ThreadPoolExecutor(max_workers=workers)
+    if len(cpu_pairs) > 1:
+        process_pool = ProcessPoolExecutor(
+            max_workers=min(workers, len(cpu_pairs)),
+            initializer=configure_worker,
+            initargs=(get_sidecar_dir(),) + get_decompressed_cache())
+    else:
+        # Not worth starting any processes for a single pair.
+        process_pool = thread_pool
+    wait_for_pools = True
+    try:
+        futures = [
+            (thread_pool if MISSION_READERS[x[0]].io_bound else
+             process_pool).submit(retrieve_fragments, *x,
+                                  response_cache_dir=response_cache_dir,
+                                  budget=budget, wire_format=wire_format,
+                                  max_points=max_points, xmin=xmin, xmax=xmax)
+            for x in pairs]
+        return [x.result() for x in futures]
+    except JSONBudgetExceeded:
+        # The JSON will be too big whatever the other pairs return, so the
+        # pairs not started yet are cancelled and those running are left to
+        # finish in the background.
+        wait_for_pools = False
+        raise
+    finally:
+        thread_pool.shutdown(wait=wait_for_pools,
+                             cancel_futures=not wait_for_pools)
+        if process_pool is not thread_pool:
+            process_pool.shutdown(wait=wait_for_pools,
+                                  cancel_futures=not wait_for_pools)
+#--------------------
+
 #--------------------
 def deliver_data(missions, obsids, filters=FILTERS_DEFAULT, urls=URLS_DEFAULT,
-                 targets=TARGET_DEFAULT, cache_dir=CACHE_DIR_DEFAULT):
+                 targets=TARGET_DEFAULT, cache_dir=CACHE_DIR_DEFAULT,
+                 workers=WORKERS_DEFAULT,
+                 response_cache_dir=RESPONSE_CACHE_DIR_DEFAULT,
+                 wire_format=WIRE_FORMAT_DEFAULT,
+                 max_points=MAX_POINTS_DEFAULT, xmin=XMIN_DEFAULT,
+                 xmax=XMAX_DEFAULT):
     """
     Given a list of mission + obsid strings, returns the lightcurve and/or
     spectral data from each of them.
@@ -115,10 +454,89 @@ def deliver_data(missions, obsids, filters=FILTERS_DEFAULT, urls=URLS_DEFAULT,
 
     :type cache_dir: str
 
+    :param workers: If greater than one, the mission + obsid pairs are read
+    concurrently using up to this many workers: threads for missions whose
+    readers wait on remote services, processes for the rest.  The returned
+    JSON is the same as when they are read one after another.
+
+    :type workers: int
+
+    :param response_cache_dir: If not None, the JSON for each mission + obsid
+    pair is cached in this directory, and used by later requests until any of
+    the files it was read from changes.
+
+    :type response_cache_dir: str
+
+    :param wire_format: How the plot series of each DataSeries are written,
+    one of json_writer.WIRE_FORMATS.  "pairs" (the default) writes lists of
+    [x, y] pairs, "columns" writes {"x": [...], "y": [...]}, and "shared_x"
+    writes each distinct list of x values only once per DataSeries.
+
+    :type wire_format: str
+
+    :param max_points: If not None, each plot series with more data points
+    than this is reduced to this many with the Largest-Triangle-Three-Buckets
+    algorithm (see downsample.py), which keeps the shape of the plot.  Must be
+    at least downsample.MIN_MAX_POINTS.
+
+    :type max_points: int
+
+    :param xmin: If not None, only the data points with an x value (time or
+    wavelength) of at least this are returned.  Lightcurve readers skip the
+    rest of the data before converting them.  Data restricted to a range of x
+    values are not cached.
+
+    :type xmin: float
+
+    :param xmax: If not None, only the data points with an x value of at most
+    this are returned.
+
+    :type xmax: float
+
     :returns: JSON -- The lightcurve or spectral data from the requested data
     products.
     """
 
+    return ''.join(deliver_data_pieces(
+        missions, obsids, filters=filters, urls=urls, targets=targets,
+        cache_dir=cache_dir, workers=workers,
+        response_cache_dir=response_cache_dir, wire_format=wire_format,
+        max_points=max_points, xmin=xmin, xmax=xmax))
+#--------------------
+
+#--------------------
+def sort_requests(missions, obsids, filters, urls, targets):
+    """
+    Checks the requested mission + obsid pairs, fills in the values that were
+    not supplied, and sorts the pairs, so that the response does not depend
+    on the order of the request.
+
+    :param missions: The mission of each pair.
+
+    :type missions: list
+
+    :param obsids: The observation ID of each pair.
+
+    :type obsids: list
+
+    :param filters: The FILTER value of each pair, or None.
+
+    :type filters: list
+
+    :param urls: The preview plot URL of each pair, or None.
+
+    :type urls: list
+
+    :param targets: The target name of each pair, or None.
+
+    :type targets: list
+
+    :returns: tuple -- The sorted lists of missions, obsids, filters, urls and
+    targets.
+
+    :raises: IOError if the request is not valid.
+    """
+
     # If the list of filters is not supplied (because not all missions use it),
     # then just default to a list of single whitespace strings.
     if filters is None:
@@ -142,102 +560,258 @@ def deliver_data(missions, obsids, filters=FILTERS_DEFAULT, urls=URLS_DEFAULT,
     if len(missions) != len(obsids):
         raise IOError("Number of 'missions' must equal the number of 'obsids'.")
 
+    # Every mission must be one that has a reader.
+    for mission in missions:
+        if mission not in MISSION_READERS:
+            raise IOError("Mission '" + str(mission) + "' is not supported.")
+
     # Make sure the input data are sorted based on the obsids, so that the
-    # input is order-independent.
-    sort_indexes = sorted(range(len([x+'-'+y+'-'+z+'-'+u for x, y, z, u in
-                                     zip(missions, obsids, filters, urls)])),
-                          key=
-                          lambda k: [x+'-'+y+'-'+z+'-'+u for x, y, z, u in
-                                     zip(missions, obsids, filters, urls)][k])
+    # input is order-independent.  The sort keys are built once, up front.
+    sort_keys = [x+'-'+y+'-'+z+'-'+u for x, y, z, u in
+                 zip(missions, obsids, filters, urls)]
+    sort_indexes = sorted(range(len(sort_keys)), key=sort_keys.__getitem__)
     missions = [missions[x] for x in sort_indexes]
     obsids = [obsids[x] for x in sort_indexes]
     filters = [filters[x] for x in sort_indexes]
     urls = [urls[x] for x in sort_indexes]
     targets = [targets[x] for x in sort_indexes]
+    return missions, obsids, filters, urls, targets
+#--------------------
 
-    # This defines the maximum allowed size of a return JSON string
-    # (roughly in MB).
-    max_json_size = 64.E6
+#--------------------
+def check_max_points(max_points):
+    """
+    Checks the requested maximum number of data points per plot series.
 
-    # Each mission + obsID pair will have a DataSeries object returned, so make
-    # a list to store them all in.
-    all_data_series = []
+    :param max_points: The maximum number of data points per plot series, or
+    None for no limit.
+
+    :type max_points: int
+
+    :raises: IOError if it is not None or an integer of at least
+    MIN_MAX_POINTS.
+    """
+    if max_points is not None and (not isinstance(max_points, int) or
+                                   max_points < MIN_MAX_POINTS):
+        raise IOError("'max_points' must be an integer of at least " +
+                      str(MIN_MAX_POINTS) + ".")
+#--------------------
+
+#--------------------
+def check_window(xmin, xmax):
+    """
+    Checks the requested range of x values.
+
+    :param xmin: The smallest x value to return, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The largest x value to return, or None for no limit.
+
+    :type xmax: float
+
+    :raises: IOError if either limit is not None or a number, or if 'xmin' is
+    greater than 'xmax'.
+    """
+    for limit in [xmin, xmax]:
+        if limit is not None and (isinstance(limit, bool) or
+                                  not isinstance(limit, (int, float)) or
+                                  limit != limit):
+            raise IOError("'xmin' and 'xmax' must be numbers.")
+    if xmin is not None and xmax is not None and xmin > xmax:
+        raise IOError("'xmin' must not be greater than 'xmax'.")
+#--------------------
+
+#--------------------
+def deliver_data_pieces(missions, obsids, filters=FILTERS_DEFAULT,
+                        urls=URLS_DEFAULT, targets=TARGET_DEFAULT,
+                        cache_dir=CACHE_DIR_DEFAULT, workers=WORKERS_DEFAULT,
+                        response_cache_dir=RESPONSE_CACHE_DIR_DEFAULT,
+                        wire_format=WIRE_FORMAT_DEFAULT,
+                        max_points=MAX_POINTS_DEFAULT, xmin=XMIN_DEFAULT,
+                        xmax=XMAX_DEFAULT):
+    """
+    Same as deliver_data(), but returns the JSON as a list of pieces that can
+    be written out (see json_writer.write_json_pieces()) without joining them
+    into one string first.  Serialization stops as soon as the JSON is known
+    to be larger than MAX_JSON_SIZE, and the "too big" JSON is returned
+    instead.
+
+    See deliver_data() for the parameters.
+
+    :returns: list -- The pieces of the JSON string.
+    """
+    missions, obsids, filters, urls, targets = sort_requests(
+        missions, obsids, filters, urls, targets)
+
+    # The wire format must be one that can be written.
+    if wire_format not in WIRE_FORMATS:
+        raise IOError("Wire format '" + str(wire_format) + "' is not"
+                      " supported.")
+    check_max_points(max_points)
+    check_window(xmin, xmax)
+
+    # If short cadence Kepler data are requested we use cached files for
+    # efficiency.  The cached JSON is spliced into the returned JSON as-is,
+    # and only the pairs without a cache file are read.  The cache files are
+    # only written in the "pairs" wire format, with every data point.  Make
+    # sure cache_dir is marked.
+    cache_dir = os.path.join(cache_dir, '')
+    pairs = list(zip(missions, obsids, filters, urls, targets))
+    use_kepler_sc_cache = (wire_format == 'pairs' and max_points is None and
+                           xmin is None and xmax is None)
+    all_fragments = [read_kepler_sc_cache(cache_dir, x[1])
+                     if x[0] == 'kepler' and use_kepler_sc_cache else None
+                     for x in pairs]
+    # The length of the JSON so far, counting a ', ' separator after each
+    # DataSeries.  This is checked against the maximum size as each pair is
+    # read, so that reading stops as soon as the JSON is known to be too big.
+    used_length = sum(len(y) + 2 for x in all_fragments if x is not None
+                      for y in x)
+    if used_length > MAX_JSON_SIZE:
+        return [json_too_big_object(', '.join(missions), ', '.join(obsids))]
+
+    # Each mission + obsID pair will have one or more DataSeries objects
+    # returned, already serialized as JSON, so make a list to store them all in.
+    read_indexes = [i for i, x in enumerate(all_fragments) if x is None]
+    read_pairs = [pairs[i] for i in read_indexes]
+    try:
+        if workers is not None and workers > 1 and len(read_pairs) > 1:
+            read_fragments = retrieve_fragments_concurrently(
+                read_pairs, workers, response_cache_dir,
+                MAX_JSON_SIZE - 2 - used_length, wire_format, max_points,
+                xmin, xmax)
+        else:
+            read_fragments = []
+            for pair in read_pairs:
+                fragments = retrieve_fragments(
+                    *pair, response_cache_dir=response_cache_dir,
+                    budget=MAX_JSON_SIZE - 2 - used_length,
+                    wire_format=wire_format, max_points=max_points,
+                    xmin=xmin, xmax=xmax)
+                used_length += sum(len(x) + 2 for x in fragments)
+                read_fragments.append(fragments)
+    except JSONBudgetExceeded:
+        return [json_too_big_object(', '.join(missions), ', '.join(obsids))]
+    for i, fragments in zip(read_indexes, read_fragments):
+        all_fragments[i] = fragments
+
+    # Return the list of DataSeries objects as the pieces of a JSON string.
+    pieces = join_fragments([y for x in all_fragments for y in x])
+    if sum(len(x) for x in pieces) <= MAX_JSON_SIZE:
+        return pieces
+    return [json_too_big_object(', '.join(missions), ', '.join(obsids))]
+#--------------------
+
+#--------------------
+def _read_single_encoded(mission, obsid, filt, url, targ, cache_dir,
+                        response_cache_dir, wire_format, max_points):
+    """
+    Reads the cached JSON of a single mission + obsid pair without decoding
+    it, from either the Kepler short cadence cache or the response cache.
+
+    :returns: tuple or None -- The encoded JSON, its encoding (None if it is
+    not compressed) and its size once decoded (None if not known), or None if
+    the pair is not cached.
+    """
+    if mission == 'kepler' and wire_format == 'pairs' and max_points is None:
+        found_cache = find_kepler_sc_cache(os.path.join(cache_dir, ''), obsid)
+        if found_cache is not None:
+            with open(found_cache[0], 'rb') as ifile:
+                data = ifile.read()
+            return data, found_cache[1], get_decoded_size(data,
+                                                          found_cache[1])
+    if response_cache_dir is not None:
+        return read_encoded_entry(response_cache_dir, mission, obsid, filt, url,
+                                  targ, wire_format=wire_format,
+                                  max_points=max_points)
+    return None
+#--------------------
+
+#--------------------
+def deliver_data_encoded(missions, obsids, accept_encodings,
+                         filters=FILTERS_DEFAULT, urls=URLS_DEFAULT,
+                         targets=TARGET_DEFAULT, cache_dir=CACHE_DIR_DEFAULT,
+                         workers=WORKERS_DEFAULT,
+                         response_cache_dir=RESPONSE_CACHE_DIR_DEFAULT,
+                         wire_format=WIRE_FORMAT_DEFAULT,
+                         max_points=MAX_POINTS_DEFAULT, xmin=XMIN_DEFAULT,
+                         xmax=XMAX_DEFAULT):
+    """
+    Same as deliver_data(), but returns the JSON as bytes, possibly
+    compressed.  If a single mission + obsid pair is requested and its cached
+    JSON is stored compressed in one of the encodings the client accepts, the
+    compressed bytes are returned as-is instead of being decompressed (and
+    compressed again by whatever sends them on).
+
+    :param accept_encodings: The encodings the client accepts, e.g., ['gzip'].
+
+    :type accept_encodings: list
+
+    See deliver_data() for the other parameters.
+
+    :returns: tuple -- The JSON as bytes, and its encoding (None if it is not
+    compressed).
+    """
+    if (missions is not None and obsids is not None and len(missions) == 1 and
+            len(obsids) == 1 and missions[0] in MISSION_READERS and
+            xmin is None and xmax is None):
+        encoded = _read_single_encoded(
+            missions[0], obsids[0], filters[0] if filters else ' ',
+            urls[0] if urls else ' ', targets[0] if targets else ' ',
+            cache_dir, response_cache_dir, wire_format, max_points)
+        if (encoded is not None and encoded[1] in accept_encodings and
+                encoded[2] is not None and encoded[2] <= MAX_JSON_SIZE):
+            return encoded[0], encoded[1]
+    return_string = deliver_data(missions, obsids, filters=filters, urls=urls,
+                                 targets=targets, cache_dir=cache_dir,
+                                 workers=workers,
+                                 response_cache_dir=response_cache_dir,
+                                 wire_format=wire_format,
+                                 max_points=max_points, xmin=xmin, xmax=xmax)
+    return return_string.encode('utf-8'), None
+#--------------------
+
+#--------------------
+def deliver_data_binary(missions, obsids, filters=FILTERS_DEFAULT,
+                        urls=URLS_DEFAULT, targets=TARGET_DEFAULT,
+                        max_points=MAX_POINTS_DEFAULT, xmin=XMIN_DEFAULT,
+                        xmax=XMAX_DEFAULT):
+    """
+    Same as deliver_data(), but returns the data in the binary format of
+    binary_format.py: a JSON header with the labels, units, etc. of each
+    DataSeries, followed by the x and y values of each plot series as float64
+    columns.  The data are always read from their files, since the caches
+    hold JSON.
+
+    See deliver_data() for the parameters.
 
-    for mission, obsid, filt, url, targ in zip(missions, obsids, filters,
-                                               urls, targets):
-        if mission == "befs":
-            this_data_series = mpl_get_data_befs(obsid)
-        if mission == "euve":
-            this_data_series = mpl_get_data_euve(obsid)
-        if mission == "fuse":
-            this_data_series = mpl_get_data_fuse(obsid)
-        if mission == "galex":
-            this_data_series = get_data_galex(obsid, filt, url.strip())
-        if mission == "hlsp_everest":
-            this_data_series = get_data_hlsp_everest(obsid)
-        if mission == "hlsp_k2gap":
-            this_data_series = get_data_hlsp_k2gap(obsid)
-        if mission == "hlsp_kegs":
-            this_data_series = get_data_hlsp_kegs(obsid)
-        if mission == "hlsp_polar":
-            this_data_series = get_data_hlsp_polar(obsid)
-        if mission == "hlsp_k2sc":
-            this_data_series = get_data_hlsp_k2sc(obsid)
-        if mission == "hlsp_k2sff":
-            this_data_series = get_data_hlsp_k2sff(obsid)
-        if mission == "hlsp_k2varcat":
-            this_data_series = get_data_hlsp_k2varcat(obsid)
-        if mission == "hsc_grism":
-            this_data_series = get_data_hsc_grism(obsid)
-        if mission == "hsla":
-            this_data_series = get_data_hsla(obsid, targ)
-        if mission == "hst":
-            this_data_series = mpl_get_data_hst(obsid)
-        if mission == "hut":
-            this_data_series = mpl_get_data_hut(obsid)
-        if mission == "iue":
-            this_data_series = get_data_iue(obsid.lower(), filt)
-        if mission == "k2":
-            this_data_series = get_data_k2(obsid)
-        if mission == 'kepler':
-            # If short cadence we use cached files for efficiency.
-            if "_sc_" in obsid:
-                # Make sure cache_dir is marked.
-                cache_dir = os.path.join(cache_dir, '')
-                cache_file = cache_dir + obsid + ".cache"
-                # Open the cache file and return that string.
-                if os.path.isfile(cache_file):
-                    with open(cache_file, 'r') as ifile:
-                        return_string = ifile.readlines()[0]
-                        if len(return_string) <= max_json_size:
-                            return return_string
-                        return json_too_big_object(mission, obsid)
-                else:
-                    # Cache file is missing, fall back to creating from FITS.
-                    this_data_series = get_data_kepler(obsid)
-            else:
-                this_data_series = get_data_kepler(obsid)
-        if mission == "states":
-            this_data_series = get_data_states(obsid)
-        if mission == "tues":
-            this_data_series = mpl_get_data_tues(obsid)
-        if mission == "wuppe":
-            this_data_series = mpl_get_data_wuppe(obsid)
-
-        # Append this DataSeries object to the list.  Some IUE obsIDs (those
-        # that are double-aperture) return already as a list of DataSeries, so
-        # check whether it's a list or not before extending.
-        if not isinstance(this_data_series, list):
-            this_data_series = [this_data_series]
-        all_data_series.extend(this_data_series)
-
-    # Return the list of DataSeries objects as a JSON string.
-    return_string = json.dumps(all_data_series, ensure_ascii=False,
-                               check_circular=False, default=json_encoder,
-                               sort_keys=True)
-    if len(return_string) <= max_json_size:
-        return return_string
-    return json_too_big_object(', '.join(missions), ', '.join(obsids))
+    :returns: bytes -- The binary payload.  If it is larger than
+    MAX_JSON_SIZE, a payload with a single DataSeries with an error code of 99
+    is returned instead, as for the JSON.
+    """
+    missions, obsids, filters, urls, targets = sort_requests(
+        missions, obsids, filters, urls, targets)
+    check_max_points(max_points)
+    check_window(xmin, xmax)
+
+    all_data_series = []
+    for pair in zip(missions, obsids, filters, urls, targets):
+        data_series = downsample_data_series(get_data_series(*pair, xmin=xmin,
+                                                             xmax=xmax),
+                                             max_points)
+        # Some IUE obsIDs (those that are double-aperture) return already as a
+        # list of DataSeries.
+        if isinstance(data_series, list):
+            all_data_series.extend(data_series)
+        else:
+            all_data_series.append(data_series)
+
+    payload = encode_binary(all_data_series)
+    if len(payload) <= MAX_JSON_SIZE:
+        return payload
+    return encode_binary([DataSeries(', '.join(missions), ', '.join(obsids),
+                                     [], [], [], [], 99)])
 #--------------------
 
 #--------------------
@@ -253,27 +827,7 @@ def setup_args():
 
     parser.add_argument("-m" "--missions", action="store", dest="missions",
                         type=str.lower, nargs='+',
-                        choices=['befs',
-                                 'euve',
-                                 'fuse',
-                                 'galex',
-                                 'hlsp_everest',
-                                 'hlsp_k2gap',
-                                 'hlsp_kegs',
-                                 'hlsp_polar',
-                                 'hlsp_k2sc',
-                                 'hlsp_k2sff',
-                                 'hlsp_k2varcat',
-                                 'hsc_grism',
-                                 'hsla',
-                                 'hst',
-                                 'hut',
-                                 'iue',
-                                 'k2',
-                                 'kepler',
-                                 'states',
-                                 'tues',
-                                 'wuppe'],
+                        choices=sorted(MISSION_READERS),
                         help="Required: The mission(s) where this data comes "
                         "from.  There must be the same number of 'obsid' "
                         "values.")
@@ -322,6 +876,71 @@ def setup_args():
                         " this parameter, whether it is provided on input or"
                         " not.")
 
+    parser.add_argument("-w", "--workers", action="store", dest="workers",
+                        type=int, default=WORKERS_DEFAULT, help="Read the"
+                        " requested observations concurrently, using up to"
+                        " this many worker threads and processes.  By default"
+                        " they are read one after another.")
+
+    parser.add_argument("--response-cache", action="store",
+                        dest="response_cache_dir", type=str,
+                        default=RESPONSE_CACHE_DIR_DEFAULT, help="Cache the"
+                        " JSON for each observation in this directory, and use"
+                        " it for later requests until the files it was read"
+                        " from change.  By default nothing is cached.")
+
+    parser.add_argument("--wire-format", action="store", dest="wire_format",
+                        type=str, default=WIRE_FORMAT_DEFAULT,
+                        choices=WIRE_FORMATS, help="How the data points of"
+                        " each plot series are written: as [x, y] pairs, as"
+                        " separate x and y lists (columns), or as y lists"
+                        " that share their x lists (shared_x).  Default = " +
+                        WIRE_FORMAT_DEFAULT + ".")
+
+    parser.add_argument("--max-points", action="store", dest="max_points",
+                        type=int, default=MAX_POINTS_DEFAULT, help="Reduce"
+                        " each plot series with more data points than this to"
+                        " this many, keeping the shape of the plot (Largest-"
+                        "Triangle-Three-Buckets).  By default every data point"
+                        " is returned.")
+
+    parser.add_argument("--xmin", action="store", dest="xmin", type=float,
+                        default=XMIN_DEFAULT, help="Only return the data"
+                        " points with an x value (time or wavelength) of at"
+                        " least this.  By default there is no limit.")
+
+    parser.add_argument("--xmax", action="store", dest="xmax", type=float,
+                        default=XMAX_DEFAULT, help="Only return the data"
+                        " points with an x value (time or wavelength) of at"
+                        " most this.  By default there is no limit.")
+
+    parser.add_argument("--binary", action="store_true", dest="binary",
+                        help="Write the data in the binary format of"
+                        " binary_format.py (a JSON header followed by float64"
+                        " columns) instead of as JSON.")
+
+    parser.add_argument("--sidecar-dir", action="store", dest="sidecar_dir",
+                        type=str, default=SIDECAR_DIR_DEFAULT, help="Read FITS"
+                        " files from their sidecars in this directory (built"
+                        " with build_cache.py --format sidecar) while they are"
+                        " fresh.  By default FITS files are always read.")
+
+    parser.add_argument("--decompressed-cache", action="store",
+                        dest="decompressed_cache_dir", type=str,
+                        default=DECOMPRESSED_CACHE_DIR_DEFAULT, help="Keep"
+                        " decompressed copies of compressed FITS files (e.g.,"
+                        " IUE and HSLA) in this directory, and read them"
+                        " instead of decompressing the files again.  By"
+                        " default compressed files are read as they are.")
+
+    parser.add_argument("--decompressed-cache-mb", action="store",
+                        dest="decompressed_cache_mb", type=float,
+                        default=DECOMPRESSED_CACHE_MB_DEFAULT, help="Maximum"
+                        " total size of the decompressed copies, in MB.  The"
+                        " least recently used copies are removed first."
+                        "  Default = " + str(DECOMPRESSED_CACHE_MB_DEFAULT) +
+                        ".")
+
     return parser
 #--------------------
 
@@ -330,11 +949,23 @@ if __name__ == "__main__":
 
     # Setup command-line arguments.
     ARGS = setup_args().parse_args()
-
-    JSON_STRING = deliver_data(ARGS.missions, ARGS.obsids, filters=ARGS.filters,
-                               urls=ARGS.urls, targets=ARGS.target,
-                               cache_dir=ARGS.cache_dir)
-
-    # Print the return JSON object to STDOUT.
-    print(JSON_STRING)
+    configure_sidecar_store(ARGS.sidecar_dir)
+    configure_decompressed_cache(ARGS.decompressed_cache_dir,
+                                 ARGS.decompressed_cache_mb)
+
+    if ARGS.binary:
+        sys.stdout.buffer.write(deliver_data_binary(
+            ARGS.missions, ARGS.obsids, filters=ARGS.filters, urls=ARGS.urls,
+            targets=ARGS.target, max_points=ARGS.max_points, xmin=ARGS.xmin,
+            xmax=ARGS.xmax))
+    else:
+        JSON_PIECES = deliver_data_pieces(
+            ARGS.missions, ARGS.obsids, filters=ARGS.filters, urls=ARGS.urls,
+            targets=ARGS.target, cache_dir=ARGS.cache_dir,
+            workers=ARGS.workers, response_cache_dir=ARGS.response_cache_dir,
+            wire_format=ARGS.wire_format, max_points=ARGS.max_points,
+            xmin=ARGS.xmin, xmax=ARGS.xmax)
+
+        # Print the return JSON object to STDOUT.
+        write_json_pieces(sys.stdout, JSON_PIECES + ['\n'])
 #--------------------
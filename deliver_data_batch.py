@@ -0,0 +1,333 @@
+"""
+.. module:: deliver_data_batch
+
+   :synopsis: Runs deliver_data() over a stream of requests, one JSON object
+              per line (JSONL), and writes one JSON result per line as each
+              request finishes.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from decompressed_cache import (DECOMPRESSED_CACHE_DIR_DEFAULT,
+                                DECOMPRESSED_CACHE_MB_DEFAULT,
+                                configure_decompressed_cache,
+                                get_decompressed_cache)
+from deliver_data import (CACHE_DIR_DEFAULT, RESPONSE_CACHE_DIR_DEFAULT,
+                          configure_worker, deliver_data)
+from fits_sidecar import (SIDECAR_DIR_DEFAULT, configure_sidecar_store,
+                          get_sidecar_dir)
+
+# The request fields passed on to deliver_data().
+REQUEST_FIELDS = ['missions', 'obsids', 'filters', 'urls', 'targets']
+
+#--------------------
+def parse_batch_request(line, line_number):
+    """
+    Parses one line of the input stream into a request.
+
+    :param line: The line to parse.  It must be a JSON object with at least
+    "missions" and "obsids" lists.  It may also have "filters", "urls" and
+    "targets" lists, a "wire_format" string (see json_writer.WIRE_FORMATS),
+    a "max_points" integer and "xmin" and "xmax" numbers (see
+    deliver_data()), and an "id" to label the result with (the line number is
+    used if there is no "id").  A single value (e.g., a string) is treated as
+    a list with one element.
+
+    :type line: str
+
+    :param line_number: The line number in the input stream, starting at one.
+
+    :type line_number: int
+
+    :returns: tuple -- The request ID and the keyword arguments to pass to
+    deliver_data().
+
+    :raises: ValueError if the line is not a JSON object.
+    """
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise ValueError("Request on line " + str(line_number) + " is not a"
+                         " JSON object.")
+    request_id = request.get('id', line_number)
+    kwargs = {}
+    for field in REQUEST_FIELDS:
+        values = request.get(field)
+        if values is None:
+            continue
+        if not isinstance(values, list):
+            values = [values]
+        kwargs[field] = [str(x) for x in values]
+    if 'missions' in kwargs:
+        kwargs['missions'] = [x.lower() for x in kwargs['missions']]
+    if request.get('wire_format') is not None:
+        kwargs['wire_format'] = str(request['wire_format'])
+    if request.get('max_points') is not None:
+        kwargs['max_points'] = request['max_points']
+    for field in ['xmin', 'xmax']:
+        if request.get(field) is not None:
+            kwargs[field] = request[field]
+    return request_id, kwargs
+#--------------------
+
+#--------------------
+def format_error_line(request_id, message):
+    """
+    Formats the output line for a request that could not be run.
+
+    :param request_id: The ID to label the result with.
+
+    :type request_id: str or int
+
+    :param message: The error message.
+
+    :type message: str
+
+    :returns: str -- The output line (without a newline).
+    """
+    return ('{"error": ' + json.dumps(message, ensure_ascii=False) +
+            ', "id": ' + json.dumps(request_id, ensure_ascii=False) + '}')
+#--------------------
+
+#--------------------
+def run_batch_request(request_id, kwargs):
+    """
+    Runs deliver_data() for a single request and formats the output line.  The
+    JSON returned by deliver_data() is placed in the output line as-is, so it
+    is not decoded and encoded again.
+
+    :param request_id: The ID to label the result with.
+
+    :type request_id: str or int
+
+    :param kwargs: The keyword arguments to pass to deliver_data().
+
+    :type kwargs: dict
+
+    :returns: str -- The output line (without a newline), either
+    {"data": [...], "id": ...} or {"error": "...", "id": ...}.  Errors
+    other than invalid requests are prefixed with the name of the exception.
+    """
+    try:
+        if 'missions' not in kwargs or 'obsids' not in kwargs:
+            raise IOError("Both 'missions' and 'obsids' must be supplied.")
+        return_string = deliver_data(**kwargs)
+    except (IOError, ValueError) as err:
+        return format_error_line(request_id, str(err))
+    except Exception as err:
+        # Any other failure is reported for this request alone, so that the
+        # rest of the batch still runs.
+        return format_error_line(request_id, type(err).__name__ + ": " +
+                                 str(err))
+    return ('{"data": ' + return_string + ', "id": ' +
+            json.dumps(request_id, ensure_ascii=False) + '}')
+#--------------------
+
+#--------------------
+def read_batch_requests(ifile, cache_dir,
+                        response_cache_dir=RESPONSE_CACHE_DIR_DEFAULT):
+    """
+    Generator that yields each request in the input stream, skipping blank
+    lines.  Lines that can not be parsed are yielded with the parse error, so
+    that they are reported in the output rather than stopping the batch.
+
+    :param ifile: The input stream of JSONL requests.
+
+    :type ifile: file
+
+    :param cache_dir: Directory containing Kepler cache files.
+
+    :type cache_dir: str
+
+    :param response_cache_dir: If not None, directory to cache the JSON for
+    each mission + obsid pair in.
+
+    :type response_cache_dir: str
+
+    :returns: tuple -- The request ID, the keyword arguments to pass to
+    deliver_data() (None if the line could not be parsed) and the parse error
+    (None if there was not one).
+    """
+    for line_number, line in enumerate(ifile, start=1):
+        if not line.strip():
+            continue
+        try:
+            request_id, kwargs = parse_batch_request(line, line_number)
+        except ValueError as err:
+            yield line_number, None, str(err)
+            continue
+        kwargs['cache_dir'] = cache_dir
+        kwargs['response_cache_dir'] = response_cache_dir
+        yield request_id, kwargs, None
+#--------------------
+
+#--------------------
+def deliver_data_batch(ifile, ofile, cache_dir=CACHE_DIR_DEFAULT,
+                       workers=None,
+                       response_cache_dir=RESPONSE_CACHE_DIR_DEFAULT):
+    """
+    Runs deliver_data() for each request in a JSONL input stream and writes one
+    result per line to the output stream as each request finishes.  Only a
+    bounded number of requests are read ahead of the results being written, so
+    memory use does not grow with the size of the batch.
+
+    :param ifile: The input stream of JSONL requests.
+
+    :type ifile: file
+
+    :param ofile: The output stream to write JSONL results to.
+
+    :type ofile: file
+
+    :param cache_dir: Directory containing Kepler cache files.
+
+    :type cache_dir: str
+
+    :param workers: If greater than one, requests are run in this many worker
+    processes, and results are written in the order they finish (use the "id"
+    of each result to match it to its request).  Otherwise requests are run
+    one after another and results are written in input order.  The workers
+    use the same sidecar store and cache of decompressed files as this
+    process.
+
+    :type workers: int
+
+    :param response_cache_dir: If not None, directory to cache the JSON for
+    each mission + obsid pair in.
+
+    :type response_cache_dir: str
+
+    :returns: int -- The number of results written.
+    """
+    n_written = 0
+    requests = read_batch_requests(ifile, cache_dir, response_cache_dir)
+
+    if workers is None or workers <= 1:
+        for request_id, kwargs, parse_error in requests:
+            if parse_error is None:
+                line = run_batch_request(request_id, kwargs)
+            else:
+                line = format_error_line(request_id, parse_error)
+            ofile.write(line + '\n')
+            ofile.flush()
+            n_written += 1
+        return n_written
+
+    with ProcessPoolExecutor(
+            max_workers=workers, initializer=configure_worker,
+            initargs=(get_sidecar_dir(),) + get_decompressed_cache()) as pool:
+        pending = set()
+        for request_id, kwargs, parse_error in requests:
+            if parse_error is None:
+                pending.add(pool.submit(run_batch_request, request_id, kwargs))
+            else:
+                ofile.write(format_error_line(request_id, parse_error) + '\n')
+                n_written += 1
+            # Keep at most two requests per worker queued up at once.
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ofile.write(future.result() + '\n')
+                    n_written += 1
+                ofile.flush()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ofile.write(future.result() + '\n')
+                n_written += 1
+            ofile.flush()
+    return n_written
+#--------------------
+
+#--------------------
+def setup_args():
+    """
+    Set up command-line arguments and options.
+
+    :returns: ArgumentParser -- Stores arguments and options.
+    """
+    parser = argparse.ArgumentParser(description="Retrieves data from MAST"
+                                     " for each request in a JSONL file and"
+                                     " delivers the contents (spectra or"
+                                     " lightcurves) as one JSON per line.")
+
+    parser.add_argument("-i", "--input", action="store", dest="input_file",
+                        type=str, default=None, help="JSONL file of requests,"
+                        " one JSON object per line with \"missions\" and"
+                        " \"obsids\" lists (and optionally \"filters\","
+                        " \"urls\", \"targets\" and \"id\").  Default is to"
+                        " read from STDIN.")
+
+    parser.add_argument("-r", "--output", action="store", dest="output_file",
+                        type=str, default=None, help="File to write the JSONL"
+                        " results to.  Default is to write to STDOUT.")
+
+    parser.add_argument("-c", "--cdir", action="store", dest="cache_dir",
+                        type=str, default=CACHE_DIR_DEFAULT, help="Location of"
+                        " Kepler cache files.  Do not specify this unless you"
+                        " have a specific need to.  The default value should be"
+                        " correct for most use cases.")
+
+    parser.add_argument("-w", "--workers", action="store", dest="workers",
+                        type=int, default=None, help="Run requests in this"
+                        " many worker processes.  Results are then written in"
+                        " the order they finish.")
+
+    parser.add_argument("--response-cache", action="store",
+                        dest="response_cache_dir", type=str,
+                        default=RESPONSE_CACHE_DIR_DEFAULT, help="Cache the"
+                        " JSON for each observation in this directory, and use"
+                        " it for later requests until the files it was read"
+                        " from change.  By default nothing is cached.")
+
+    parser.add_argument("--sidecar-dir", action="store", dest="sidecar_dir",
+                        type=str, default=SIDECAR_DIR_DEFAULT, help="Read FITS"
+                        " files from their sidecars in this directory (built"
+                        " with build_cache.py --format sidecar) while they are"
+                        " fresh.  By default FITS files are always read.")
+
+    parser.add_argument("--decompressed-cache", action="store",
+                        dest="decompressed_cache_dir", type=str,
+                        default=DECOMPRESSED_CACHE_DIR_DEFAULT, help="Keep"
+                        " decompressed copies of compressed FITS files (e.g.,"
+                        " IUE and HSLA) in this directory, and read them"
+                        " instead of decompressing the files again.  By"
+                        " default compressed files are read as they are.")
+
+    parser.add_argument("--decompressed-cache-mb", action="store",
+                        dest="decompressed_cache_mb", type=float,
+                        default=DECOMPRESSED_CACHE_MB_DEFAULT, help="Maximum"
+                        " total size of the decompressed copies, in MB.  The"
+                        " least recently used copies are removed first."
+                        "  Default = " + str(DECOMPRESSED_CACHE_MB_DEFAULT) +
+                        ".")
+
+    return parser
+#--------------------
+
+#--------------------
+if __name__ == "__main__":
+
+    # Setup command-line arguments.
+    ARGS = setup_args().parse_args()
+    configure_sidecar_store(ARGS.sidecar_dir)
+    configure_decompressed_cache(ARGS.decompressed_cache_dir,
+                                 ARGS.decompressed_cache_mb)
+
+    IFILE = (open(ARGS.input_file, 'r') if ARGS.input_file is not None else
+             sys.stdin)
+    OFILE = (open(ARGS.output_file, 'w') if ARGS.output_file is not None else
+             sys.stdout)
+    try:
+        deliver_data_batch(IFILE, OFILE, cache_dir=ARGS.cache_dir,
+                           workers=ARGS.workers,
+                           response_cache_dir=ARGS.response_cache_dir)
+    finally:
+        if IFILE is not sys.stdin:
+            IFILE.close()
+        if OFILE is not sys.stdout:
+            OFILE.close()
+#--------------------
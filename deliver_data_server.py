@@ -0,0 +1,547 @@
+"""
+.. module:: deliver_data_server
+
+   :synopsis: Long-running HTTP server that returns the same JSON as
+              deliver_data(), using a pool of warm worker processes instead of
+              starting a new Python process for each request.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from deliver_data import (CACHE_DIR_DEFAULT, RESPONSE_CACHE_DIR_DEFAULT,
+                          deliver_data_binary, deliver_data_encoded)
+from json_writer import WIRE_FORMAT_DEFAULT
+from decompressed_cache import (DECOMPRESSED_CACHE_DIR_DEFAULT,
+                                DECOMPRESSED_CACHE_MB_DEFAULT,
+                                configure_decompressed_cache)
+from fits_sidecar import SIDECAR_DIR_DEFAULT, configure_sidecar_store
+from lightcurve_pyramid import PYRAMID_DIR_DEFAULT, deliver_level
+from memory_cache import configure_memory_cache, get_memory_cache
+from mission_registry import MISSION_READERS, get_reader
+from pagination import PAGE_POINTS_DEFAULT, deliver_page
+from payload_encoding import (ENCODING_DEFAULT, get_available_encodings,
+                              parse_accept_encoding)
+from response_cache import configure_response_cache
+
+# Default host, port and number of worker processes for the server.
+HOST_DEFAULT = "127.0.0.1"
+PORT_DEFAULT = 8080
+WORKERS_DEFAULT = 4
+MEMORY_CACHE_MB_DEFAULT = 0
+
+# The Content-Type of each response format, selected with the "format"
+# request parameter.
+CONTENT_TYPES = {'json':'application/json; charset=utf-8',
+                 'binary':'application/octet-stream'}
+
+# The request parameters accepted by the server, mapped to the name of the
+# matching deliver_data() argument.  Requests with a 'level' are returned from
+# the lightcurve pyramids (see lightcurve_pyramid.py) by deliver_level()
+# instead, and requests with a 'page_points' or 'page_token' a page at a time
+# (see pagination.py) by deliver_page().
+REQUEST_PARAMS = {'missions':'missions', 'obsids':'obsids',
+                  'filters':'filters', 'urls':'urls', 'targets':'targets',
+                  'wire_format':'wire_format', 'max_points':'max_points',
+                  'level':'level', 'xmin':'xmin', 'xmax':'xmax',
+                  'page_points':'page_points', 'page_token':'page_token'}
+
+# The request parameters that select a page of the data.
+PAGE_PARAMS = ['page_points', 'page_token']
+
+#--------------------
+def warm_worker(memory_cache_bytes=0, response_cache_encoding=ENCODING_DEFAULT,
+                sidecar_dir=SIDECAR_DIR_DEFAULT,
+                decompressed_cache_dir=DECOMPRESSED_CACHE_DIR_DEFAULT,
+                decompressed_cache_mb=DECOMPRESSED_CACHE_MB_DEFAULT):
+    """
+    Imports the reader for every supported mission, so that the first request
+    a worker handles does not pay for importing astropy, scipy, etc.  A reader
+    whose dependencies can not be imported is skipped here, so that requests
+    for it fail on their own instead of stopping the worker from starting.
+
+    :param memory_cache_bytes: The size of the worker's in-memory cache, in
+    bytes.  If zero, the worker does not cache in memory.
+
+    :type memory_cache_bytes: int
+
+    :param response_cache_encoding: The encoding the worker writes response
+    cache entries in, or None for no compression.
+
+    :type response_cache_encoding: str
+
+    :param sidecar_dir: If not None, directory the worker reads the sidecars
+    of FITS files from.
+
+    :type sidecar_dir: str
+
+    :param decompressed_cache_dir: If not None, directory the worker keeps
+    decompressed copies of compressed FITS files in.
+
+    :type decompressed_cache_dir: str
+
+    :param decompressed_cache_mb: The maximum total size of the decompressed
+    copies, in MB.
+
+    :type decompressed_cache_mb: float
+    """
+    configure_memory_cache(memory_cache_bytes)
+    configure_response_cache(response_cache_encoding)
+    configure_sidecar_store(sidecar_dir)
+    configure_decompressed_cache(decompressed_cache_dir, decompressed_cache_mb)
+    for mission in MISSION_READERS:
+        try:
+            get_reader(mission)
+        except ImportError:
+            pass
+#--------------------
+
+#--------------------
+def deliver_data_in_worker(kwargs, accept_encodings, response_format='json'):
+    """
+    Runs deliver_data_encoded() (or deliver_data_binary() for the binary
+    format, deliver_level() if a level of detail is requested, or
+    deliver_page() if a page is requested) in a worker process, and reports
+    the state of the worker's in-memory cache along with the result.
+
+    :param kwargs: The keyword arguments to pass to deliver_data_encoded().
+
+    :type kwargs: dict
+
+    :param accept_encodings: The encodings the client accepts.
+
+    :type accept_encodings: list
+
+    :param response_format: One of the keys of CONTENT_TYPES.
+
+    :type response_format: str
+
+    :returns: tuple -- The JSON returned by deliver_data_encoded() and its
+    encoding, the worker's process ID, and the counters of its in-memory cache
+    (None if it has no cache).
+    """
+    if 'level' in kwargs:
+        payload = deliver_level(
+            kwargs['missions'], kwargs['obsids'],
+            level=kwargs['level'],
+            xmin=kwargs.get('xmin'), xmax=kwargs.get('xmax'),
+            filters=kwargs.get('filters'), urls=kwargs.get('urls'),
+            targets=kwargs.get('targets'),
+            pyramid_dir=kwargs['pyramid_dir'],
+            wire_format=kwargs.get('wire_format', WIRE_FORMAT_DEFAULT))
+        payload = payload.encode('utf-8')
+        encoding = None
+    elif any(x in kwargs for x in PAGE_PARAMS):
+        payload = deliver_page(
+            kwargs.get('missions'), kwargs.get('obsids'),
+            filters=kwargs.get('filters'), urls=kwargs.get('urls'),
+            targets=kwargs.get('targets'),
+            page_points=kwargs.get('page_points', PAGE_POINTS_DEFAULT),
+            wire_format=kwargs.get('wire_format', WIRE_FORMAT_DEFAULT),
+            max_points=kwargs.get('max_points'), xmin=kwargs.get('xmin'),
+            xmax=kwargs.get('xmax'), page_token=kwargs.get('page_token'))
+        payload = payload.encode('utf-8')
+        encoding = None
+    elif response_format == 'binary':
+        payload = deliver_data_binary(
+            kwargs['missions'], kwargs['obsids'],
+            filters=kwargs.get('filters'), urls=kwargs.get('urls'),
+            targets=kwargs.get('targets'),
+            max_points=kwargs.get('max_points'), xmin=kwargs.get('xmin'),
+            xmax=kwargs.get('xmax'))
+        encoding = None
+    else:
+        payload, encoding = deliver_data_encoded(
+            accept_encodings=accept_encodings, **kwargs)
+    memory_cache = get_memory_cache()
+    return (payload, encoding, os.getpid(),
+            memory_cache.stats() if memory_cache is not None else None)
+#--------------------
+
+#--------------------
+def sum_memory_cache_stats(worker_stats):
+    """
+    Adds up the in-memory cache counters last reported by each worker.
+
+    :param worker_stats: The counters of each worker, keyed by process ID.
+
+    :type worker_stats: dict
+
+    :returns: dict -- The totals over all workers, and the number of workers
+    that have reported.
+    """
+    totals = {'hits':0, 'misses':0, 'evictions':0, 'entries':0, 'bytes':0,
+              'max_bytes':0}
+    for stats in list(worker_stats.values()):
+        for counter in totals:
+            totals[counter] += stats[counter]
+    totals['workers'] = len(worker_stats)
+    return totals
+#--------------------
+
+#--------------------
+def parse_request_params(query):
+    """
+    Converts the parameters of a request into deliver_data() arguments.  Each
+    parameter may be given more than once, and each value may contain a
+    comma-separated list of values, e.g., "missions=kepler,iue".
+
+    :param query: The parameters of the request, as returned by parse_qs() or
+    decoded from a JSON request body.  JSON bodies may give each parameter as
+    a list, or as a single value (e.g., a comma-separated string or a number).
+
+    :type query: dict
+
+    :returns: dict -- The keyword arguments to pass to deliver_data().
+
+    :raises: ValueError or TypeError if 'max_points', 'level' or
+    'page_points' is not an integer, or 'xmin' or 'xmax' is not a number.
+    """
+    kwargs = {}
+    for param, arg_name in REQUEST_PARAMS.items():
+        values = query.get(param)
+        if values is None:
+            continue
+        if not isinstance(values, list):
+            values = [values]
+        if param in ['wire_format', 'page_token']:
+            # A single value, the last one given if there are several.
+            kwargs[arg_name] = str(values[-1])
+        elif param in ['max_points', 'level', 'page_points']:
+            # A single integer, the last one given if there are several.
+            kwargs[arg_name] = int(values[-1])
+        elif param in ['xmin', 'xmax']:
+            # A single number, the last one given if there are several.
+            kwargs[arg_name] = float(values[-1])
+        elif param == 'urls':
+            # URLs are not split on commas, since they may contain them.
+            kwargs[arg_name] = [str(x) for x in values]
+        else:
+            kwargs[arg_name] = [y for x in values for y in str(x).split(',')]
+    # Missions are not case-sensitive, to match the command-line interface.
+    if 'missions' in kwargs:
+        kwargs['missions'] = [x.lower() for x in kwargs['missions']]
+    return kwargs
+#--------------------
+
+#--------------------
+class DeliverDataHandler(BaseHTTPRequestHandler):
+    """
+    Handles GET requests (parameters in the query string) and POST requests
+    (parameters in a JSON object in the body) by passing them to
+    deliver_data() in one of the server's worker processes.  A GET request for
+    /stats returns the in-memory cache counters, summed over the workers.  If
+    the JSON for a single observation is cached compressed in an encoding the
+    client accepts (see the Accept-Encoding header), it is sent as-is with a
+    Content-Encoding header.  A "format" parameter of "binary" returns the
+    binary format of binary_format.py instead of JSON.
+    """
+
+    def do_GET(self):
+        """ Handles a GET request. """
+        parsed_url = urlparse(self.path)
+        if parsed_url.path == '/stats':
+            self.send_json(json.dumps(sum_memory_cache_stats(
+                self.server.worker_stats), sort_keys=True).encode('utf-8'))
+            return
+        self.respond(parse_qs(parsed_url.query))
+
+    def do_POST(self):
+        """ Handles a POST request. """
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            query = json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError:
+            self.send_error(400, "Request body is not valid JSON.")
+            return
+        if not isinstance(query, dict):
+            self.send_error(400, "Request body must be a JSON object.")
+            return
+        self.respond(query)
+
+    def respond(self, query):
+        """
+        Runs deliver_data() in a worker process and writes the response.
+
+        :param query: The parameters of the request.
+
+        :type query: dict
+        """
+        try:
+            kwargs = parse_request_params(query)
+        except (TypeError, ValueError):
+            self.send_error(400, "'max_points', 'level' and 'page_points'"
+                            " must be integers, and 'xmin' and 'xmax'"
+                            " numbers.")
+            return
+        # The page token holds the rest of the request.
+        if 'page_token' not in kwargs and ('missions' not in kwargs or
+                                           'obsids' not in kwargs):
+            self.send_error(400, "Both 'missions' and 'obsids' must be"
+                            " supplied.")
+            return
+        response_format = query.get('format', 'json')
+        if isinstance(response_format, list):
+            response_format = response_format[-1]
+        if (not isinstance(response_format, str) or
+                response_format not in CONTENT_TYPES):
+            self.send_error(400, "Format '" + str(response_format) + "' is"
+                            " not supported.")
+            return
+        if response_format != 'json' and 'level' in kwargs:
+            self.send_error(400, "Levels of detail are only returned as"
+                            " JSON.")
+            return
+        if response_format != 'json' and any(x in kwargs for x in
+                                              PAGE_PARAMS):
+            self.send_error(400, "Pages are only returned as JSON.")
+            return
+        kwargs['cache_dir'] = self.server.cache_dir
+        kwargs['response_cache_dir'] = self.server.response_cache_dir
+        if 'level' in kwargs:
+            kwargs['pyramid_dir'] = self.server.pyramid_dir
+        accept_encodings = parse_accept_encoding(
+            self.headers.get('Accept-Encoding'))
+        try:
+            payload, encoding, pid, stats = self.server.pool.apply(
+                deliver_data_in_worker, (kwargs, accept_encodings,
+                                         response_format))
+        except (IOError, TypeError, ValueError) as err:
+            self.send_error(400, str(err))
+            return
+        except Exception as err:
+            # Anything else is a failure of the server, but is still returned
+            # as JSON so that clients can show it.
+            self.log_error("%s: %s", type(err).__name__, err)
+            self.send_json(json.dumps({'error':type(err).__name__ + ": " +
+                                       str(err)}).encode('utf-8'),
+                           status=500)
+            return
+        if stats is not None:
+            self.server.worker_stats[pid] = stats
+        self.send_json(payload, encoding, CONTENT_TYPES[response_format])
+
+    def send_json(self, payload, encoding=None,
+                  content_type=CONTENT_TYPES['json'], status=200):
+        """
+        Writes a response.
+
+        :param payload: The JSON to return, as UTF-8 bytes (or the binary
+        payload).
+
+        :type payload: bytes
+
+        :param encoding: The encoding the JSON is compressed with, or None if
+        it is not compressed.
+
+        :type encoding: str
+
+        :param content_type: The Content-Type of the payload.
+
+        :type content_type: str
+
+        :param status: The HTTP status code of the response.
+
+        :type status: int
+        """
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+#--------------------
+
+#--------------------
+def run_server(host=HOST_DEFAULT, port=PORT_DEFAULT, workers=WORKERS_DEFAULT,
+               cache_dir=CACHE_DIR_DEFAULT,
+               response_cache_dir=RESPONSE_CACHE_DIR_DEFAULT,
+               memory_cache_mb=MEMORY_CACHE_MB_DEFAULT,
+               response_cache_encoding=ENCODING_DEFAULT,
+               pyramid_dir=PYRAMID_DIR_DEFAULT,
+               sidecar_dir=SIDECAR_DIR_DEFAULT,
+               decompressed_cache_dir=DECOMPRESSED_CACHE_DIR_DEFAULT,
+               decompressed_cache_mb=DECOMPRESSED_CACHE_MB_DEFAULT):
+    """
+    Starts the server and handles requests until interrupted.
+
+    :param host: The host name or address to listen on.
+
+    :type host: str
+
+    :param port: The port to listen on.
+
+    :type port: int
+
+    :param workers: The number of worker processes to read data with.
+
+    :type workers: int
+
+    :param cache_dir: Directory containing Kepler cache files.
+
+    :type cache_dir: str
+
+    :param response_cache_dir: If not None, directory to cache the JSON for
+    each mission + obsid pair in.
+
+    :type response_cache_dir: str
+
+    :param memory_cache_mb: The size of each worker's in-memory cache, in MB.
+    If zero, the workers do not cache in memory.
+
+    :type memory_cache_mb: float
+
+    :param response_cache_encoding: The encoding new response cache entries
+    are written in, or None for no compression.
+
+    :type response_cache_encoding: str
+
+    :param pyramid_dir: Directory containing the lightcurve pyramid files.
+
+    :type pyramid_dir: str
+
+    :param sidecar_dir: If not None, directory containing the sidecars of FITS
+    files, which are read instead of the FITS files while they are fresh.
+
+    :type sidecar_dir: str
+
+    :param decompressed_cache_dir: If not None, directory to keep decompressed
+    copies of compressed FITS files in, shared by the workers.
+
+    :type decompressed_cache_dir: str
+
+    :param decompressed_cache_mb: The maximum total size of the decompressed
+    copies, in MB.
+
+    :type decompressed_cache_mb: float
+    """
+    pool = multiprocessing.Pool(processes=workers, initializer=warm_worker,
+                                initargs=(int(memory_cache_mb * 1.E6),
+                                          response_cache_encoding,
+                                          sidecar_dir,
+                                          decompressed_cache_dir,
+                                          decompressed_cache_mb))
+    server = ThreadingHTTPServer((host, port), DeliverDataHandler)
+    server.pool = pool
+    server.cache_dir = cache_dir
+    server.response_cache_dir = response_cache_dir
+    server.pyramid_dir = pyramid_dir
+    server.worker_stats = {}
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.terminate()
+        pool.join()
+#--------------------
+
+#--------------------
+def setup_args():
+    """
+    Set up command-line arguments and options.
+
+    :returns: ArgumentParser -- Stores arguments and options.
+    """
+    parser = argparse.ArgumentParser(description="Runs an HTTP server that"
+                                     " retrieves data from MAST and delivers"
+                                     " the contents (spectra or lightcurves)"
+                                     " as a JSON.")
+
+    parser.add_argument("--host", action="store", dest="host", type=str,
+                        default=HOST_DEFAULT, help="Host name or address to"
+                        " listen on.  Default = " + HOST_DEFAULT + ".")
+
+    parser.add_argument("-p", "--port", action="store", dest="port",
+                        type=int, default=PORT_DEFAULT, help="Port to listen"
+                        " on.  Default = " + str(PORT_DEFAULT) + ".")
+
+    parser.add_argument("-w", "--workers", action="store", dest="workers",
+                        type=int, default=WORKERS_DEFAULT, help="Number of"
+                        " warm worker processes used to read data.  Default"
+                        " = " + str(WORKERS_DEFAULT) + ".")
+
+    parser.add_argument("-c", "--cdir", action="store", dest="cache_dir",
+                        type=str, default=CACHE_DIR_DEFAULT, help="Location of"
+                        " Kepler cache files.  Do not specify this unless you"
+                        " have a specific need to.  The default value should be"
+                        " correct for most use cases.")
+
+    parser.add_argument("--response-cache", action="store",
+                        dest="response_cache_dir", type=str,
+                        default=RESPONSE_CACHE_DIR_DEFAULT, help="Cache the"
+                        " JSON for each observation in this directory, and use"
+                        " it for later requests until the files it was read"
+                        " from change.  By default nothing is cached.")
+
+    parser.add_argument("--memory-cache-mb", action="store",
+                        dest="memory_cache_mb", type=float,
+                        default=MEMORY_CACHE_MB_DEFAULT, help="Size of the"
+                        " in-memory cache of each worker process, in MB.  The"
+                        " counters of the caches are returned by /stats.  By"
+                        " default nothing is cached in memory.")
+
+    parser.add_argument("--response-cache-encoding", action="store",
+                        dest="response_cache_encoding", type=str,
+                        default=ENCODING_DEFAULT,
+                        choices=[str(x).lower() for x in
+                                 get_available_encodings()],
+                        help="Compression used for new response cache"
+                        " entries.  Default = " + ENCODING_DEFAULT + ".")
+
+    parser.add_argument("--pyramid-dir", action="store", dest="pyramid_dir",
+                        type=str, default=PYRAMID_DIR_DEFAULT, help="Location"
+                        " of the lightcurve pyramid files, used for requests"
+                        " with a 'level' parameter.  Default"
+                        " is the location of the Kepler cache files.")
+
+    parser.add_argument("--sidecar-dir", action="store", dest="sidecar_dir",
+                        type=str, default=SIDECAR_DIR_DEFAULT, help="Read FITS"
+                        " files from their sidecars in this directory (built"
+                        " with build_cache.py --format sidecar) while they are"
+                        " fresh.  By default FITS files are always read.")
+
+    parser.add_argument("--decompressed-cache", action="store",
+                        dest="decompressed_cache_dir", type=str,
+                        default=DECOMPRESSED_CACHE_DIR_DEFAULT, help="Keep"
+                        " decompressed copies of compressed FITS files (e.g.,"
+                        " IUE and HSLA) in this directory, and read them"
+                        " instead of decompressing the files again.  By"
+                        " default compressed files are read as they are.")
+
+    parser.add_argument("--decompressed-cache-mb", action="store",
+                        dest="decompressed_cache_mb", type=float,
+                        default=DECOMPRESSED_CACHE_MB_DEFAULT, help="Maximum"
+                        " total size of the decompressed copies, in MB.  The"
+                        " least recently used copies are removed first."
+                        "  Default = " + str(DECOMPRESSED_CACHE_MB_DEFAULT) +
+                        ".")
+
+    return parser
+#--------------------
+
+#--------------------
+if __name__ == "__main__":
+
+    # Setup command-line arguments.
+    ARGS = setup_args().parse_args()
+
+    run_server(host=ARGS.host, port=ARGS.port, workers=ARGS.workers,
+               cache_dir=ARGS.cache_dir,
+               response_cache_dir=ARGS.response_cache_dir,
+               memory_cache_mb=ARGS.memory_cache_mb,
+               response_cache_encoding=(None if ARGS.response_cache_encoding ==
+                                        'none' else
+                                        ARGS.response_cache_encoding),
+               pyramid_dir=ARGS.pyramid_dir, sidecar_dir=ARGS.sidecar_dir,
+               decompressed_cache_dir=ARGS.decompressed_cache_dir,
+               decompressed_cache_mb=ARGS.decompressed_cache_mb)
+#--------------------
@@ -0,0 +1,143 @@
+"""
+.. module:: downsample
+
+   :synopsis: Reduces the number of data points of plot series with the
+              Largest-Triangle-Three-Buckets algorithm (Steinarsson 2013),
+              which keeps the points that shape the plot (peaks, dips,
+              transits) instead of averaging them away.  The first and last
+              points are always kept, and the rest are split into equal
+              buckets, from each of which the point making the largest
+              triangle with the point kept from the previous bucket and the
+              average of the next bucket is kept.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import numpy
+from data_series import DataSeries, PlotSeries
+
+# The default maximum number of data points per plot series, None for no
+# limit.
+MAX_POINTS_DEFAULT = None
+
+# The smallest maximum number of data points allowed: the first and last
+# points, and one from a bucket in between.
+MIN_MAX_POINTS = 3
+
+#--------------------
+def lttb_indices(x, y, max_points):
+    """
+    Finds the data points kept by Largest-Triangle-Three-Buckets.  The data
+    points should be sorted by their x values.
+
+    :param x: The x values of the data points.
+
+    :type x: numpy.ndarray
+
+    :param y: The y values of the data points.
+
+    :type y: numpy.ndarray
+
+    :param max_points: The number of data points to keep (at least
+    MIN_MAX_POINTS).
+
+    :type max_points: int
+
+    :returns: numpy.ndarray -- The indexes of the data points kept, in
+    increasing order.  All of them if there are no more than max_points.
+    """
+    n_points = len(x)
+    if n_points <= max_points:
+        return numpy.arange(n_points)
+    # The bucket i (from 0 to max_points-3) is [edges[i], edges[i+1]), between
+    # the first and last points.
+    edges = (numpy.arange(max_points - 1) * (n_points - 2.) /
+             (max_points - 2)).astype(int) + 1
+    edges[-1] = n_points - 1
+    # The average of each bucket, and of the last point as a final bucket.
+    bucket_starts = numpy.append(edges[:-1], n_points - 1)
+    bucket_sizes = numpy.diff(numpy.append(bucket_starts, n_points))
+    average_x = numpy.add.reduceat(x, bucket_starts) / bucket_sizes
+    average_y = numpy.add.reduceat(y, bucket_starts) / bucket_sizes
+
+    indices = numpy.empty(max_points, dtype=int)
+    indices[0] = 0
+    indices[-1] = n_points - 1
+    kept = 0
+    for i in range(max_points - 2):
+        start = edges[i]
+        stop = edges[i+1]
+        kept_x = x[kept]
+        kept_y = y[kept]
+        # Twice the area of the triangle each point makes with the point kept
+        # from the previous bucket and the average of the next bucket.
+        areas = numpy.abs((kept_x - average_x[i+1]) *
+                          (y[start:stop] - kept_y) -
+                          (kept_x - x[start:stop]) *
+                          (average_y[i+1] - kept_y))
+        kept = start + int(numpy.argmax(areas))
+        indices[i+1] = kept
+    return indices
+#--------------------
+
+#--------------------
+def downsample_plot_series(plot_series, max_points):
+    """
+    Reduces a plot series to at most max_points data points.  Data points
+    with a non-finite x or y value are dropped first, since they can not be
+    plotted.
+
+    :param plot_series: The plot series to reduce.  Anything other than a
+    PlotSeries (e.g., the '' placeholders some readers return) is returned
+    unchanged.
+
+    :type plot_series: PlotSeries
+
+    :param max_points: The maximum number of data points to keep.
+
+    :type max_points: int
+
+    :returns: PlotSeries -- The reduced plot series, with the same precision,
+    or the plot series itself if it has no more than max_points data points.
+    """
+    if not isinstance(plot_series, PlotSeries) or len(
+            plot_series) <= max_points:
+        return plot_series
+    x = plot_series.raw_x
+    y = plot_series.raw_y
+    finite = numpy.isfinite(x) & numpy.isfinite(y)
+    if not finite.all():
+        x = x[finite]
+        y = y[finite]
+    indices = lttb_indices(x, y, max_points)
+    return PlotSeries(x[indices], y[indices], plot_series.x_precision,
+                      plot_series.y_precision)
+#--------------------
+
+#--------------------
+def downsample_data_series(data_series, max_points):
+    """
+    Reduces each plot series of a DataSeries object to at most max_points
+    data points.
+
+    :param data_series: The DataSeries object(s).  Some IUE obsIDs (those
+    that are double-aperture) return already as a list of DataSeries.
+
+    :type data_series: DataSeries or list
+
+    :param max_points: The maximum number of data points per plot series, or
+    None to leave them as they are.
+
+    :type max_points: int
+
+    :returns: DataSeries or list -- The reduced DataSeries object(s).
+    """
+    if max_points is None:
+        return data_series
+    if isinstance(data_series, list):
+        return [downsample_data_series(x, max_points) for x in data_series]
+    attributes = data_series.to_dict()
+    attributes['plot_series'] = [downsample_plot_series(x, max_points) for x
+                                 in data_series.plot_series]
+    return DataSeries(**attributes)
+#--------------------
@@ -0,0 +1,323 @@
+"""
+.. module:: fits_access
+
+   :synopsis: Reads the headers and binary table columns of the FITS files
+              the readers use.  The header keywords and the layout of the
+              binary tables of each file are cached in memory (keyed by the
+              path, modification time and size of the file), so later reads
+              of an uncompressed file do not parse it again: the columns asked
+              for are memory-mapped straight from the file, and only the parts
+              of the file that are used are read.  Compressed files, and
+              columns that need converting (scaled, logical or string
+              columns), are read with astropy as before.  If a cache of
+              decompressed copies is configured (see decompressed_cache.py),
+              compressed files are read from their copies like any other
+              file.  If a sidecar store is configured (see fits_sidecar.py),
+              files with a fresh sidecar are read from it instead of from
+              FITS.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import collections
+import os
+import re
+import threading
+import numpy
+from astropy.io import fits
+from decompressed_cache import get_decompressed_file
+from fits_sidecar import (get_sidecar_dir, load_sidecar_column, read_sidecar,
+                          write_sidecar)
+
+# The number of files whose header keywords and table layouts are cached.
+FITS_INFO_CACHE_FILES = 512
+
+# File name extensions of compressed files, which can not be memory-mapped.
+COMPRESSED_EXTENSIONS = ('.gz', '.bz2', '.zip')
+
+# The binary table column formats (TFORMn) that are stored as they are read,
+# and so can be memory-mapped: an optional repeat count and a numeric type.
+MAPPABLE_FORMAT = re.compile(r'^\d*[BIJKED]$')
+
+# The header keywords that are not cached, since they may be repeated.
+UNCACHED_KEYWORDS = frozenset(['', 'COMMENT', 'HISTORY'])
+
+# The cached header keywords and table layout of each HDU of a file.  The
+# layout is None for HDUs that are not binary tables, and for files that can
+# not be memory-mapped.
+HDUInfo = collections.namedtuple('HDUInfo', ['keywords', 'layout'])
+
+# The layout of a binary table: the offset of the table in the file, the
+# dtype of its rows, its number of rows, and the names of the columns that
+# can be memory-mapped.
+TableLayout = collections.namedtuple('TableLayout', ['offset', 'dtype',
+                                                     'n_rows', 'mappable'])
+
+# The cached HDUInfo objects of each file, keyed by path, modification time
+# and size, least recently used first.
+_FITS_INFO_CACHE = collections.OrderedDict()
+
+# Guards _FITS_INFO_CACHE, since readers may read several files at once.
+_FITS_INFO_LOCK = threading.Lock()
+
+#--------------------
+def _get_table_layout(hdu):
+    """
+    Returns the layout of a binary table HDU, or None if it can not be
+    memory-mapped.
+    """
+    if not isinstance(hdu, fits.BinTableHDU) or not hdu.header.get('NAXIS2'):
+        return None
+    dtype = hdu.columns.dtype.newbyteorder('>')
+    if dtype.itemsize != hdu.header['NAXIS1']:
+        return None
+    mappable = frozenset(x.name for x in hdu.columns if
+                         MAPPABLE_FORMAT.match(x.format.strip()) and
+                         x.bscale is None and x.bzero is None)
+    return TableLayout(hdu.fileinfo()['datLoc'], dtype,
+                       hdu.header['NAXIS2'], mappable)
+#--------------------
+
+#--------------------
+class FITSFile(object):
+    """
+    Reads the headers and binary table columns of a FITS file, using the
+    cached header keywords and table layout of the file if there are any.
+    The file is only opened with astropy if they are not cached, or if some
+    columns can not be memory-mapped.  Use as a context manager, like
+    astropy.io.fits.open().
+    """
+
+    def __init__(self, file_name):
+        """
+        Create a FITSFile object.  If the file has a fresh sidecar, its
+        header keywords and the columns stored in it are read from the
+        sidecar.
+
+        :param file_name: The path of the FITS file.
+
+        :type file_name: str
+
+        :raises: IOError if the file does not exist.
+        """
+        self.file_name = file_name
+        stat = os.stat(file_name)
+        self._key = (os.path.abspath(file_name), stat.st_mtime_ns,
+                     stat.st_size)
+        self._read_name = None
+        self._hdulist = None
+        self._sidecar_dir = get_sidecar_dir()
+        self._sidecar = (None if self._sidecar_dir is None else
+                         read_sidecar(self._sidecar_dir, file_name))
+        with _FITS_INFO_LOCK:
+            self._info = _FITS_INFO_CACHE.get(self._key)
+            if self._info is not None:
+                _FITS_INFO_CACHE.move_to_end(self._key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Closes the file, if it was opened with astropy.
+        """
+        if self._hdulist is not None:
+            self._hdulist.close()
+            self._hdulist = None
+
+    def _get_read_name(self):
+        """
+        Returns the path to read the file from: its decompressed copy if it is
+        compressed and there is a cache of copies, otherwise the file itself.
+        The copy is only looked for once the file has to be read.
+        """
+        if self._read_name is None:
+            self._read_name = get_decompressed_file(self.file_name)
+        return self._read_name
+
+    def _read_source(self):
+        """
+        Reads the file itself from now on, if it was being read from a
+        decompressed copy.  Used when the copy was removed (e.g., evicted by
+        another process) before it could be opened.
+
+        :returns: bool -- True if the file was being read from a copy.
+        """
+        if self._get_read_name() == self.file_name:
+            return False
+        self._read_name = self.file_name
+        return True
+
+    def _is_compressed(self):
+        """
+        True if the file is read compressed, and so can not be memory-mapped.
+        """
+        return self._get_read_name().lower().endswith(COMPRESSED_EXTENSIONS)
+
+    def _open(self):
+        """
+        Opens the file with astropy, and caches its header keywords and table
+        layouts if they are not cached yet.
+
+        :returns: HDUList -- The open file.
+        """
+        if self._hdulist is None:
+            try:
+                self._hdulist = fits.open(self._get_read_name(),
+                                          memmap=not self._is_compressed())
+            except FileNotFoundError:
+                if not self._read_source():
+                    raise
+                self._hdulist = fits.open(self._get_read_name(),
+                                          memmap=not self._is_compressed())
+            if self._info is None:
+                self._info = [HDUInfo(
+                    {k:v for k, v in x.header.items() if k not in
+                     UNCACHED_KEYWORDS},
+                    None if self._is_compressed() else _get_table_layout(x))
+                              for x in self._hdulist]
+                with _FITS_INFO_LOCK:
+                    _FITS_INFO_CACHE[self._key] = self._info
+                    while len(_FITS_INFO_CACHE) > FITS_INFO_CACHE_FILES:
+                        _FITS_INFO_CACHE.popitem(last=False)
+        return self._hdulist
+
+    def _get_info(self):
+        """
+        Returns the cached information of each HDU.
+        """
+        if self._info is None:
+            self._open()
+        return self._info
+
+    def __len__(self):
+        if self._sidecar is not None:
+            return len(self._sidecar['hdus'])
+        return len(self._get_info())
+
+    def keyword(self, ext, name):
+        """
+        Returns the value of a header keyword.
+
+        :param ext: The index of the HDU.
+
+        :type ext: int
+
+        :param name: The keyword, in any case.
+
+        :type name: str
+
+        :returns: The value of the keyword.
+
+        :raises: KeyError if the header does not have the keyword.
+        """
+        if (self._sidecar is not None and name.upper() in
+                self._sidecar['hdus'][ext]['keywords']):
+            return self._sidecar['hdus'][ext]['keywords'][name.upper()]
+        return self._get_info()[ext].keywords[name.upper()]
+
+    def columns(self, ext, names):
+        """
+        Returns columns of a binary table.
+
+        :param ext: The index of the binary table HDU.
+
+        :type ext: int
+
+        :param names: The names of the columns, in any case.
+
+        :type names: list
+
+        :returns: dict -- The values of each column, keyed by the names as
+        given.  Memory-mapped columns can be used after the file is closed,
+        others only until then.
+
+        :raises: IOError if the file can not be read, KeyError if the table
+        does not have one of the columns.
+        """
+        if self._sidecar is not None:
+            sidecar_columns = self._sidecar['hdus'][ext]['columns']
+            if all(x.upper() in sidecar_columns for x in names):
+                return {x:load_sidecar_column(self._sidecar_dir,
+                                              self.file_name, self._sidecar,
+                                              ext, x.upper()) for x in names}
+        layout = self._get_info()[ext].layout
+        # The layout of a compressed file is that of its decompressed copy,
+        # which may have been evicted since.
+        if layout is not None and not self._is_compressed():
+            field_names = {x.upper():x for x in layout.dtype.names}
+            fields = [field_names.get(x.upper()) for x in names]
+            if all(x in layout.mappable for x in fields):
+                try:
+                    rows = numpy.memmap(self._get_read_name(),
+                                        dtype=layout.dtype,
+                                        mode='r', offset=layout.offset,
+                                        shape=(layout.n_rows,))
+                except FileNotFoundError:
+                    # The copy was evicted: the columns are read below, from
+                    # the compressed file.
+                    if not self._read_source():
+                        raise
+                    rows = None
+                except ValueError as err:
+                    # The file is shorter than its headers say.
+                    raise IOError(str(err))
+                if rows is not None:
+                    return {x:rows[y].view(numpy.ndarray) for x, y in
+                            zip(names, fields)}
+        data = self._open()[ext].data
+        return {x:data[x] for x in names}
+#--------------------
+
+#--------------------
+def open_fits(file_name):
+    """
+    Opens a FITS file for reading through the cache of header keywords and
+    table layouts.
+
+    :param file_name: The path of the FITS file.
+
+    :type file_name: str
+
+    :returns: FITSFile -- The file, to use as a context manager.
+
+    :raises: IOError if the file does not exist.
+    """
+    return FITSFile(file_name)
+#--------------------
+
+#--------------------
+def write_fits_sidecar(file_name, sidecar_root):
+    """
+    Writes the sidecar of a FITS file (see fits_sidecar.py): the header
+    keywords of each HDU, and each numeric binary table column, as read with
+    astropy.
+
+    :param file_name: The path of the FITS file.
+
+    :type file_name: str
+
+    :param sidecar_root: Directory to write the sidecar to.
+
+    :type sidecar_root: str
+
+    :raises: IOError if the file can not be read.
+    """
+    hdus = []
+    with fits.open(file_name, memmap=not file_name.lower().endswith(
+            COMPRESSED_EXTENSIONS)) as hdulist:
+        for hdu in hdulist:
+            keywords = {k:v for k, v in hdu.header.items() if k not in
+                        UNCACHED_KEYWORDS}
+            columns = {}
+            if isinstance(hdu, fits.BinTableHDU) and hdu.data is not None:
+                for column in hdu.columns:
+                    values = numpy.asarray(hdu.data[column.name])
+                    if values.dtype.kind in 'biuf':
+                        columns[column.name] = values
+            hdus.append((keywords, columns))
+        write_sidecar(sidecar_root, file_name, hdus)
+#--------------------
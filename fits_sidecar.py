@@ -0,0 +1,194 @@
+"""
+.. module:: fits_sidecar
+
+   :synopsis: Store of pre-converted copies ("sidecars") of FITS files: the
+              header keywords of each HDU in a small JSON header, and each
+              numeric binary table column as a .npy file that can be
+              memory-mapped.  A sidecar is checked against the path,
+              modification time and size of its FITS file, and is ignored
+              once the file changes.  fits_access.py reads from the sidecar
+              of a file when the store is configured and the sidecar is fresh,
+              and from the FITS file otherwise.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import hashlib
+import io
+import json
+import os
+import numpy
+from response_cache import stat_source_files, write_atomically
+
+# The version of the sidecar files.  This must be increased whenever a change
+# to how they are written changes what is read from them, so that sidecars
+# written by older code are no longer used.
+SIDECAR_VERSION = 1
+
+# The default sidecar directory: None means no sidecars are read.
+SIDECAR_DIR_DEFAULT = None
+
+# File name extensions of the header of a sidecar and of its columns.
+HEADER_EXTENSION = ".sidecar.json"
+COLUMN_EXTENSION = ".npy"
+
+# The header keyword values that can be stored in a JSON header.  Others
+# (e.g., astropy's Undefined) are left out, and read from the FITS file.
+KEYWORD_TYPES = (str, int, float, bool)
+
+# The directory this process reads sidecars from (see
+# configure_sidecar_store()).
+_SIDECAR_DIR = SIDECAR_DIR_DEFAULT
+
+#--------------------
+def configure_sidecar_store(sidecar_dir):
+    """
+    Sets the directory that this process reads sidecars from.
+
+    :param sidecar_dir: The sidecar directory, or None to read every file from
+    FITS.
+
+    :type sidecar_dir: str
+    """
+    global _SIDECAR_DIR
+    _SIDECAR_DIR = sidecar_dir
+#--------------------
+
+#--------------------
+def get_sidecar_dir():
+    """
+    Returns the directory that this process reads sidecars from, or None.
+    """
+    return _SIDECAR_DIR
+#--------------------
+
+#--------------------
+def get_sidecar_path(sidecar_root, source_file):
+    """
+    Returns the path of the sidecar of a file, without a file name extension.
+    Sidecars are named after a hash of the absolute path of their file, and
+    spread over subdirectories named after its first two characters.
+
+    :param sidecar_root: Directory containing the sidecars.
+
+    :type sidecar_root: str
+
+    :param source_file: The path of the FITS file.
+
+    :type source_file: str
+
+    :returns: str -- The path of the sidecar.
+    """
+    key = hashlib.sha1(os.path.abspath(source_file).encode(
+        'utf-8')).hexdigest()
+    return os.path.join(sidecar_root, key[0:2], key)
+#--------------------
+
+#--------------------
+def read_sidecar(sidecar_root, source_file):
+    """
+    Reads the header of the sidecar of a file.
+
+    :param sidecar_root: Directory containing the sidecars.
+
+    :type sidecar_root: str
+
+    :param source_file: The path of the FITS file.
+
+    :type source_file: str
+
+    :returns: dict or None -- The header, with the keywords and columns of
+    each HDU, or None if there is no sidecar or it is not fresh.
+    """
+    header_file = (get_sidecar_path(sidecar_root, source_file) +
+                   HEADER_EXTENSION)
+    try:
+        with open(header_file, 'r', encoding='utf-8') as ifile:
+            header = json.load(ifile)
+        if (header.get('version') != SIDECAR_VERSION or
+                stat_source_files([os.path.abspath(source_file)]) !=
+                [header.get('source')]):
+            return None
+    except (OSError, ValueError):
+        return None
+    return header
+#--------------------
+
+#--------------------
+def load_sidecar_column(sidecar_root, source_file, header, ext, name):
+    """
+    Memory-maps a column of the sidecar of a file.
+
+    :param sidecar_root: Directory containing the sidecars.
+
+    :type sidecar_root: str
+
+    :param source_file: The path of the FITS file.
+
+    :type source_file: str
+
+    :param header: The header of the sidecar, from read_sidecar().
+
+    :type header: dict
+
+    :param ext: The index of the binary table HDU.
+
+    :type ext: int
+
+    :param name: The name of the column, in upper case.
+
+    :type name: str
+
+    :returns: numpy.ndarray -- The values of the column.
+
+    :raises: IOError if the column file can not be read.
+    """
+    column_file = (get_sidecar_path(sidecar_root, source_file) + '.' +
+                   header['hdus'][ext]['columns'][name] + COLUMN_EXTENSION)
+    try:
+        return numpy.load(column_file, mmap_mode='r').view(numpy.ndarray)
+    except ValueError as err:
+        raise IOError(str(err))
+#--------------------
+
+#--------------------
+def write_sidecar(sidecar_root, source_file, hdus):
+    """
+    Writes the sidecar of a file.  The columns are written first and the
+    header last, so a sidecar is only used once it is complete.
+
+    :param sidecar_root: Directory containing the sidecars.
+
+    :type sidecar_root: str
+
+    :param source_file: The path of the FITS file.
+
+    :type source_file: str
+
+    :param hdus: The (keywords, columns) of each HDU of the file: a dict of
+    header keyword values, and a dict of column values (numpy arrays) keyed by
+    column name.
+
+    :type hdus: list
+
+    :raises: OSError if the file does not exist.
+    """
+    sidecar_path = get_sidecar_path(sidecar_root, source_file)
+    header = {'version':SIDECAR_VERSION,
+              'source':stat_source_files([os.path.abspath(source_file)])[0],
+              'hdus':[]}
+    for i, (keywords, columns) in enumerate(hdus):
+        column_names = {}
+        for j, (name, values) in enumerate(sorted(columns.items())):
+            column_names[name.upper()] = str(i) + '_' + str(j)
+            column_bytes = io.BytesIO()
+            numpy.save(column_bytes, numpy.asarray(values),
+                       allow_pickle=False)
+            write_atomically(sidecar_path + '.' + column_names[name.upper()] +
+                             COLUMN_EXTENSION, column_bytes.getvalue())
+        header['hdus'].append({
+            'keywords':{x.upper():y for x, y in keywords.items() if
+                        isinstance(y, KEYWORD_TYPES)},
+            'columns':column_names})
+    write_atomically(sidecar_path + HEADER_EXTENSION, json.dumps(header))
+#--------------------
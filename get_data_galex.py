@@ -7,8 +7,8 @@
 """
 
 import collections
-from astropy.io import fits
 from data_series import DataSeries
+from fits_access import open_fits
 from parse_obsid_galex import parse_obsid_galex
 
 #--------------------
@@ -74,9 +74,10 @@ def get_data_galex(obsid, filt, url):
     if errcode == 0:
         for sfile in parsed_files_result.specfiles:
             try:
-                with fits.open(sfile) as hdulist:
-                    wls = [float(x) for x in hdulist[1].data['wave'][0, :]]
-                    fls = [float(x) for x in hdulist[1].data["flux"][0, :]]
+                with open_fits(sfile) as fits_file:
+                    columns = fits_file.columns(1, ["wave", "flux"])
+                    wls = [float(x) for x in columns["wave"][0, :]]
+                    fls = [float(x) for x in columns["flux"][0, :]]
             except IOError:
                 errcode = 3
                 return_dataseries = DataSeries(
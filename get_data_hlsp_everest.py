@@ -6,11 +6,11 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-import collections
 import numpy
-from astropy.io import fits
-from data_series import DataSeries
+from data_series import DataSeries, PlotSeries
+from fits_access import open_fits
 from parse_obsid_hlsp_everest import parse_obsid_hlsp_everest
+from precision import DECIMALS_8
 
 #--------------------
 def get_data_hlsp_everest(obsid):
@@ -35,9 +35,6 @@ def get_data_hlsp_everest(obsid):
     6 = All values were non-finite in x and/or y.
     """
 
-    # This defines a data point for a DataSeries object as a namedtuple.
-    data_point = collections.namedtuple('DataPoint', ['x', 'y'])
-
     # For EVEREST, this defines the x-axis and y-axis units as a string.
     everest_xunit = "BJD"
     everest_yunit = "electrons / second"
@@ -58,17 +55,19 @@ def get_data_hlsp_everest(obsid):
         errcode = 0
         for kfile in parsed_file_result.files:
             try:
-                with fits.open(kfile) as hdulist:
+                with open_fits(kfile) as fits_file:
                     # Extract time stamps and relevant fluxes.
-                    if len(hdulist) == 6:
+                    if len(fits_file) == 6:
+                        columns = fits_file.columns(1, ["TIME", "FRAW",
+                                                        "FCOR"])
                         # Timestamps.
-                        bjd = (hdulist[1].data["TIME"] +
-                               hdulist[1].header["BJDREFF"] +
-                               hdulist[1].header["BJDREFI"])
+                        bjd = (columns["TIME"] +
+                               fits_file.keyword(1, "BJDREFF") +
+                               fits_file.keyword(1, "BJDREFI"))
                         # Raw flux.
-                        raw_flux = hdulist[1].data["FRAW"]
+                        raw_flux = columns["FRAW"]
                         # Corrected flux.
-                        cor_flux = hdulist[1].data["FCOR"]
+                        cor_flux = columns["FCOR"]
                         # Only keep those points that don't have NaN's in them.
                         where_keep = numpy.where(
                             (numpy.isfinite(bjd)) &
@@ -88,23 +87,17 @@ def get_data_hlsp_everest(obsid):
                             ' ' + parsed_file_result.campaign.upper())
 
                         if errcode == 0:
-                            # Get arrays into regular list with decimal limits.
-                            bjd = [float("{0:.8f}".format(x)) for x in bjd]
-                            raw_flux = [float("{0:.8f}".format(x))
-                                        for x in raw_flux]
-                            cor_flux = [float("{0:.8f}".format(x))
-                                        for x in cor_flux]
                             all_plot_labels[0] = (this_plot_label +
                                                   ' Raw')
-                            all_plot_series[0] = [data_point(x=x, y=y) for
-                                                  x, y in zip(bjd, raw_flux)]
+                            # The values are written with 8 decimals.
+                            all_plot_series[0] = PlotSeries(
+                                bjd, raw_flux, DECIMALS_8, DECIMALS_8)
                             all_plot_xunits[0] = everest_xunit
                             all_plot_yunits[0] = everest_yunit
                             all_plot_labels[1] = (this_plot_label +
                                                   ' Corrected')
-                            all_plot_series[1] = [data_point(x=x, y=y) for
-                                                  x, y in zip(bjd,
-                                                              cor_flux)]
+                            all_plot_series[1] = PlotSeries(
+                                bjd, cor_flux, DECIMALS_8, DECIMALS_8)
                             all_plot_xunits[1] = everest_xunit
                             all_plot_yunits[1] = everest_yunit
                         else:
@@ -6,10 +6,10 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-import collections
-from data_series import DataSeries
+from data_series import DataSeries, PlotSeries
 import numpy
 from parse_obsid_hlsp_k2gap import parse_obsid_hlsp_k2gap
+from precision import DECIMALS_8
 
 #--------------------
 def get_data_hlsp_k2gap(obsid):
@@ -30,9 +30,6 @@ def get_data_hlsp_k2gap(obsid):
     3 = File is missing on disk.
     """
 
-    # This defines a data point for a DataSeries object as a namedtuple.
-    data_point = collections.namedtuple('DataPoint', ['x', 'y'])
-
     # For K2GAP, this defines the x-axis and y-axis units as a string.
     k2gap_xunit = "BJD"
     k2gap_yunit = "normalized"
@@ -55,8 +52,7 @@ def get_data_hlsp_k2gap(obsid):
             kepbjds, cor_flux = numpy.genfromtxt(kfile, comments='#',
                                                  unpack=True)
 
-            bjd = [float("{0:.8f}".format(x + 2454833.0)) for x in kepbjds]
-            cor_flux = [float("{0:.8f}".format(x)) for x in cor_flux]
+            bjd = kepbjds + 2454833.0
 
             # Create the plot label and plot series for the
             # extracted and detrended fluxes.
@@ -64,8 +60,9 @@ def get_data_hlsp_k2gap(obsid):
                 'K2GAP_' + parsed_file_result.k2gapid + ' ' +
                 parsed_file_result.campaign.upper())
             all_plot_labels[i] = this_plot_label
-            all_plot_series[i] = [data_point(x=x, y=y) for
-                                  x, y in zip(bjd, cor_flux)]
+            # The values are written with 8 decimals.
+            all_plot_series[i] = PlotSeries(bjd, cor_flux, DECIMALS_8,
+                                            DECIMALS_8)
             all_plot_xunits[i] = k2gap_xunit
             all_plot_yunits[i] = k2gap_yunit
 
@@ -6,11 +6,11 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-import collections
 import numpy
-from astropy.io import fits
-from data_series import DataSeries
+from data_series import DataSeries, PlotSeries
+from fits_access import open_fits
 from parse_obsid_hlsp_k2sc import parse_obsid_hlsp_k2sc
+from precision import DECIMALS_8
 
 #--------------------
 def get_data_hlsp_k2sc(obsid):
@@ -35,9 +35,6 @@ def get_data_hlsp_k2sc(obsid):
     6 = All values were non-finite in x and/or y.
     """
 
-    # This defines a data point for a DataSeries object as a namedtuple.
-    data_point = collections.namedtuple('DataPoint', ['x', 'y'])
-
     # For K2SC, this defines the x-axis and y-axis units as a string.
     k2sc_xunit = "BJD"
     k2sc_yunit = "electrons / second"
@@ -58,21 +55,22 @@ def get_data_hlsp_k2sc(obsid):
         errcode = 0
         for i, kfile in enumerate(parsed_file_result.files):
             try:
-                with fits.open(kfile) as hdulist:
+                with open_fits(kfile) as fits_file:
                     # Extract time stamps and relevant fluxes.  Note that for
                     # K2SC there are 2 relevant extensions.  The first
                     # extension is the detrended PDCSAP lightcurve, the second
                     # is the detrended SAP lightcurve.
-                    if len(hdulist) == 3:
+                    if len(fits_file) == 3:
                         for j in range(1, 3):
                             # Extension name.
-                            extname = hdulist[j].header["EXTNAME"].strip()
+                            extname = fits_file.keyword(j, "EXTNAME").strip()
 
                             # Timestamps.
-                            bjd = hdulist[j].data["time"] + 2454833.0
+                            columns = fits_file.columns(j, ["time", "flux"])
+                            bjd = columns["time"] + 2454833.0
 
                             # Corrected flux.
-                            cor_flux = hdulist[j].data["flux"]
+                            cor_flux = columns["flux"]
 
 
                             # Only keep those points that don't have NaN's in
@@ -97,16 +95,11 @@ def get_data_hlsp_k2sc(obsid):
                             # over the extension number, but the lists are
                             # zero-indexed, so "k" is the insert index.
                             if errcode == 0:
-                                # Get arrays into regular list with decimal
-                                # limits.
-                                bjd = [float("{0:.8f}".format(x)) for x in bjd]
-                                cor_flux = [float("{0:.8f}".format(x))
-                                            for x in cor_flux]
                                 k = j-1
                                 all_plot_labels[k] = this_plot_label
-                                all_plot_series[k] = [
-                                    data_point(x=x, y=y) for
-                                    x, y in zip(bjd, cor_flux)]
+                                # The values are written with 8 decimals.
+                                all_plot_series[k] = PlotSeries(
+                                    bjd, cor_flux, DECIMALS_8, DECIMALS_8)
                                 all_plot_xunits[k] = k2sc_xunit
                                 all_plot_yunits[k] = k2sc_yunit
                             else:
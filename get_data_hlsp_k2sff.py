@@ -6,10 +6,10 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-import collections
-from astropy.io import fits
-from data_series import DataSeries
+from data_series import DataSeries, PlotSeries
+from fits_access import open_fits
 from parse_obsid_hlsp_k2sff import parse_obsid_hlsp_k2sff
+from precision import DECIMALS_8
 
 #--------------------
 def get_data_hlsp_k2sff(obsid):
@@ -33,9 +33,6 @@ def get_data_hlsp_k2sff(obsid):
     5 = Could not open FITS file for reading.
     """
 
-    # This defines a data point for a DataSeries object as a namedtuple.
-    data_point = collections.namedtuple('DataPoint', ['x', 'y'])
-
     # For K2SFF, this defines the x-axis and y-axis units as a string.
     k2sff_xunit = "BJD"
     k2sff_yunit = "normalized"
@@ -56,29 +53,27 @@ def get_data_hlsp_k2sff(obsid):
         errcode = 0
         for i, kfile in enumerate(parsed_file_result.files):
             try:
-                with fits.open(kfile) as hdulist:
+                with open_fits(kfile) as fits_file:
                     # Extract time stamps and relevant fluxes.  Note that for
                     # K2SFF there are 21 relevant extensions, and two fluxes
                     # (raw and detrended) for each.  The first extension is the
                     # "best" aperture from the 20, then 2 - 21 are the 20 used.
-                    if len(hdulist) == 25:
+                    if len(fits_file) == 25:
                         for j in range(1, 22):
                             # Extension name.
-                            extname = hdulist[j].header["EXTNAME"].strip()
+                            extname = fits_file.keyword(j, "EXTNAME").strip()
 
                             # Timestamps.
-                            bjdreff = hdulist[j].header["BJDREFF"]
-                            bjdrefi = hdulist[j].header["BJDREFI"]
-                            bjd = [float("{0:.8f}".format(
-                                x + bjdreff + bjdrefi)) for x in
-                                   hdulist[j].data["T"]]
+                            bjdreff = fits_file.keyword(j, "BJDREFF")
+                            bjdrefi = fits_file.keyword(j, "BJDREFI")
+                            columns = fits_file.columns(j, ["T", "FRAW",
+                                                            "FCOR"])
+                            bjd = columns["T"] + bjdreff + bjdrefi
 
                             # Raw flux.
-                            raw_flux = [float("{0:.8f}".format(x)) for x in
-                                        hdulist[j].data["FRAW"]]
+                            raw_flux = columns["FRAW"]
                             # Corrected flux.
-                            cor_flux = [float("{0:.8f}".format(x)) for x in
-                                        hdulist[j].data["FCOR"]]
+                            cor_flux = columns["FCOR"]
 
                             # Create the plot label and plot series for the
                             # extracted and detrended fluxes.
@@ -93,15 +88,15 @@ def get_data_hlsp_k2sff(obsid):
                             k = j-1
                             all_plot_labels[k*2] = (this_plot_label +
                                                     ' Raw')
-                            all_plot_series[k*2] = [data_point(x=x, y=y) for
-                                                    x, y in zip(bjd, raw_flux)]
+                            # The values are written with 8 decimals.
+                            all_plot_series[k*2] = PlotSeries(
+                                bjd, raw_flux, DECIMALS_8, DECIMALS_8)
                             all_plot_xunits[k*2] = k2sff_xunit
                             all_plot_yunits[k*2] = k2sff_yunit
                             all_plot_labels[k*2+1] = (this_plot_label +
                                                       ' Corrected')
-                            all_plot_series[k*2+1] = [data_point(x=x, y=y) for
-                                                      x, y in zip(bjd,
-                                                                  cor_flux)]
+                            all_plot_series[k*2+1] = PlotSeries(
+                                bjd, cor_flux, DECIMALS_8, DECIMALS_8)
                             all_plot_xunits[k*2+1] = k2sff_xunit
                             all_plot_yunits[k*2+1] = k2sff_yunit
                     else:
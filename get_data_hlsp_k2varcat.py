@@ -8,8 +8,8 @@
 
 import collections
 import re
-from astropy.io import fits
 from data_series import DataSeries
+from fits_access import open_fits
 from parse_obsid_hlsp_k2varcat import parse_obsid_hlsp_k2varcat
 
 #--------------------
@@ -58,20 +58,22 @@ def get_data_hlsp_k2varcat(obsid):
         errcode = 0
         for i, kfile in enumerate(parsed_file_result.files):
             try:
-                with fits.open(kfile) as hdulist:
+                with open_fits(kfile) as fits_file:
                     # Extract time stamps and relevant fluxes.
-                    tunit = hdulist[1].header["TUNIT1"]
+                    tunit = fits_file.keyword(1, "TUNIT1")
                     bjd_ref_str = re.split('-', tunit)[1].strip()
                     if bjd_ref_str == "2454833":
+                        columns = fits_file.columns(1, ["TIME", "APTFLUX",
+                                                        "DETFLUX"])
                         bjd_ref = float(bjd_ref_str)
                         bjd = [bjd_ref + float(x) for x in
-                               hdulist[1].data["TIME"]]
+                               columns["TIME"]]
                         # Extracted (not detrended) flux.
                         ext_flux = [float(x) for x in
-                                    hdulist[1].data["APTFLUX"]]
+                                    columns["APTFLUX"]]
                         # Extracted (and detrended) flux.
                         det_flux = [float(x) for x in
-                                    hdulist[1].data["DETFLUX"]]
+                                    columns["DETFLUX"]]
 
                         # Create the plot label and plot series for the
                         # extracted and detrended fluxes.
@@ -6,11 +6,11 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-import collections
-from astropy.io import fits
-from data_series import DataSeries
+from data_series import DataSeries, PlotSeries
+from fits_access import open_fits
 import numpy
 from parse_obsid_hlsp_kegs import parse_obsid_hlsp_kegs
+from precision import DECIMALS_8
 
 #--------------------
 def get_data_hlsp_kegs(obsid):
@@ -31,9 +31,6 @@ def get_data_hlsp_kegs(obsid):
     3 = File is missing on disk.
     """
 
-    # This defines a data point for a DataSeries object as a namedtuple.
-    data_point = collections.namedtuple('DataPoint', ['x', 'y'])
-
     # For KEGS, this defines the x-axis and y-axis units as a string.
     kegs_xunit = "BJD"
     kegs_yunit = "counts/sec"
@@ -53,14 +50,17 @@ def get_data_hlsp_kegs(obsid):
         # the FITS files in the list.
         errcode = 0
         for i, kfile in enumerate(parsed_file_result.files):
-            with fits.open(kfile) as hdulist:
-                kepbjds = hdulist[1].data['TIME']
-                fraw = hdulist[1].data['FRAW']
-                fcor1 = hdulist[1].data['FCOR1']
-                fcor2 = hdulist[1].data['FCOR2']
-                fcor3 = hdulist[1].data['FCOR3']
-                fcor4 = hdulist[1].data['FCOR4']
-                fcor5 = hdulist[1].data['FCOR5']
+            with open_fits(kfile) as fits_file:
+                columns = fits_file.columns(1, ["TIME", "FRAW", "FCOR1",
+                                                "FCOR2", "FCOR3", "FCOR4",
+                                                "FCOR5"])
+                kepbjds = columns["TIME"]
+                fraw = columns["FRAW"]
+                fcor1 = columns["FCOR1"]
+                fcor2 = columns["FCOR2"]
+                fcor3 = columns["FCOR3"]
+                fcor4 = columns["FCOR4"]
+                fcor5 = columns["FCOR5"]
 
             where_keep_1 = numpy.where((numpy.isfinite(kepbjds)) &
                                        (numpy.isfinite(fcor1)))
@@ -75,58 +75,53 @@ def get_data_hlsp_kegs(obsid):
             where_keep_6 = numpy.where((numpy.isfinite(kepbjds)) &
                                        (numpy.isfinite(fraw)))
 
-            bjd_1 = [float("{0:.8f}".format(x + 2454833.0))
-                     for x in kepbjds[where_keep_1]]
-            flux_1 = [float("{0:.8f}".format(x)) for x in fcor1[where_keep_1]]
-            bjd_2 = [float("{0:.8f}".format(x + 2454833.0))
-                     for x in kepbjds[where_keep_2]]
-            flux_2 = [float("{0:.8f}".format(x)) for x in fcor2[where_keep_2]]
-            bjd_3 = [float("{0:.8f}".format(x + 2454833.0))
-                     for x in kepbjds[where_keep_3]]
-            flux_3 = [float("{0:.8f}".format(x)) for x in fcor3[where_keep_3]]
-            bjd_4 = [float("{0:.8f}".format(x + 2454833.0))
-                     for x in kepbjds[where_keep_4]]
-            flux_4 = [float("{0:.8f}".format(x)) for x in fcor4[where_keep_4]]
-            bjd_5 = [float("{0:.8f}".format(x + 2454833.0))
-                     for x in kepbjds[where_keep_5]]
-            flux_5 = [float("{0:.8f}".format(x)) for x in fcor5[where_keep_5]]
-            bjd_6 = [float("{0:.8f}".format(x + 2454833.0))
-                     for x in kepbjds[where_keep_6]]
-            flux_6 = [float("{0:.8f}".format(x)) for x in fraw[where_keep_6]]
+            bjd_1 = kepbjds[where_keep_1] + 2454833.0
+            flux_1 = fcor1[where_keep_1]
+            bjd_2 = kepbjds[where_keep_2] + 2454833.0
+            flux_2 = fcor2[where_keep_2]
+            bjd_3 = kepbjds[where_keep_3] + 2454833.0
+            flux_3 = fcor3[where_keep_3]
+            bjd_4 = kepbjds[where_keep_4] + 2454833.0
+            flux_4 = fcor4[where_keep_4]
+            bjd_5 = kepbjds[where_keep_5] + 2454833.0
+            flux_5 = fcor5[where_keep_5]
+            bjd_6 = kepbjds[where_keep_6] + 2454833.0
+            flux_6 = fraw[where_keep_6]
 
             # Create the plot label and plot series for the
-            # extracted and detrended fluxes.
+            # extracted and detrended fluxes.  The values are written with 8
+            # decimals.
             this_plot_label = (
                 'KEGS_' + parsed_file_result.kegsid + ' ' +
                 parsed_file_result.campaign.upper())
             all_plot_labels[i] = this_plot_label + ' FCOR1'
-            all_plot_series[i] = [data_point(x=x, y=y) for
-                                  x, y in zip(bjd_1, flux_1)]
+            all_plot_series[i] = PlotSeries(bjd_1, flux_1, DECIMALS_8,
+                                            DECIMALS_8)
             all_plot_xunits[i] = kegs_xunit
             all_plot_yunits[i] = kegs_yunit
             all_plot_labels[i+1] = this_plot_label + ' FCOR2'
-            all_plot_series[i+1] = [data_point(x=x, y=y) for
-                                    x, y in zip(bjd_2, flux_2)]
+            all_plot_series[i+1] = PlotSeries(bjd_2, flux_2, DECIMALS_8,
+                                              DECIMALS_8)
             all_plot_xunits[i+1] = kegs_xunit
             all_plot_yunits[i+1] = kegs_yunit
             all_plot_labels[i+2] = this_plot_label + ' FCOR3'
-            all_plot_series[i+2] = [data_point(x=x, y=y) for
-                                    x, y in zip(bjd_3, flux_3)]
+            all_plot_series[i+2] = PlotSeries(bjd_3, flux_3, DECIMALS_8,
+                                              DECIMALS_8)
             all_plot_xunits[i+2] = kegs_xunit
             all_plot_yunits[i+2] = kegs_yunit
             all_plot_labels[i+3] = this_plot_label + ' FCOR4'
-            all_plot_series[i+3] = [data_point(x=x, y=y) for
-                                    x, y in zip(bjd_4, flux_4)]
+            all_plot_series[i+3] = PlotSeries(bjd_4, flux_4, DECIMALS_8,
+                                              DECIMALS_8)
             all_plot_xunits[i+3] = kegs_xunit
             all_plot_yunits[i+3] = kegs_yunit
             all_plot_labels[i+4] = this_plot_label + ' FCOR5'
-            all_plot_series[i+4] = [data_point(x=x, y=y) for
-                                    x, y in zip(bjd_5, flux_5)]
+            all_plot_series[i+4] = PlotSeries(bjd_5, flux_5, DECIMALS_8,
+                                              DECIMALS_8)
             all_plot_xunits[i+4] = kegs_xunit
             all_plot_yunits[i+4] = kegs_yunit
             all_plot_labels[i+5] = this_plot_label + ' FRAW'
-            all_plot_series[i+5] = [data_point(x=x, y=y) for
-                                    x, y in zip(bjd_6, flux_6)]
+            all_plot_series[i+5] = PlotSeries(bjd_6, flux_6, DECIMALS_8,
+                                              DECIMALS_8)
             all_plot_xunits[i+5] = kegs_xunit
             all_plot_yunits[i+5] = kegs_yunit
 
@@ -6,11 +6,11 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-import collections
 import numpy
-from astropy.io import fits
-from data_series import DataSeries
+from data_series import DataSeries, PlotSeries
+from fits_access import open_fits
 from parse_obsid_hlsp_polar import parse_obsid_hlsp_polar
+from precision import DECIMALS_8
 
 #--------------------
 def get_data_hlsp_polar(obsid):
@@ -35,9 +35,6 @@ def get_data_hlsp_polar(obsid):
     6 = All values were non-finite in x and/or y.
     """
 
-    # This defines a data point for a DataSeries object as a namedtuple.
-    data_point = collections.namedtuple('DataPoint', ['x', 'y'])
-
     # For POLAR, this defines the x-axis and y-axis units as a string.
     polar_xunit = "BJD"
     polar_yunit = "normalized"
@@ -58,18 +55,22 @@ def get_data_hlsp_polar(obsid):
         errcode = 0
         for kfile in parsed_file_result.files:
             try:
-                with fits.open(kfile) as hdulist:
+                with open_fits(kfile) as fits_file:
                     # Extract time stamps and relevant fluxes.
-                    if len(hdulist) == 3:
+                    if len(fits_file) == 3:
+                        fil_columns = fits_file.columns(1, ["FILTIME",
+                                                            "FILFLUX"])
+                        det_columns = fits_file.columns(2, ["DETTIME",
+                                                            "DETFLUX"])
                         # Filtered timestamps.
-                        fil_bjd = (hdulist[1].data["FILTIME"] + 2400000.0)
+                        fil_bjd = (fil_columns["FILTIME"] + 2400000.0)
                         # Filtered flux.
-                        fil_flux = hdulist[1].data["FILFLUX"]
+                        fil_flux = fil_columns["FILFLUX"]
 
                         # Detrended timestamps.
-                        det_bjd = (hdulist[2].data["DETTIME"] + 2400000.0)
+                        det_bjd = (det_columns["DETTIME"] + 2400000.0)
                         # Detrended flux.
-                        det_flux = hdulist[2].data["DETFLUX"]
+                        det_flux = det_columns["DETFLUX"]
 
                         # Only keep those points that don't have NaN's in them.
                         det_where_keep = numpy.where(
@@ -97,27 +98,17 @@ def get_data_hlsp_polar(obsid):
                             ' ' + parsed_file_result.campaign.upper())
 
                         if errcode == 0:
-                            # Get arrays into regular list with decimal limits.
-                            det_bjd = [float("{0:.8f}".format(x))
-                                       for x in det_bjd]
-                            fil_bjd = [float("{0:.8f}".format(x))
-                                       for x in fil_bjd]
-                            det_flux = [float("{0:.8f}".format(x))
-                                        for x in det_flux]
-                            fil_flux = [float("{0:.8f}".format(x))
-                                        for x in fil_flux]
                             all_plot_labels[0] = (this_plot_label +
                                                   ' Detrended')
-                            all_plot_series[0] = [data_point(x=x, y=y) for
-                                                  x, y in zip(det_bjd,
-                                                              det_flux)]
+                            # The values are written with 8 decimals.
+                            all_plot_series[0] = PlotSeries(
+                                det_bjd, det_flux, DECIMALS_8, DECIMALS_8)
                             all_plot_xunits[0] = polar_xunit
                             all_plot_yunits[0] = polar_yunit
                             all_plot_labels[1] = (this_plot_label +
                                                   ' Det.+Filtered')
-                            all_plot_series[1] = [data_point(x=x, y=y) for
-                                                  x, y in zip(fil_bjd,
-                                                              fil_flux)]
+                            all_plot_series[1] = PlotSeries(
+                                fil_bjd, fil_flux, DECIMALS_8, DECIMALS_8)
                             all_plot_xunits[1] = polar_xunit
                             all_plot_yunits[1] = polar_yunit
                         else:
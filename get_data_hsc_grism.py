@@ -7,10 +7,10 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-import collections
-from astropy.io import fits
-from data_series import DataSeries
+from data_series import DataSeries, PlotSeries
+from fits_access import open_fits
 from parse_obsid_hsc_grism import parse_obsid_hsc_grism
+from precision import SIGNIFICANT_9
 
 #--------------------
 def get_data_hsc_grism(obsid):
@@ -38,9 +38,6 @@ def get_data_hsc_grism(obsid):
     # image.
     errcode = 0
 
-    # This defines a data point for a DataSeries object as a namedtuple.
-    data_point = collections.namedtuple('DataPoint', ['x', 'y'])
-
     # For HLA grisms, this defines the x-axis and y-axis units as a string.
     hsc_grism_xunit = "Angstroms"
     hsc_grism_yunit = "ergs/cm^2/s/Angstrom"
@@ -53,20 +50,19 @@ def get_data_hsc_grism(obsid):
     if errcode == 0:
         for sfile in parsed_files_result.specfiles:
             try:
-                with fits.open(sfile) as hdulist:
-                    wls = [float(x) for x in hdulist[1].data['wave'][0, :]]
-                    fls = [float(x) for x in hdulist[1].data["flux"][0, :]]
+                with open_fits(sfile) as fits_file:
+                    columns = fits_file.columns(1, ["wave", "flux"])
+                    # The values are written with 9 significant digits.
+                    plot_series = PlotSeries(columns["wave"][0, :],
+                                             columns["flux"][0, :],
+                                             SIGNIFICANT_9, SIGNIFICANT_9)
             except IOError:
                 errcode = 4
                 return_dataseries = DataSeries(
                     'hsc_grism', obsid, [], [''], [''], [''], errcode)
             else:
-                wlfls = [x for x in zip(wls, fls)]
                 return_dataseries = DataSeries(
-                    'hsc_grism', obsid,
-                    [[data_point(x=float("{0:.8e}".format(x)),
-                                 y=float("{0:.8e}".format(y)))
-                      for x, y in wlfls]],
+                    'hsc_grism', obsid, [plot_series],
                     [obsid],
                     [hsc_grism_xunit], [hsc_grism_yunit],
                     errcode)
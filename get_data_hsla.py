@@ -7,12 +7,12 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-import collections
 import os
-import sys
-from astropy.io import fits
-from data_series import DataSeries
+from data_series import DataSeries, PlotSeries
+from fits_access import open_fits
 from parse_obsid_hsla import parse_obsid_hsla
+from precision import SIGNIFICANT_9
+from size_estimator import estimate_json_size
 
 #--------------------
 def get_data_hsla(obsid, targ):
@@ -40,17 +40,14 @@ def get_data_hsla(obsid, targ):
     3 = Could not open one or more FITS file for reading.
     """
 
-    # This defines the maximum (approximate) size in bytes allowed to be
-    # returned as a DataSeries.
+    # This defines the maximum (estimated) length of the JSON of the
+    # DataSeries allowed to be returned.
     max_size = 50000000.
 
     # This error code will be used unless there's a problem reading any
     # of the FITS files in the list.
     errcode = 0
 
-    # This defines a data point for a DataSeries object as a namedtuple.
-    data_point = collections.namedtuple('DataPoint', ['x', 'y'])
-
     # For HSLA grisms, this defines the x-axis and y-axis units as a string.
     hsla_xunit = "Angstroms"
     hsla_yunit = "ergs/cm^2/s/Angstrom"
@@ -64,25 +61,30 @@ def get_data_hsla(obsid, targ):
 
     # For each file, read in the contents and create a return JSON object.
     if errcode == 0:
-        # This keeps track of the (approximate) total size of the return
-        # object so that it doesn't get too large (in bytes).
+        # This keeps track of the (estimated) total length of the JSON of the
+        # return object so that it doesn't get too large.
         total_size = 0.0
         for sfile in parsed_files_result.specfiles:
             try:
-                with fits.open(sfile) as hdulist:
+                with open_fits(sfile) as fits_file:
                     if obsid.lower().strip() != "hsla_coadd":
                         # Get the segments, which can be ['FUVA' or 'FUVB']
-                        segments = hdulist[1].data['segment']
+                        columns = fits_file.columns(1, ["segment",
+                                                        "wavelength", "flux",
+                                                        "error"])
+                        segments = columns["segment"]
                         # Wavelengths and fluxes are stored as a list for
                         # each seg.
-                        segment_wls = hdulist[1].data['wavelength']
-                        segment_fls = hdulist[1].data["flux"]
-                        segment_flerrs = hdulist[1].data["error"]
+                        segment_wls = columns["wavelength"]
+                        segment_fls = columns["flux"]
+                        segment_flerrs = columns["error"]
                     else:
                         # Then this is a coadd, so there aren't multiple segs.
-                        wls = hdulist[1].data['wave']
-                        fls = hdulist[1].data["fluxwgt"]
-                        flerrs = hdulist[1].data["fluxwgt_err"]
+                        columns = fits_file.columns(1, ["wave", "fluxwgt",
+                                                        "fluxwgt_err"])
+                        wls = columns["wave"]
+                        fls = columns["fluxwgt"]
+                        flerrs = columns["fluxwgt_err"]
             except IOError:
                 errcode = 4
                 all_data_series.append(DataSeries(
@@ -93,55 +95,43 @@ def get_data_hsla(obsid, targ):
                 if obsid.lower().strip() != "hsla_coadd":
                     for this_seg, this_wl, this_fl, this_flerr in zip(
                             segments, segment_wls, segment_fls, segment_flerrs):
-                        wls = [float(x) for x in this_wl]
-                        fls = [float(x) for x in this_fl]
-                        flerrs = [float(x) for x in this_flerr]
-                        wlfls = [x for x in zip(wls, fls)]
-                        wlfls_err = [x for x in zip(wls, flerrs)]
+                        # The values are written with 9 significant digits.
                         # Append the wl-fl DataSeries for this segment.
                         all_data_series.append(DataSeries(
                             'hsla', obsid,
-                            [[data_point(x=float("{0:.8e}".format(x)),
-                                         y=float("{0:.8e}".format(y)))
-                              for x, y in wlfls]],
+                            [PlotSeries(this_wl, this_fl, SIGNIFICANT_9,
+                                        SIGNIFICANT_9)],
                             [obsid+'_'+this_seg], [hsla_xunit], [hsla_yunit],
                             errcode, is_ancillary=[0]))
+                        this_plot_series = PlotSeries(
+                            this_wl, this_flerr, SIGNIFICANT_9, SIGNIFICANT_9)
                         this_dataseries = DataSeries(
-                            'hsla', obsid,
-                            [[data_point(x=float("{0:.8e}".format(x)),
-                                         y=float("{0:.8e}".format(y)))
-                              for x, y in wlfls_err]],
+                            'hsla', obsid, [this_plot_series],
                             [obsid+'_'+this_seg+'_ERR'], [hsla_xunit],
                             [hsla_yunit], errcode, is_ancillary=[1])
-                        this_dataseries_size = sys.getsizeof(
-                            this_dataseries.plot_series[0])
+                        this_dataseries_size = estimate_json_size(
+                            this_dataseries)
                         # Append the wl-flerr DataSeries for this segment.
                         if total_size + this_dataseries_size <= max_size:
                             all_data_series.append(this_dataseries)
                             total_size = total_size + this_dataseries_size
                 else:
                     # Create DataSeries if this is a coadd-level spectrum.
-                    wls = [float(x) for x in wls]
-                    fls = [float(x) for x in fls]
-                    flerrs = [float(x) for x in flerrs]
-                    wlfls = [x for x in zip(wls, fls)]
-                    wlfls_err = [x for x in zip(wls, flerrs)]
                     # Only plot the coadd across lifetime positions by default.
                     if '_all.fits.gz' in os.path.basename(sfile):
                         is_anc = [0]
                     else:
                         is_anc = [1]
-                    # Append the wl-fl DataSeries for this segment.
+                    # Append the wl-fl DataSeries for this segment.  The
+                    # values are written with 9 significant digits.
+                    this_plot_series = PlotSeries(wls, fls, SIGNIFICANT_9,
+                                                  SIGNIFICANT_9)
                     this_dataseries = DataSeries(
-                        'hsla', obsid,
-                        [[data_point(x=float("{0:.8e}".format(x)),
-                                     y=float("{0:.8e}".format(y)))
-                          for x, y in wlfls]],
+                        'hsla', obsid, [this_plot_series],
                         [os.path.basename(sfile).strip(".fits.gz")],
                         [hsla_xunit], [hsla_yunit], errcode,
                         is_ancillary=is_anc)
-                    this_dataseries_size = sys.getsizeof(
-                        this_dataseries.plot_series[0])
+                    this_dataseries_size = estimate_json_size(this_dataseries)
                     # Append the wl-flerr DataSeries for this segment.
                     if total_size + this_dataseries_size <= max_size:
                         all_data_series.append(this_dataseries)
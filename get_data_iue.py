@@ -6,13 +6,13 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-import collections
 import math
 from operator import itemgetter
-from astropy.io import fits
-from data_series import DataSeries
+from data_series import DataSeries, PlotSeries
+from fits_access import open_fits
 import numpy
 from parse_obsid_iue import parse_obsid_iue
+from precision import DECIMALS_8, SIGNIFICANT_9
 from scipy.interpolate import interp1d
 
 #--------------------
@@ -321,7 +321,7 @@ def resample_spectrum(combined_spectrum, camera, showplot=False):
             pyp.axvline(wls[gapmark_ind])
         pyp.suptitle("Red = Oversampled, Green = Resampled, Black = Original")
         pyp.show()
-    return zip(binned_wls, binned_fls)
+    return list(zip(binned_wls, binned_fls))
 #--------------------
 
 #--------------------
@@ -357,9 +357,6 @@ def get_data_iue(obsid, filt):
     # of the FITS files in the list, or the FILTER value is not understood.
     errcode = 0
 
-    # This defines a data point for a DataSeries object as a namedtuple.
-    data_point = collections.namedtuple('DataPoint', ['x', 'y'])
-
     # For IUE, this defines the x-axis and y-axis units as a string.
     iue_xunit = "Angstroms (vacuum, heliocentric)"
     iue_yunit = "ergs/cm^2/s/Angstrom"
@@ -392,20 +389,24 @@ def get_data_iue(obsid, filt):
                 is_hi = True
 
             try:
-                with fits.open(sfile) as hdulist:
+                with open_fits(sfile) as fits_file:
                     if is_lo:
                         # Get the dispersion type from the primary header.
-                        dispersion = hdulist[0].header["disptype"]
+                        dispersion = fits_file.keyword(0, "disptype")
+                        columns = fits_file.columns(1, ["aperture",
+                                                        "npoints",
+                                                        "wavelength",
+                                                        "deltaw", "flux"])
                         # Get the aperture size(s) from the header.
-                        apertures = hdulist[1].data["aperture"]
+                        apertures = columns["aperture"]
                         n_apertures = len(apertures)
                         # Number of spectral data points for each aperture size.
-                        n_wls = [int(x) for x in hdulist[1].data["npoints"]]
+                        n_wls = [int(x) for x in columns["npoints"]]
                         # Initial wavelength value(s).
                         starting_wl = [float(x) for x in
-                                       hdulist[1].data["wavelength"]]
+                                       columns["wavelength"]]
                         # Step size(s) for each subsequent wavelength.
-                        delta_wl = [float(x) for x in hdulist[1].data["deltaw"]]
+                        delta_wl = [float(x) for x in columns["deltaw"]]
 
                         # Generate the full array of wavelength values, and get
                         # full array of flux values, for each  aperture.
@@ -414,7 +415,7 @@ def get_data_iue(obsid, filt):
                                    x*delta_wl[aper] for
                                    x in range(n_wls[aper])]
                             fls = [float(x) for
-                                   x in hdulist[1].data["flux"][aper]]
+                                   x in columns["flux"][aper]]
                             # Make sure wavelengths and fluxes are sorted
                             # from smallest wavelength to largest.
                             sort_indexes = [x[0] for x in
@@ -425,10 +426,13 @@ def get_data_iue(obsid, filt):
                             wlfls = [(x, y) for x, y in zip(wls, fls) if
                                      y != 0.]
                             if wlfls != []:
-                                datapoints = [
-                                    [data_point(x=float("{0:.8f}".format(x)),
-                                                y=float("{0:.8e}".format(y)))
-                                     for x, y in wlfls]]
+                                # The wavelengths are written with 8
+                                # decimals and the fluxes with 9
+                                # significant digits.
+                                datapoints = [PlotSeries(
+                                    [x[0] for x in wlfls],
+                                    [x[1] for x in wlfls], DECIMALS_8,
+                                    SIGNIFICANT_9)]
                                 # Create the return DataSeries object.
                                 all_data_series.append(
                                     DataSeries('iue', obsid,
@@ -441,11 +445,11 @@ def get_data_iue(obsid, filt):
 
                     if is_hi:
                         # Get the aperture from the primary header.
-                        aperture = hdulist[0].header["aperture"].strip()
+                        aperture = fits_file.keyword(0, "aperture").strip()
                         # Get the dispersion type from the primary header.
-                        dispersion = hdulist[0].header["disptype"].strip()
+                        dispersion = fits_file.keyword(0, "disptype").strip()
                         # Get the camera used (SWP, LWP, LWR).
-                        camera = hdulist[0].header["camera"].strip()
+                        camera = fits_file.keyword(0, "camera").strip()
                         # Get a list of spectral orders.  Those that are beyond
                         # the range defined in Solano are not considered.
                         if camera == "LWP":
@@ -454,7 +458,12 @@ def get_data_iue(obsid, filt):
                             max_order = 119
                         else:
                             max_order = 120
-                        orders = [int(x) for x in hdulist[1].data["order"] if x
+                        columns = fits_file.columns(1, ["order", "npoints",
+                                                        "startpix",
+                                                        "wavelength",
+                                                        "deltaw", "abs_cal",
+                                                        "quality"])
+                        orders = [int(x) for x in columns["order"] if x
                                   <= max_order]
                         n_orders = len(orders)
                         # This lists will store each orders' spectral info.
@@ -463,26 +472,26 @@ def get_data_iue(obsid, filt):
                         # Loop over each order.
                         for order in range(n_orders):
                             # Number of fluxes for this order.
-                            n_p = int(hdulist[1].data["npoints"][order])
+                            n_p = int(columns["npoints"][order])
                             # Starting pixel within the array of 768 elements.
                             s_pix = int(
-                                hdulist[1].data["startpix"][order])
+                                columns["startpix"][order])
                             # Wavelength corresponding to this start pixel.
                             starting_wl = float(
-                                hdulist[1].data["wavelength"][order])
+                                columns["wavelength"][order])
                             # Step size for each subsequent wavelength.
                             delta_wl = float(
-                                hdulist[1].data["deltaw"][order])
+                                columns["deltaw"][order])
                             # Generate the full array of wavelength values.
                             wls = [starting_wl + x*delta_wl for x in
                                    range(n_p)]
                             # Extract the fluxes that go along with these wls.
-                            all_fluxes = hdulist[1].data["abs_cal"][order]
+                            all_fluxes = columns["abs_cal"][order]
                             fls = [float(x) for x in
                                    all_fluxes[(s_pix-1):(s_pix-1+n_p-1+1)]]
                             # Extract the quality flags that go along with
                             # these wls.
-                            all_qfs = hdulist[1].data["quality"][order]
+                            all_qfs = columns["quality"][order]
                             qfs = [int(x) for x in all_qfs[(s_pix-1):(s_pix-1+
                                                                       n_p-1+1)]]
                             # Only keep good Quality Flags, if the order is all
@@ -507,10 +516,10 @@ def get_data_iue(obsid, filt):
                                                           False)
 
                         # Create the return DataSeries object.
-                        datapoints = [
-                            [data_point(x=float("{0:.8f}".format(x)),
-                                        y=float("{0:.8e}".format(y)))
-                             for x, y in comb_spec_reb]]
+                        datapoints = [PlotSeries(
+                            [x[0] for x in comb_spec_reb],
+                            [x[1] for x in comb_spec_reb], DECIMALS_8,
+                            SIGNIFICANT_9)]
                         all_data_series.append(
                             DataSeries('iue', obsid,
                                        datapoints,
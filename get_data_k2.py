@@ -6,12 +6,14 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-from astropy.io import fits
-from data_series import DataSeries
+import numpy
+from data_series import DataSeries, PlotSeries
+from data_window import XMAX_DEFAULT, XMIN_DEFAULT, window_slice
+from fits_access import open_fits
 from parse_obsid_k2 import parse_obsid_k2
 
 #--------------------
-def get_data_k2(obsid):
+def get_data_k2(obsid, xmin=XMIN_DEFAULT, xmax=XMAX_DEFAULT):
     """
     Given a K2 observation ID, returns the lightcurve data.
 
@@ -19,6 +21,14 @@ def get_data_k2(obsid):
 
     :type obsid: str
 
+    :param xmin: The earliest time (BJD) to return, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The latest time (BJD) to return, or None for no limit.
+
+    :type xmax: float
+
     :returns: JSON -- The lightcurve data for this observation ID.
 
     Error codes:
@@ -51,33 +61,37 @@ def get_data_k2(obsid):
         errcode = 0
         for i, kfile in enumerate(parsed_file_result.files):
             try:
-                with fits.open(kfile) as hdulist:
+                with open_fits(kfile) as fits_file:
                     # Extract time stamps and relevant fluxes.  Note that there
                     # are both PDCSAP and SAP fluxes returned.
 
-                    # Extract time stamps and relevant fluxes.
-                    bjd = [float(x) for x in
-                           (float(hdulist[1].header["BJDREFI"]) +
-                            hdulist[1].header["BJDREFF"] +
-                            hdulist[1].data["TIME"])]
-                    flux_sap = [float(x) for x in hdulist[1].data["SAP_FLUX"]]
-                    flux_pdcsap = [float(x) for x in
-                                   hdulist[1].data["PDCSAP_FLUX"]]
+                    # Extract time stamps and relevant fluxes, converting only
+                    # those in the requested time range.
+                    columns = fits_file.columns(1, ["TIME", "SAP_FLUX",
+                                                    "PDCSAP_FLUX"])
+                    bjd = (float(fits_file.keyword(1, "BJDREFI")) +
+                           fits_file.keyword(1, "BJDREFF") + columns["TIME"])
+                    in_window = window_slice(bjd, xmin, xmax)
+                    bjd = numpy.asarray(bjd[in_window], dtype=numpy.float64)
+                    flux_sap = numpy.asarray(columns["SAP_FLUX"][in_window],
+                                             dtype=numpy.float64)
+                    flux_pdcsap = numpy.asarray(
+                        columns["PDCSAP_FLUX"][in_window],
+                        dtype=numpy.float64)
 
                     # Create the plot label and plot series for the
-                    # extracted and detrended fluxes.
+                    # extracted and detrended fluxes, which share the same
+                    # time stamps.  NaN values are kept, as before.
                     this_plot_label = ('KTWO_' + parsed_file_result.k2id +
                                        ' ' +
                                        parsed_file_result.campaign.upper())
                     all_plot_labels[i*2] = this_plot_label + ' SAP'
-                    all_plot_series[i*2] = [x for x in
-                                            zip(bjd, flux_sap)]
+                    all_plot_series[i*2] = PlotSeries(bjd, flux_sap)
                     all_plot_xunits[i*2] = k2_xunit
                     all_plot_yunits[i*2] = k2_yunit
 
                     all_plot_labels[i*2+1] = this_plot_label + ' PDCSAP'
-                    all_plot_series[i*2+1] = [x for x in
-                                              zip(bjd, flux_pdcsap)]
+                    all_plot_series[i*2+1] = PlotSeries(bjd, flux_pdcsap)
                     all_plot_xunits[i*2+1] = k2_xunit
                     all_plot_yunits[i*2+1] = k2_yunit
             except IOError:
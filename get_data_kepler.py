@@ -6,12 +6,59 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-from astropy.io import fits
-from data_series import DataSeries
+from concurrent.futures import ThreadPoolExecutor
+import numpy
+from data_series import DataSeries, PlotSeries
+from data_window import XMAX_DEFAULT, XMIN_DEFAULT, window_slice
+from fits_access import open_fits
 from parse_obsid_kepler import parse_obsid_kepler
 
+# The maximum number of files (quarters) of one observation ID that are read
+# at once.
+FILE_READ_WORKERS = 8
+
+#--------------------
+def _read_kepler_file(kfile, xmin=XMIN_DEFAULT, xmax=XMAX_DEFAULT):
+    """
+    Reads the time stamps and the SAP and PDCSAP fluxes of one Kepler
+    lightcurve file.
+
+    :param kfile: The path of the FITS file.
+
+    :type kfile: str
+
+    :param xmin: The earliest time (BJD) to return, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The latest time (BJD) to return, or None for no limit.
+
+    :type xmax: float
+
+    :returns: tuple -- The time stamps (BJD), SAP fluxes and PDCSAP fluxes, as
+    float64 arrays.
+
+    :raises: IOError if the file can not be read.
+    """
+    with open_fits(kfile) as fits_file:
+        # Extract time stamps and relevant fluxes, converting only those in
+        # the requested time range.  NaN values are kept, and written to the
+        # JSON as they were before.
+        columns = fits_file.columns(1, ["TIME", "SAP_FLUX", "PDCSAP_FLUX"])
+        bjd = (float(fits_file.keyword(1, "BJDREFI")) +
+               fits_file.keyword(1, "BJDREFF") + columns["TIME"])
+        in_window = window_slice(bjd, xmin, xmax)
+        bjd = numpy.asarray(bjd[in_window], dtype=numpy.float64)
+        flux_sap = numpy.asarray(columns["SAP_FLUX"][in_window],
+                                 dtype=numpy.float64)
+        flux_pdcsap = numpy.asarray(columns["PDCSAP_FLUX"][in_window],
+                                    dtype=numpy.float64)
+    return bjd, flux_sap, flux_pdcsap
 #--------------------
-def get_data_kepler(obsid):
+
+#--------------------
+def get_data_kepler(obsid, xmin=XMIN_DEFAULT, xmax=XMAX_DEFAULT,
+                    workers=FILE_READ_WORKERS):
     """
     Given a Kepler observation ID, returns the lightcurve data.
 
@@ -19,6 +66,18 @@ def get_data_kepler(obsid):
 
     :type obsid: str
 
+    :param xmin: The earliest time (BJD) to return, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The latest time (BJD) to return, or None for no limit.
+
+    :type xmax: float
+
+    :param workers: The maximum number of files (quarters) to read at once.
+
+    :type workers: int
+
     :returns: JSON -- The lightcurve data for this observation ID.
 
     Error codes:
@@ -49,37 +108,31 @@ def get_data_kepler(obsid):
         all_plot_yunits = ['']*2*len(parsed_files_result.files)
 
         # This error code will be used unless there's a problem reading any of
-        # the FITS files in the list.
+        # the FITS files in the list.  The files are read concurrently, since
+        # the time to open each one is mostly spent waiting on the disk.
         errcode = 0
-        for i, kfile in enumerate(parsed_files_result.files):
+        with ThreadPoolExecutor(max_workers=max(1, min(
+                workers, len(parsed_files_result.files)))) as pool:
+            file_reads = [pool.submit(_read_kepler_file, x, xmin, xmax) for
+                          x in parsed_files_result.files]
+        for i, file_read in enumerate(file_reads):
             try:
-                with fits.open(kfile) as hdulist:
-                    # Extract time stamps and relevant fluxes.
-                    bjd = [float(x) for x in
-                           (float(hdulist[1].header["BJDREFI"]) +
-                            hdulist[1].header["BJDREFF"] +
-                            hdulist[1].data["TIME"])]
-                    flux_sap = [float(x) for x in hdulist[1].data["SAP_FLUX"]]
-                    flux_pdcsap = [float(x) for x in
-                                   hdulist[1].data["PDCSAP_FLUX"]]
-
-                    # Create the plot label and plot series for the SAP and
-                    # PDCSAPfluxes.
-                    this_plot_label = ('KPLR_' + parsed_files_result.kepid +
-                                       ' ' + parsed_files_result.cadence.upper()
-                                       + ' Q' +
-                                       parsed_files_result.quarters[i])
-                    all_plot_labels[i*2] = this_plot_label + ' SAP'
-                    all_plot_series[i*2] = [x for x in
-                                            zip(bjd, flux_sap)]
-                    all_plot_xunits[i*2] = kepler_xunit
-                    all_plot_yunits[i*2] = kepler_yunit
-
-                    all_plot_labels[i*2+1] = this_plot_label + ' PDCSAP'
-                    all_plot_series[i*2+1] = [x for x in
-                                              zip(bjd, flux_pdcsap)]
-                    all_plot_xunits[i*2+1] = kepler_xunit
-                    all_plot_yunits[i*2+1] = kepler_yunit
+                bjd, flux_sap, flux_pdcsap = file_read.result()
+
+                # Create the plot label and plot series for the SAP and
+                # PDCSAPfluxes, which share the same time stamps.
+                this_plot_label = ('KPLR_' + parsed_files_result.kepid + ' ' +
+                                   parsed_files_result.cadence.upper() +
+                                   ' Q' + parsed_files_result.quarters[i])
+                all_plot_labels[i*2] = this_plot_label + ' SAP'
+                all_plot_series[i*2] = PlotSeries(bjd, flux_sap)
+                all_plot_xunits[i*2] = kepler_xunit
+                all_plot_yunits[i*2] = kepler_yunit
+
+                all_plot_labels[i*2+1] = this_plot_label + ' PDCSAP'
+                all_plot_series[i*2+1] = PlotSeries(bjd, flux_pdcsap)
+                all_plot_xunits[i*2+1] = kepler_xunit
+                all_plot_yunits[i*2+1] = kepler_yunit
 
             except IOError:
                 errcode = 6
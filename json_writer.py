@@ -0,0 +1,276 @@
+"""
+.. module:: json_writer
+
+   :synopsis: Serializes DataSeries objects into JSON a piece at a time, so
+              that serialization can stop as soon as the JSON is larger than
+              the size allowed, and so the JSON can be written out without
+              first joining it into one string.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import json
+import numpy
+from data_series import DataSeries, PlotSeries
+from precision import format_json_pairs
+
+# The number of elements of a list (e.g., the data points of a plot series)
+# that are serialized in one piece.  The size budget is checked after each
+# piece.
+ELEMENTS_PER_PIECE = 4096
+
+# The ways the plot series of a DataSeries can be written:
+#   pairs = Each plot series is a list of [x, y] pairs (the default).
+#   columns = Each plot series is {"x": [...], "y": [...]}.
+#   shared_x = Each distinct x axis is written once, in the DataSeries'
+#              "x_axes" list, and each plot series is {"x_axis": <index into
+#              x_axes>, "y": [...]}.  Lightcurves whose series share their
+#              time stamps (e.g., SAP and PDCSAP fluxes) send them only once.
+# Plot series that are not lists of data points (e.g., '' placeholders) are
+# written as they are in all formats.
+WIRE_FORMATS = ['pairs', 'columns', 'shared_x']
+WIRE_FORMAT_DEFAULT = 'pairs'
+
+#--------------------
+class JSONBudgetExceeded(Exception):
+    """
+    Raised when the JSON being serialized is larger than the size allowed.
+    """
+#--------------------
+
+#--------------------
+def json_encoder(obj):
+    """
+    Defines a method to use when serializing into JSON.
+    """
+    if isinstance(obj, PlotSeries):
+        return obj.tolist()
+    if isinstance(obj, DataSeries):
+        return obj.to_dict()
+    if isinstance(obj, numpy.ndarray):
+        return obj.tolist()
+    return obj.__dict__
+#--------------------
+
+#--------------------
+def dumps(obj):
+    """
+    Serializes an object into JSON with the options used for all returned JSON.
+
+    :param obj: The object to serialize.
+
+    :type obj: object
+
+    :returns: str -- The JSON string.
+    """
+    return json.dumps(obj, ensure_ascii=False, check_circular=False,
+                      default=json_encoder, sort_keys=True)
+#--------------------
+
+#--------------------
+def iter_json_pieces(obj):
+    """
+    Generator that serializes an object into JSON a piece at a time.  Joining
+    the pieces gives the same string as dumps(obj).  DataSeries objects are
+    serialized one key at a time, nested lists one element at a time, and
+    other lists and PlotSeries objects ELEMENTS_PER_PIECE elements at a time.
+    The numbers of PlotSeries objects with a declared precision are written
+    straight from their rounded digits.
+
+    :param obj: The object to serialize.
+
+    :type obj: object
+
+    :returns: str -- The next piece of the JSON string.
+    """
+    if isinstance(obj, DataSeries):
+        obj = obj.to_dict()
+    if isinstance(obj, dict) and obj:
+        # Matches the key order and separators of json.dumps(sort_keys=True).
+        yield '{'
+        for i, key in enumerate(sorted(obj)):
+            yield (', ' if i else '') + dumps(key) + ': '
+            for piece in iter_json_pieces(obj[key]):
+                yield piece
+        yield '}'
+    elif isinstance(obj, list) and any(isinstance(x, (list, dict, PlotSeries,
+                                                      numpy.ndarray))
+                                       for x in obj):
+        yield '['
+        for i, value in enumerate(obj):
+            if i:
+                yield ', '
+            for piece in iter_json_pieces(value):
+                yield piece
+        yield ']'
+    elif isinstance(obj, PlotSeries) and obj.has_precision:
+        # The [x, y] pairs are written from the rounded digits, one slice at a
+        # time, instead of rounding each value and then repr() of the result.
+        yield '['
+        for i in range(0, len(obj), ELEMENTS_PER_PIECE):
+            yield ((', ' if i else '') + format_json_pairs(
+                obj.raw_x[i:i+ELEMENTS_PER_PIECE],
+                obj.raw_y[i:i+ELEMENTS_PER_PIECE], obj.x_precision,
+                obj.y_precision))
+        yield ']'
+    elif isinstance(obj, PlotSeries) and len(obj) > ELEMENTS_PER_PIECE:
+        # The [x, y] pairs are only made for one slice at a time.
+        yield '['
+        for i in range(0, len(obj), ELEMENTS_PER_PIECE):
+            yield ((', ' if i else '') +
+                   dumps(obj.tolist(i, i+ELEMENTS_PER_PIECE))[1:-1])
+        yield ']'
+    elif (isinstance(obj, (list, numpy.ndarray)) and
+          len(obj) > ELEMENTS_PER_PIECE):
+        # Each slice is serialized as a list, without its square brackets.
+        yield '['
+        for i in range(0, len(obj), ELEMENTS_PER_PIECE):
+            yield ((', ' if i else '') +
+                   dumps(obj[i:i+ELEMENTS_PER_PIECE])[1:-1])
+        yield ']'
+    else:
+        yield dumps(obj)
+#--------------------
+
+#--------------------
+def get_columns(plot_series):
+    """
+    Returns the x and y values of a plot series, or None if it is not a list
+    of data points.
+    """
+    if isinstance(plot_series, PlotSeries):
+        return plot_series.x, plot_series.y
+    if isinstance(plot_series, list) and all(
+            isinstance(x, (list, tuple)) and len(x) == 2 for x in plot_series):
+        return [x[0] for x in plot_series], [x[1] for x in plot_series]
+    return None
+#--------------------
+
+#--------------------
+def find_x_axis(x_axes, x_values):
+    """
+    Returns the index of an x axis equal to the given x values, adding them as
+    a new x axis if there is not one.
+    """
+    for i, x_axis in enumerate(x_axes):
+        if x_axis is x_values:
+            return i
+        if (isinstance(x_axis, numpy.ndarray) and
+                isinstance(x_values, numpy.ndarray) and
+                numpy.array_equal(x_axis, x_values, equal_nan=True)):
+            return i
+        if (isinstance(x_axis, list) and isinstance(x_values, list) and
+                x_axis == x_values):
+            return i
+    x_axes.append(x_values)
+    return len(x_axes) - 1
+#--------------------
+
+#--------------------
+def to_wire_format(data_series, wire_format=WIRE_FORMAT_DEFAULT):
+    """
+    Converts a DataSeries object into what is serialized for a wire format.
+
+    :param data_series: The DataSeries object to convert.
+
+    :type data_series: DataSeries
+
+    :param wire_format: One of WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :returns: DataSeries or dict -- The DataSeries itself for the "pairs"
+    format, otherwise a dict of its attributes with the plot series converted.
+    """
+    if wire_format == 'pairs':
+        return data_series
+    obj = data_series.to_dict()
+    x_axes = []
+    plot_series = []
+    for series in obj['plot_series']:
+        columns = get_columns(series)
+        if columns is None:
+            plot_series.append(series)
+        elif wire_format == 'columns':
+            plot_series.append({'x':columns[0], 'y':columns[1]})
+        else:
+            plot_series.append({'x_axis':find_x_axis(x_axes, columns[0]),
+                                'y':columns[1]})
+    obj['plot_series'] = plot_series
+    if wire_format == 'shared_x':
+        obj['x_axes'] = x_axes
+    return obj
+#--------------------
+
+#--------------------
+def encode_data_series(data_series, budget=None):
+    """
+    Serializes a DataSeries object into JSON, stopping as soon as the JSON is
+    longer than the budget.
+
+    :param data_series: The DataSeries object to serialize.
+
+    :type data_series: DataSeries
+
+    :param budget: The maximum length of the JSON string, or None for no limit.
+
+    :type budget: float
+
+    :returns: str -- The JSON string, the same as dumps(data_series).
+
+    :raises: JSONBudgetExceeded if the JSON string is longer than the budget.
+    """
+    if budget is None:
+        return ''.join(iter_json_pieces(data_series))
+    pieces = []
+    length = 0
+    for piece in iter_json_pieces(data_series):
+        length += len(piece)
+        if length > budget:
+            raise JSONBudgetExceeded("JSON is longer than " + str(budget) +
+                                     " characters.")
+        pieces.append(piece)
+    return ''.join(pieces)
+#--------------------
+
+#--------------------
+def join_fragments(fragments):
+    """
+    Returns the pieces of a JSON list made of already serialized elements.
+    Joining the pieces gives the same string as serializing the list of the
+    original objects.
+
+    :param fragments: The JSON string of each element of the list.
+
+    :type fragments: list
+
+    :returns: list -- The pieces of the JSON list.
+    """
+    pieces = ['[']
+    for i, fragment in enumerate(fragments):
+        if i:
+            pieces.append(', ')
+        pieces.append(fragment)
+    pieces.append(']')
+    return pieces
+#--------------------
+
+#--------------------
+def write_json_pieces(ofile, pieces):
+    """
+    Writes the pieces of a JSON string to a file or stream, without joining
+    them into one string first.
+
+    :param ofile: The file or stream to write to.
+
+    :type ofile: file
+
+    :param pieces: The pieces of the JSON string.
+
+    :type pieces: list
+
+    :returns: int -- The number of characters written.
+    """
+    ofile.writelines(pieces)
+    return sum(len(x) for x in pieces)
+#--------------------
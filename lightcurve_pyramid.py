@@ -0,0 +1,494 @@
+"""
+.. module:: lightcurve_pyramid
+
+   :synopsis: Precomputed levels of detail of the data of an observation, so
+              that a plot can first load a coarse version of a long
+              lightcurve, then load more detail for just the time range it is
+              zoomed into.
+
+              Level 0 of a plot series is every data point.  Level k (k >= 1)
+              splits the data points into bins of 2**(k+1) consecutive points
+              and keeps the lowest and highest point of each bin (its min/max
+              envelope), so it has at most 1/2**k as many points and still
+              shows every peak and dip.  Every level is a subset of the
+              original data points, so the values returned are exactly those
+              of the full data.
+
+              The pyramid of an observation is one .npz file in the pyramid
+              directory (by default the Kepler cache directory), holding the
+              x and y values of each level of each plot series as separate
+              arrays, so that a request only reads the level it asks for.
+              Level 0 is the plot series as read, including any points with
+              non-finite values; the other levels are made from the finite
+              points only, since only those can be plotted.  A pyramid is
+              checked against the source files it was made from, like a
+              response cache entry, and is rebuilt when any of them changes.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import numpy
+from data_series import DataSeries, PlotSeries
+from data_window import XMAX_DEFAULT, XMIN_DEFAULT, window_slice
+from deliver_data import (CACHE_DIR_DEFAULT, FILTERS_DEFAULT, MAX_JSON_SIZE,
+                          TARGET_DEFAULT, URLS_DEFAULT, check_window,
+                          json_too_big_object, serialize_data_series,
+                          sort_requests)
+from json_writer import (WIRE_FORMAT_DEFAULT, WIRE_FORMATS,
+                         JSONBudgetExceeded, join_fragments)
+from mission_registry import get_data_series, get_reader_args
+from precision import Precision
+from response_cache import (RESPONSE_CACHE_VERSION, is_entry_fresh,
+                            stat_request_sources, write_atomically)
+
+# Default directory of the pyramid files, next to the Kepler cache files.
+PYRAMID_DIR_DEFAULT = CACHE_DIR_DEFAULT
+
+# File name extension of pyramid files.
+PYRAMID_EXTENSION = ".pyramid.npz"
+
+# The level returned when none is requested: every data point.
+LEVEL_DEFAULT = 0
+
+# The version of the layout of pyramid files.  This must be increased
+# whenever the arrays stored in them change, so that files written by older
+# code are rebuilt.
+PYRAMID_VERSION = 2
+
+#--------------------
+def get_pyramid_file(pyramid_dir, mission, obsid, filt=' ', url=' ',
+                     targ=' '):
+    """
+    Returns the path of the pyramid file of an observation.  The file is
+    named after the mission and a hash of the arguments passed to that
+    mission's reader (like response_cache.get_cache_key()), so requests that
+    differ only in, e.g., the FILTER of an IUE obsID or the URL of a GALEX
+    obsID have different files, while request values a mission does not use
+    do not change the name.
+
+    :param pyramid_dir: Directory containing the pyramid files.
+
+    :type pyramid_dir: str
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :returns: str -- The path of the pyramid file.
+    """
+    key = hashlib.sha256(json.dumps([mission] + get_reader_args(
+        mission, obsid, filt, url, targ)).encode('utf-8')).hexdigest()
+    return os.path.join(pyramid_dir, mission + '_' + key + PYRAMID_EXTENSION)
+#--------------------
+
+#--------------------
+def envelope_indices(y, bin_size):
+    """
+    Finds the lowest and highest point of each bin of consecutive points.
+
+    :param y: The y values of the data points.
+
+    :type y: numpy.ndarray
+
+    :param bin_size: The number of points in each bin (the last bin may have
+    fewer).
+
+    :type bin_size: int
+
+    :returns: numpy.ndarray -- The indexes of the points kept, in increasing
+    order.
+    """
+    n_points = len(y)
+    n_full = n_points // bin_size
+    full_bins = y[:n_full*bin_size].reshape(n_full, bin_size)
+    offsets = numpy.arange(n_full) * bin_size
+    indices = [offsets + numpy.argmin(full_bins, axis=1),
+               offsets + numpy.argmax(full_bins, axis=1)]
+    if n_points > n_full * bin_size:
+        last_bin = y[n_full*bin_size:]
+        indices.append(n_full * bin_size + numpy.array(
+            [numpy.argmin(last_bin), numpy.argmax(last_bin)]))
+    return numpy.unique(numpy.concatenate(indices))
+#--------------------
+
+#--------------------
+def count_levels(n_points):
+    """
+    Returns the number of levels of a plot series: level 0, and the levels
+    until one has at most two points.
+
+    :param n_points: The number of (finite) data points.
+
+    :type n_points: int
+
+    :returns: int -- The number of levels.
+    """
+    n_levels = 1
+    while 2**n_levels < n_points:
+        n_levels += 1
+    return n_levels
+#--------------------
+
+#--------------------
+def _precision_to_json(precision):
+    """
+    Returns a precision as something that can be written as JSON.
+    """
+    return None if precision is None else list(precision)
+#--------------------
+
+#--------------------
+def _precision_from_json(value):
+    """
+    Returns a precision written by _precision_to_json().
+    """
+    return None if value is None else Precision(*value)
+#--------------------
+
+#--------------------
+def encode_pyramid(all_data_series, sources):
+    """
+    Builds the pyramid of a list of DataSeries objects, as the contents of a
+    .npz file.
+
+    :param all_data_series: The DataSeries objects.
+
+    :type all_data_series: list
+
+    :param sources: The source files the data were read from, as returned by
+    response_cache.stat_source_files().
+
+    :type sources: list
+
+    :returns: bytes -- The contents of the .npz file.
+    """
+    arrays = {}
+    header_series = []
+    for i, data_series in enumerate(all_data_series):
+        obj = data_series.to_dict()
+        plot_series = []
+        for j, series in enumerate(obj['plot_series']):
+            if not isinstance(series, PlotSeries):
+                plot_series.append({'values':series})
+                continue
+            name = str(i) + '_' + str(j)
+            arrays['x0_' + name] = series.raw_x
+            arrays['y0_' + name] = series.raw_y
+            # Points with a non-finite value can not be plotted, so the
+            # coarser levels are made from the others.
+            finite = (numpy.isfinite(series.raw_x) &
+                      numpy.isfinite(series.raw_y))
+            x = series.raw_x[finite]
+            y = series.raw_y[finite]
+            n_levels = count_levels(len(x))
+            for level in range(1, n_levels):
+                indices = envelope_indices(y, 2**(level+1))
+                arrays['x' + str(level) + '_' + name] = x[indices]
+                arrays['y' + str(level) + '_' + name] = y[indices]
+            plot_series.append({
+                'name':name, 'n_levels':n_levels,
+                'x_precision':_precision_to_json(series.x_precision),
+                'y_precision':_precision_to_json(series.y_precision)})
+        obj['plot_series'] = plot_series
+        header_series.append(obj)
+    header = {'version':RESPONSE_CACHE_VERSION,
+              'pyramid_version':PYRAMID_VERSION, 'sources':sources,
+              'created':time.time(), 'data_series':header_series}
+    arrays['header'] = numpy.frombuffer(json.dumps(header).encode('utf-8'),
+                                        dtype=numpy.uint8)
+    ofile = io.BytesIO()
+    numpy.savez(ofile, **arrays)
+    return ofile.getvalue()
+#--------------------
+
+#--------------------
+def _open_pyramid(pyramid):
+    """
+    Opens a pyramid, the path of a pyramid file or the contents of one, as an
+    NpzFile, whose arrays are only read when they are used.
+    """
+    if isinstance(pyramid, bytes):
+        pyramid = io.BytesIO(pyramid)
+    return numpy.load(pyramid)
+#--------------------
+
+#--------------------
+def _read_header(npz_file):
+    """
+    Reads the header of an open pyramid.
+    """
+    return json.loads(npz_file['header'].tobytes().decode('utf-8'))
+#--------------------
+
+#--------------------
+def read_pyramid(pyramid_file):
+    """
+    Reads the header of a pyramid file, if it is still up to date with its
+    source files.  None of the levels are read.
+
+    :param pyramid_file: The pyramid file.
+
+    :type pyramid_file: str
+
+    :returns: dict or None -- The header of the pyramid, or None if there is
+    no usable pyramid file.
+    """
+    try:
+        with _open_pyramid(pyramid_file) as npz_file:
+            header = _read_header(npz_file)
+    except (OSError, ValueError, KeyError):
+        return None
+    if (header.get('pyramid_version') != PYRAMID_VERSION or
+            not header.get('sources') or not is_entry_fresh(header)):
+        return None
+    return header
+#--------------------
+
+#--------------------
+def load_pyramid(mission, obsid, filt=' ', url=' ', targ=' ',
+                 pyramid_dir=PYRAMID_DIR_DEFAULT):
+    """
+    Returns the pyramid of an observation, building it (and writing it to the
+    pyramid directory) if there is no up to date pyramid file.  Pyramids are
+    only written for data read without errors from local source files that
+    did not change while they were read.
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :param pyramid_dir: Directory containing the pyramid files.
+
+    :type pyramid_dir: str
+
+    :returns: str or bytes -- The path of the pyramid file, or the contents
+    of the pyramid if it was not written, to pass to get_level().
+    """
+    pyramid_file = get_pyramid_file(pyramid_dir, mission, obsid, filt, url,
+                                    targ)
+    if read_pyramid(pyramid_file) is not None:
+        return pyramid_file
+    # The source files are stat'ed before they are read, so that a pyramid
+    # is never written for files that changed while being read.
+    sources = stat_request_sources(mission, obsid, filt, url, targ)
+    data_series = get_data_series(mission, obsid, filt, url, targ)
+    # Some IUE obsIDs (those that are double-aperture) return already as a
+    # list of DataSeries.
+    if not isinstance(data_series, list):
+        data_series = [data_series]
+    data = encode_pyramid(data_series, sources or [])
+    if (sources and all(x.errcode == 0 for x in data_series) and
+            stat_request_sources(mission, obsid, filt, url, targ) == sources):
+        try:
+            write_atomically(pyramid_file, data)
+            return pyramid_file
+        except OSError:
+            # The data are still returned if the pyramid can't be written.
+            pass
+    return data
+#--------------------
+
+#--------------------
+def get_level(pyramid, level=LEVEL_DEFAULT, xmin=XMIN_DEFAULT,
+              xmax=XMAX_DEFAULT):
+    """
+    Returns one level of a pyramid, over a range of x values, as DataSeries
+    objects.  Only the arrays of that level are read.
+
+    :param pyramid: The pyramid, as returned by load_pyramid().
+
+    :type pyramid: str or bytes
+
+    :param level: The level to return.  Plot series with fewer levels return
+    their coarsest level.
+
+    :type level: int
+
+    :param xmin: The smallest x value to return, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The largest x value to return, or None for no limit.
+
+    :type xmax: float
+
+    :returns: list -- The DataSeries objects.
+    """
+    all_data_series = []
+    with _open_pyramid(pyramid) as npz_file:
+        header = _read_header(npz_file)
+        for obj in header['data_series']:
+            plot_series = []
+            for series in obj['plot_series']:
+                if 'values' in series:
+                    plot_series.append(series['values'])
+                    continue
+                name = (str(min(level, series['n_levels'] - 1)) + '_' +
+                        series['name'])
+                x = npz_file['x' + name]
+                y = npz_file['y' + name]
+                in_window = window_slice(x, xmin, xmax)
+                plot_series.append(PlotSeries(
+                    x[in_window], y[in_window],
+                    _precision_from_json(series['x_precision']),
+                    _precision_from_json(series['y_precision'])))
+            all_data_series.append(DataSeries(
+                obj['mission'], obj['obsid'], plot_series,
+                obj['plot_labels'], obj['xunits'], obj['yunits'],
+                obj['errcode'], obj.get('is_ancillary')))
+    return all_data_series
+#--------------------
+
+#--------------------
+def deliver_level(missions, obsids, level=LEVEL_DEFAULT, xmin=XMIN_DEFAULT,
+                  xmax=XMAX_DEFAULT, filters=FILTERS_DEFAULT,
+                  urls=URLS_DEFAULT, targets=TARGET_DEFAULT,
+                  pyramid_dir=PYRAMID_DIR_DEFAULT,
+                  wire_format=WIRE_FORMAT_DEFAULT):
+    """
+    Same as deliver_data(), but returns one level of detail of the data, over
+    a range of x values (e.g., the time range a plot is zoomed into).
+
+    :param level: The level of detail: 0 for every data point, and each level
+    above that with about half as many points.
+
+    :type level: int
+
+    :param xmin: The smallest x value to return, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The largest x value to return, or None for no limit.
+
+    :type xmax: float
+
+    :param pyramid_dir: Directory containing the pyramid files.
+
+    :type pyramid_dir: str
+
+    See deliver_data() for the other parameters.
+
+    :returns: JSON -- The data at the requested level of detail.
+
+    :raises: IOError if the request is not valid.
+    """
+    missions, obsids, filters, urls, targets = sort_requests(
+        missions, obsids, filters, urls, targets)
+    if not isinstance(level, int) or level < 0:
+        raise IOError("'level' must be an integer of at least 0.")
+    check_window(xmin, xmax)
+    if wire_format not in WIRE_FORMATS:
+        raise IOError("Wire format '" + str(wire_format) + "' is not"
+                      " supported.")
+
+    fragments = []
+    used_length = 0
+    try:
+        for pair in zip(missions, obsids, filters, urls, targets):
+            pair_fragments = serialize_data_series(
+                get_level(load_pyramid(*pair, pyramid_dir=pyramid_dir),
+                          level, xmin, xmax),
+                MAX_JSON_SIZE - 2 - used_length, wire_format)
+            used_length += sum(len(x) + 2 for x in pair_fragments)
+            fragments.extend(pair_fragments)
+    except JSONBudgetExceeded:
+        return json_too_big_object(', '.join(missions), ', '.join(obsids))
+    json_string = ''.join(join_fragments(fragments))
+    if len(json_string) <= MAX_JSON_SIZE:
+        return json_string
+    return json_too_big_object(', '.join(missions), ', '.join(obsids))
+#--------------------
+
+#--------------------
+def setup_args():
+    """
+    Set up command-line arguments and options.
+
+    :returns: ArgumentParser -- Stores arguments and options.
+    """
+    parser = argparse.ArgumentParser(description="Builds the level-of-detail"
+                                     " pyramid of each observation if it is"
+                                     " not up to date, and delivers one level"
+                                     " of it as a JSON.")
+
+    parser.add_argument("-m" "--missions", action="store", dest="missions",
+                        type=str.lower, nargs='+', help="Required: The"
+                        " mission(s) where this data comes from.  There must"
+                        " be the same number of 'obsid' values.")
+
+    parser.add_argument("-o", "--obsids", action="store", dest="obsids",
+                        type=str, nargs='+', help="[Required] The observation"
+                        " ID(s) to retrieve data from.  There must be the same"
+                        " number of 'missions' values.")
+
+    parser.add_argument("-l", "--level", action="store", dest="level",
+                        type=int, default=LEVEL_DEFAULT, help="The level of"
+                        " detail: 0 for every data point, and each level above"
+                        " that with about half as many points.  Default = " +
+                        str(LEVEL_DEFAULT) + ".")
+
+    parser.add_argument("--xmin", action="store", dest="xmin", type=float,
+                        default=XMIN_DEFAULT, help="The smallest x value"
+                        " (e.g., time) to return.")
+
+    parser.add_argument("--xmax", action="store", dest="xmax", type=float,
+                        default=XMAX_DEFAULT, help="The largest x value"
+                        " (e.g., time) to return.")
+
+    parser.add_argument("--pdir", action="store", dest="pyramid_dir",
+                        type=str, default=PYRAMID_DIR_DEFAULT, help="Location"
+                        " of the pyramid files.  Default is the location of"
+                        " the Kepler cache files.")
+
+    return parser
+#--------------------
+
+#--------------------
+if __name__ == "__main__":
+
+    # Setup command-line arguments.
+    ARGS = setup_args().parse_args()
+
+    sys.stdout.write(deliver_level(ARGS.missions, ARGS.obsids, ARGS.level,
+                                   ARGS.xmin, ARGS.xmax,
+                                   pyramid_dir=ARGS.pyramid_dir) + '\n')
+#--------------------
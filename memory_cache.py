@@ -0,0 +1,221 @@
+"""
+.. module:: memory_cache
+
+   :synopsis: In-memory cache of the JSON for each mission + obsid pair, for
+              long-running processes that see the same requests many times.
+              The cache is bounded by the number of bytes it holds, and evicts
+              the least recently used entries first.  Entries are checked
+              against their source files like those of the response cache,
+              so they are no longer used once a file changes.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import collections
+import sys
+import threading
+import time
+from downsample import MAX_POINTS_DEFAULT
+from json_writer import WIRE_FORMAT_DEFAULT
+from mission_registry import get_reader_args
+from response_cache import (REMOTE_MAX_AGE_DEFAULT, RESPONSE_CACHE_VERSION,
+                            is_entry_fresh)
+
+# The cache used by this process, or None if caching in memory is disabled.
+_MEMORY_CACHE = None
+
+#--------------------
+class ByteLRUCache(object):
+    """
+    Least-recently-used cache bounded by the total size of its values, which
+    are lists of strings.  Hits, misses and evictions are counted so the cache
+    can be sized against real traffic.  A value may be stored with the source
+    files it was read from, and is then only returned while it is fresh (see
+    response_cache.is_entry_fresh()).
+    """
+
+    def __init__(self, max_bytes, max_age=REMOTE_MAX_AGE_DEFAULT):
+        """
+        :param max_bytes: The maximum total size of the cached values, in
+        bytes.  A value larger than this is never cached.
+
+        :type max_bytes: int
+
+        :param max_age: The number of seconds a value stored with no source
+        files (the data of a remote service) is used for.
+
+        :type max_age: float
+        """
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_size(value):
+        """
+        Returns the size of a value, in bytes.
+
+        :param value: The strings to measure.
+
+        :type value: list
+
+        :returns: int -- The size of the list and the strings in it.
+        """
+        return sys.getsizeof(value) + sum(sys.getsizeof(x) for x in value)
+
+    def get(self, key):
+        """
+        Returns the value for a key, marking it as the most recently used.  A
+        value that is no longer fresh is removed.
+
+        :param key: The key to look up.
+
+        :type key: tuple
+
+        :returns: list or None -- The cached value, or None if it is not
+        cached or is no longer fresh.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        # The source files are stat'ed without holding the lock.
+        if (entry is not None and entry[2] is not None and
+                not is_entry_fresh(entry[2], self.max_age)):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                    self.n_bytes -= entry[1]
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, sources=None):
+        """
+        Adds or replaces the value for a key, then evicts the least recently
+        used entries until the cache is within its size.
+
+        :param key: The key to store the value under.
+
+        :type key: tuple
+
+        :param value: The strings to cache.
+
+        :type value: list
+
+        :param sources: The source files of the value as stat'ed before it
+        was read, as returned by response_cache.stat_request_sources(), or
+        None for a value that is always fresh.
+
+        :type sources: list
+        """
+        size = self.get_size(value)
+        if size > self.max_bytes:
+            return
+        meta = (None if sources is None else
+                {'version':RESPONSE_CACHE_VERSION, 'sources':sources,
+                 'created':time.time()})
+        with self._lock:
+            if key in self._entries:
+                self.n_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size, meta)
+            self.n_bytes += size
+            while self.n_bytes > self.max_bytes:
+                self.n_bytes -= self._entries.popitem(last=False)[1][1]
+                self.evictions += 1
+
+    def stats(self):
+        """
+        Returns the counters and current size of the cache.
+
+        :returns: dict -- The number of hits, misses, evictions, entries and
+        bytes held, and the maximum number of bytes.
+        """
+        with self._lock:
+            return {'hits':self.hits, 'misses':self.misses,
+                    'evictions':self.evictions, 'entries':len(self._entries),
+                    'bytes':self.n_bytes, 'max_bytes':self.max_bytes}
+#--------------------
+
+#--------------------
+def configure_memory_cache(max_bytes):
+    """
+    Turns on caching in memory for this process, replacing any existing cache.
+
+    :param max_bytes: The maximum total size of the cache, in bytes.  If None
+    or zero, caching in memory is turned off.
+
+    :type max_bytes: int
+    """
+    global _MEMORY_CACHE
+    _MEMORY_CACHE = ByteLRUCache(max_bytes) if max_bytes else None
+#--------------------
+
+#--------------------
+def get_memory_cache():
+    """
+    Returns the cache used by this process.
+
+    :returns: ByteLRUCache or None -- The cache, or None if caching in memory
+    is turned off.
+    """
+    return _MEMORY_CACHE
+#--------------------
+
+#--------------------
+def get_memory_cache_key(mission, obsid, filt=' ', url=' ', targ=' ',
+                         wire_format=WIRE_FORMAT_DEFAULT,
+                         max_points=MAX_POINTS_DEFAULT):
+    """
+    Returns the key of the cache entry for a mission + obsid pair, which is the
+    mission, the arguments passed to that mission's reader, and the wire format
+    and maximum number of data points (if not the defaults).
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :param wire_format: The wire format of the JSON, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :param max_points: The maximum number of data points per plot series of
+    the JSON, or None for no limit.
+
+    :type max_points: int
+
+    :returns: tuple -- The key.
+    """
+    key_values = [mission] + get_reader_args(mission, obsid, filt, url, targ)
+    if wire_format != WIRE_FORMAT_DEFAULT:
+        key_values.append(wire_format)
+    if max_points != MAX_POINTS_DEFAULT:
+        key_values.append(max_points)
+    return tuple(key_values)
+#--------------------
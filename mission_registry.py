@@ -0,0 +1,238 @@
+"""
+.. module:: mission_registry
+
+   :synopsis: Maps each supported mission to the module that reads its data,
+              importing that module only when the mission is first requested.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import collections
+import importlib
+from data_window import XMAX_DEFAULT, XMIN_DEFAULT, window_data_series
+
+#--------------------
+# Defines where the reader for a mission lives, which of the request values are
+# passed to it (in order), whether it is I/O-bound (it spends its time waiting
+# on a remote service) rather than CPU-bound, and whether it takes 'xmin' and
+# 'xmax' keyword arguments to only read a range of x values (the data of other
+# readers are restricted to the range after they are read).  The reader
+# function always has the same name as its module.  Allowed argument names
+# are:
+#   obsid = The observation ID, as given.
+#   obsid_lower = The observation ID, converted to lower case.
+#   filt = The FILTER value for the observation ID.
+#   url = The preview URL for the observation ID (whitespace stripped).
+#   targ = The target name for the observation ID.
+#   filt_upper = The FILTER value converted to upper case ("UNKNOWN" if blank).
+MissionReader = collections.namedtuple('MissionReader', ['module', 'args',
+                                                       'io_bound', 'windowed'],
+                                       defaults=(False,))
+
+MISSION_READERS = {
+    'befs':MissionReader('mpl_get_data_befs', ('obsid',), True),
+    'euve':MissionReader('mpl_get_data_euve', ('obsid',), True),
+    'fuse':MissionReader('mpl_get_data_fuse', ('obsid',), True),
+    'galex':MissionReader('get_data_galex', ('obsid', 'filt', 'url'), False),
+    'hlsp_everest':MissionReader('get_data_hlsp_everest', ('obsid',), False),
+    'hlsp_k2gap':MissionReader('get_data_hlsp_k2gap', ('obsid',), False),
+    'hlsp_kegs':MissionReader('get_data_hlsp_kegs', ('obsid',), False),
+    'hlsp_polar':MissionReader('get_data_hlsp_polar', ('obsid',), False),
+    'hlsp_k2sc':MissionReader('get_data_hlsp_k2sc', ('obsid',), False),
+    'hlsp_k2sff':MissionReader('get_data_hlsp_k2sff', ('obsid',), False),
+    'hlsp_k2varcat':MissionReader('get_data_hlsp_k2varcat', ('obsid',), False),
+    'hsc_grism':MissionReader('get_data_hsc_grism', ('obsid',), False),
+    'hsla':MissionReader('get_data_hsla', ('obsid', 'targ'), False),
+    'hst':MissionReader('mpl_get_data_hst', ('obsid',), True),
+    'hut':MissionReader('mpl_get_data_hut', ('obsid',), True),
+    'iue':MissionReader('get_data_iue', ('obsid_lower', 'filt'), False),
+    'k2':MissionReader('get_data_k2', ('obsid',), False, True),
+    'kepler':MissionReader('get_data_kepler', ('obsid',), False, True),
+    'states':MissionReader('get_data_states', ('obsid',), False),
+    'tues':MissionReader('mpl_get_data_tues', ('obsid',), True),
+    'wuppe':MissionReader('mpl_get_data_wuppe', ('obsid',), True)}
+
+# Defines where the obsID parser for a mission lives and which of the request
+# values are passed to it (in order), using the same argument names as above.
+# Only missions whose data are read from local files have a parser.  The parser
+# function always has the same name as its module.
+MissionParser = collections.namedtuple('MissionParser', ['module', 'args'])
+
+MISSION_PARSERS = {
+    'galex':MissionParser('parse_obsid_galex', ('obsid', 'url')),
+    'hlsp_everest':MissionParser('parse_obsid_hlsp_everest', ('obsid',)),
+    'hlsp_k2gap':MissionParser('parse_obsid_hlsp_k2gap', ('obsid',)),
+    'hlsp_kegs':MissionParser('parse_obsid_hlsp_kegs', ('obsid',)),
+    'hlsp_polar':MissionParser('parse_obsid_hlsp_polar', ('obsid',)),
+    'hlsp_k2sc':MissionParser('parse_obsid_hlsp_k2sc', ('obsid',)),
+    'hlsp_k2sff':MissionParser('parse_obsid_hlsp_k2sff', ('obsid',)),
+    'hlsp_k2varcat':MissionParser('parse_obsid_hlsp_k2varcat', ('obsid',)),
+    'hsc_grism':MissionParser('parse_obsid_hsc_grism', ('obsid',)),
+    'hsla':MissionParser('parse_obsid_hsla', ('obsid', 'targ')),
+    'iue':MissionParser('parse_obsid_iue', ('obsid_lower', 'filt_upper')),
+    'k2':MissionParser('parse_obsid_k2', ('obsid',)),
+    'kepler':MissionParser('parse_obsid_kepler', ('obsid',)),
+    'states':MissionParser('parse_obsid_states', ('obsid',))}
+
+# Reader functions that have already been imported, keyed by mission.
+_LOADED_READERS = {}
+#--------------------
+
+#--------------------
+def get_reader(mission):
+    """
+    Returns the function that reads data for a given mission, importing its
+    module the first time the mission is requested.
+
+    :param mission: The mission to get the reader function for.
+
+    :type mission: str
+
+    :returns: function -- The reader function for this mission.
+
+    :raises: ValueError if the mission is not supported.
+    """
+    if mission not in _LOADED_READERS:
+        if mission not in MISSION_READERS:
+            raise ValueError("Mission '" + str(mission) + "' is not supported.")
+        module_name = MISSION_READERS[mission].module
+        module = importlib.import_module(module_name)
+        _LOADED_READERS[mission] = getattr(module, module_name)
+    return _LOADED_READERS[mission]
+#--------------------
+
+#--------------------
+def _get_request_values(obsid, filt, url, targ):
+    """
+    Returns the value of each allowed reader and parser argument name for a
+    request.
+    """
+    return {'obsid':obsid, 'obsid_lower':obsid.lower(), 'filt':filt,
+            'url':url.strip(), 'targ':targ,
+            'filt_upper':"UNKNOWN" if filt == ' ' else filt.upper()}
+#--------------------
+
+#--------------------
+def get_reader_args(mission, obsid, filt=' ', url=' ', targ=' '):
+    """
+    Returns the arguments that are passed to a mission's reader for a request.
+    Two requests with the same arguments return the same data.
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :returns: list -- The arguments for the reader, in order.
+
+    :raises: ValueError if the mission is not supported.
+    """
+    if mission not in MISSION_READERS:
+        raise ValueError("Mission '" + str(mission) + "' is not supported.")
+    request_values = _get_request_values(obsid, filt, url, targ)
+    return [request_values[x] for x in MISSION_READERS[mission].args]
+#--------------------
+
+#--------------------
+def get_source_files(mission, obsid, filt=' ', url=' ', targ=' '):
+    """
+    Returns the local files that a mission's reader reads for a request, as
+    found by that mission's obsID parser.
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :returns: list -- The paths of the files, or an empty list if the mission
+    reads its data from a remote service.
+    """
+    if mission not in MISSION_PARSERS:
+        return []
+    module_name = MISSION_PARSERS[mission].module
+    parser = getattr(importlib.import_module(module_name), module_name)
+    request_values = _get_request_values(obsid, filt, url, targ)
+    parsed_result = parser(*[request_values[x] for x in
+                             MISSION_PARSERS[mission].args])
+    if hasattr(parsed_result, 'files'):
+        files = parsed_result.files
+    else:
+        files = parsed_result.specfiles
+    return [x for x in files if x]
+#--------------------
+
+#--------------------
+def get_data_series(mission, obsid, filt=' ', url=' ', targ=' ',
+                    xmin=XMIN_DEFAULT, xmax=XMAX_DEFAULT):
+    """
+    Reads the data for a single mission + obsid pair using that mission's
+    reader, restricted to a range of x values.
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :param xmin: The smallest x value to return, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The largest x value to return, or None for no limit.
+
+    :type xmax: float
+
+    :returns: DataSeries or list -- The DataSeries object(s) from the reader.
+    """
+    reader = get_reader(mission)
+    reader_args = get_reader_args(mission, obsid, filt, url, targ)
+    if xmin is None and xmax is None:
+        return reader(*reader_args)
+    if MISSION_READERS[mission].windowed:
+        return reader(*reader_args, xmin=xmin, xmax=xmax)
+    return window_data_series(reader(*reader_args), xmin, xmax)
+#--------------------
@@ -10,6 +10,7 @@
 import collections
 from operator import itemgetter
 from data_series import DataSeries
+from precision import round_significant
 import requests
 
 #--------------------
@@ -61,7 +62,7 @@ def mpl_get_data_euve(obsid):
             wls = [float(x) for x in return_request[0][0]]
 
             # Fluxes are the second list in the returned 3-element list.
-            fls = [float("{0:.8e}".format(x)) for x in return_request[1][0]]
+            fls = round_significant(return_request[1][0]).tolist()
 
             # This error code will be used unless there's a problem reading any
             # of the FITS files in the list.
@@ -7,9 +7,9 @@
 .. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
 """
 
-import collections
 from operator import itemgetter
-from data_series import DataSeries
+from data_series import DataSeries, PlotSeries
+from precision import DECIMALS_8, SIGNIFICANT_9, round_decimals
 import requests
 
 #--------------------
@@ -31,9 +31,6 @@ def mpl_get_data_hst(obsid):
     4 = Wavelength and flux arrays are not of equal length.
     """
 
-    # This defines a data point for a DataSeries object as a namedtuple.
-    data_point = collections.namedtuple('DataPoint', ['x', 'y'])
-
     # For HST, this defines the x-axis and y-axis units as a string.
     hst_xunit = "Angstroms"
     hst_yunit = "ergs/cm^2/s/Angstrom"
@@ -58,10 +55,10 @@ def mpl_get_data_hst(obsid):
                                            errcode)
         else:
             # Wavelengths are the first list in the returned 3-element list.
-            wls = [float("{0:.8f}".format(x)) for x in return_request[0][0]]
+            wls = round_decimals(return_request[0][0]).tolist()
 
             # Fluxes are the second list in the returned 3-element list.
-            fls = [float("{0:.8e}".format(x)) for x in return_request[1][0]]
+            fls = return_request[1][0]
 
             # This error code will be used unless there's a problem reading any
             # of the FITS files in the list.
@@ -77,9 +74,10 @@ def mpl_get_data_hst(obsid):
                 wls = [wls[x] for x in sort_indexes]
                 fls = [fls[x] for x in sort_indexes]
 
-                # Zip the wavelengths and fluxes into tuples to create the plot
-                # series.
-                plot_series = [[data_point(x=x, y=y) for x, y in zip(wls, fls)]]
+                # Create the plot series.  The fluxes are written with 9
+                # significant digits (the wavelengths are already rounded).
+                plot_series = [PlotSeries(wls, fls, DECIMALS_8,
+                                          SIGNIFICANT_9)]
 
                 # Create the return DataSeries object.
                 return_dataseries = DataSeries('hst', obsid, plot_series,
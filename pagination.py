@@ -0,0 +1,390 @@
+"""
+.. module:: pagination
+
+   :synopsis: Delivers the data of a request a page at a time, for requests
+              whose JSON would be larger than deliver_data.MAX_JSON_SIZE.
+              Each page is a JSON object whose "data" is the same list of
+              DataSeries that deliver_data() returns, with the labels, units,
+              etc. of every DataSeries but only some of the data points:
+              appending the points of each plot series over all the pages
+              gives the plot series deliver_data() returns.  Its
+              "next_token" is an opaque token to request the next page with,
+              or null on the last page.
+
+              The data read for a request are kept in memory for the pages
+              that follow, so only the first page of a request reads its
+              files (unless a later page is handled by another process).
+              Tokens record the state of the source files, and are refused
+              once any of them changes.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import argparse
+import base64
+import binascii
+import collections
+import hashlib
+import json
+import sys
+from data_series import DataSeries, PlotSeries
+from data_window import XMAX_DEFAULT, XMIN_DEFAULT
+from deliver_data import (FILTERS_DEFAULT, TARGET_DEFAULT, URLS_DEFAULT,
+                          check_max_points, check_window,
+                          serialize_data_series, sort_requests)
+from downsample import MAX_POINTS_DEFAULT, downsample_data_series
+from json_writer import WIRE_FORMAT_DEFAULT, WIRE_FORMATS, join_fragments
+from mission_registry import get_data_series, get_source_files
+from response_cache import stat_source_files
+
+# The default number of data points per page, over all plot series.
+PAGE_POINTS_DEFAULT = 100000
+
+# The largest number of data points per page allowed, so that a page of any
+# wire format stays well under deliver_data.MAX_JSON_SIZE.
+MAX_PAGE_POINTS = 1000000
+
+# The version of the page tokens.  This must be increased whenever the
+# contents of the tokens change, so that older tokens are refused.
+PAGE_TOKEN_VERSION = 1
+
+# The number of requests whose data are kept in memory for their next pages.
+DATA_CACHE_ENTRIES = 4
+
+# The data read for the most recent requests, keyed by request, least
+# recently used first.
+_DATA_CACHE = collections.OrderedDict()
+
+#--------------------
+def encode_page_token(state):
+    """
+    Encodes the state of a paged request as an opaque token.
+
+    :param state: The request and the position of its next page.
+
+    :type state: dict
+
+    :returns: str -- The token, which is safe to use in a URL.
+    """
+    return base64.urlsafe_b64encode(json.dumps(
+        state, sort_keys=True, separators=(',', ':')).encode(
+            'utf-8')).decode('ascii')
+#--------------------
+
+#--------------------
+def decode_page_token(token):
+    """
+    Decodes a token returned by encode_page_token().
+
+    :param token: The token.
+
+    :type token: str
+
+    :returns: dict -- The request and the position of its next page.
+
+    :raises: IOError if the token is not valid.
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(
+            token.encode('ascii')).decode('utf-8'))
+    except (AttributeError, UnicodeError, binascii.Error, ValueError):
+        raise IOError("Page token is not valid.")
+    if (not isinstance(state, dict) or
+            state.get('version') != PAGE_TOKEN_VERSION):
+        raise IOError("Page token is not valid.")
+    return state
+#--------------------
+
+#--------------------
+def get_data_fingerprint(requests):
+    """
+    Returns a hash of the state of the source files of a list of requests, so
+    that pages of data read from different versions of the files are not
+    mixed.
+
+    :param requests: The (mission, obsid, filter, url, target) of each
+    request.
+
+    :type requests: list
+
+    :returns: str -- The hash, as a hexadecimal string.
+    """
+    sources = []
+    for request in requests:
+        try:
+            sources.append(stat_source_files(get_source_files(*request)))
+        except OSError:
+            sources.append(None)
+    return hashlib.sha256(json.dumps(sources).encode('utf-8')).hexdigest()
+#--------------------
+
+#--------------------
+def read_requests(requests, fingerprint, max_points=MAX_POINTS_DEFAULT,
+                  xmin=XMIN_DEFAULT, xmax=XMAX_DEFAULT):
+    """
+    Reads the data of a list of requests, or returns them from memory if they
+    were read for an earlier page from the same version of the source files.
+
+    :param requests: The (mission, obsid, filter, url, target) of each
+    request.
+
+    :type requests: list
+
+    :param fingerprint: The state of the source files, as returned by
+    get_data_fingerprint() before the data are read.
+
+    :type fingerprint: str
+
+    :param max_points: The maximum number of data points per plot series, or
+    None for no limit.
+
+    :type max_points: int
+
+    :param xmin: The smallest x value to return, or None for no limit.
+
+    :type xmin: float
+
+    :param xmax: The largest x value to return, or None for no limit.
+
+    :type xmax: float
+
+    :returns: list -- The DataSeries objects of all the requests, in order.
+    """
+    key = json.dumps([requests, fingerprint, max_points, xmin, xmax])
+    if key in _DATA_CACHE:
+        _DATA_CACHE.move_to_end(key)
+        return _DATA_CACHE[key]
+    all_data_series = []
+    for request in requests:
+        data_series = downsample_data_series(
+            get_data_series(*request, xmin=xmin, xmax=xmax), max_points)
+        # Some IUE obsIDs (those that are double-aperture) return already as a
+        # list of DataSeries.
+        if isinstance(data_series, list):
+            all_data_series.extend(data_series)
+        else:
+            all_data_series.append(data_series)
+    _DATA_CACHE[key] = all_data_series
+    while len(_DATA_CACHE) > DATA_CACHE_ENTRIES:
+        _DATA_CACHE.popitem(last=False)
+    return all_data_series
+#--------------------
+
+#--------------------
+def get_page(all_data_series, position, page_points):
+    """
+    Returns one page of a list of DataSeries objects.
+
+    :param all_data_series: The DataSeries objects.
+
+    :type all_data_series: list
+
+    :param position: The plot series (counting only the PlotSeries objects of
+    all the DataSeries, in order) and the data point the page starts at.
+
+    :type position: list
+
+    :param page_points: The maximum number of data points in the page.
+
+    :type page_points: int
+
+    :returns: tuple -- The DataSeries objects with the data points of the page
+    (plot series with none are empty), and the position of the next page, or
+    None if this is the last page.
+    """
+    all_series = [y for x in all_data_series for y in x.plot_series if
+                  isinstance(y, PlotSeries)]
+    # The range of data points of each plot series in the page.
+    ranges = []
+    next_position = list(position)
+    points_left = page_points
+    for i, series in enumerate(all_series):
+        if i < position[0] or points_left == 0:
+            ranges.append((0, 0))
+            continue
+        start = position[1] if i == position[0] else 0
+        stop = min(len(series), start + points_left)
+        points_left -= stop - start
+        ranges.append((start, stop))
+        next_position = [i, stop]
+    # Skip over the plot series that have no data points left.
+    while (next_position[0] < len(all_series) and
+           next_position[1] >= len(all_series[next_position[0]])):
+        next_position = [next_position[0] + 1, 0]
+    if next_position[0] >= len(all_series):
+        next_position = None
+
+    page = []
+    ranges = iter(ranges)
+    for data_series in all_data_series:
+        attributes = data_series.to_dict()
+        plot_series = []
+        for series in data_series.plot_series:
+            if isinstance(series, PlotSeries):
+                start, stop = next(ranges)
+                series = PlotSeries(series.raw_x[start:stop],
+                                    series.raw_y[start:stop],
+                                    series.x_precision, series.y_precision)
+            plot_series.append(series)
+        attributes['plot_series'] = plot_series
+        page.append(DataSeries(**attributes))
+    return page, next_position
+#--------------------
+
+#--------------------
+def _check_page_points(page_points):
+    """
+    Checks the requested number of data points per page.
+
+    :raises: IOError if it is not an integer from 1 to MAX_PAGE_POINTS.
+    """
+    if (isinstance(page_points, bool) or not isinstance(page_points, int) or
+            not 1 <= page_points <= MAX_PAGE_POINTS):
+        raise IOError("'page_points' must be an integer from 1 to " +
+                      str(MAX_PAGE_POINTS) + ".")
+#--------------------
+
+#--------------------
+def deliver_page(missions=None, obsids=None, filters=FILTERS_DEFAULT,
+                 urls=URLS_DEFAULT, targets=TARGET_DEFAULT,
+                 page_points=PAGE_POINTS_DEFAULT,
+                 wire_format=WIRE_FORMAT_DEFAULT,
+                 max_points=MAX_POINTS_DEFAULT, xmin=XMIN_DEFAULT,
+                 xmax=XMAX_DEFAULT, page_token=None):
+    """
+    Returns one page of the data of a request.  The first page is requested
+    like deliver_data(), and each page after that with the token returned by
+    the page before it.
+
+    :param page_points: The maximum number of data points in a page, over all
+    the plot series.
+
+    :type page_points: int
+
+    :param page_token: The "next_token" of the previous page, or None for the
+    first page.  All the other parameters are ignored when it is given, since
+    the token holds the request.
+
+    :type page_token: str
+
+    See deliver_data() for the other parameters.
+
+    :returns: JSON -- An object with the DataSeries of the page ("data") and
+    the token for the next page ("next_token"), null on the last page.
+
+    :raises: IOError if the request or the token is not valid, or if the data
+    have changed since the first page.
+    """
+    if page_token is None:
+        missions, obsids, filters, urls, targets = sort_requests(
+            missions, obsids, filters, urls, targets)
+        if wire_format not in WIRE_FORMATS:
+            raise IOError("Wire format '" + str(wire_format) + "' is not"
+                          " supported.")
+        check_max_points(max_points)
+        check_window(xmin, xmax)
+        _check_page_points(page_points)
+        requests = [list(x) for x in zip(missions, obsids, filters, urls,
+                                         targets)]
+        state = {'version':PAGE_TOKEN_VERSION, 'requests':requests,
+                 'page_points':page_points, 'wire_format':wire_format,
+                 'max_points':max_points, 'xmin':xmin, 'xmax':xmax,
+                 'data':get_data_fingerprint(requests), 'position':[0, 0]}
+    else:
+        state = decode_page_token(page_token)
+        try:
+            requests = state['requests']
+            sort_requests(*[[x[i] for x in requests] for i in range(5)])
+            if state['wire_format'] not in WIRE_FORMATS:
+                raise IOError("Page token is not valid.")
+            check_max_points(state['max_points'])
+            check_window(state['xmin'], state['xmax'])
+            _check_page_points(state['page_points'])
+            position = [int(x) for x in state['position']]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise IOError("Page token is not valid.")
+        if len(position) != 2 or min(position) < 0:
+            raise IOError("Page token is not valid.")
+        state['position'] = position
+        if get_data_fingerprint(requests) != state['data']:
+            raise IOError("The data have changed since the first page was"
+                          " returned.  Request the first page again.")
+
+    page, next_position = get_page(
+        read_requests([tuple(x) for x in state['requests']], state['data'],
+                      state['max_points'], state['xmin'], state['xmax']),
+        state['position'], state['page_points'])
+    if next_position is None:
+        next_token = None
+    else:
+        state['position'] = next_position
+        next_token = encode_page_token(state)
+    return ('{"data": ' + ''.join(join_fragments(serialize_data_series(
+        page, wire_format=state['wire_format']))) + ', "next_token": ' +
+            json.dumps(next_token) + '}')
+#--------------------
+
+#--------------------
+def setup_args():
+    """
+    Set up command-line arguments and options.
+
+    :returns: ArgumentParser -- Stores arguments and options.
+    """
+    parser = argparse.ArgumentParser(description="Delivers the data of a"
+                                     " request a page at a time, as JSON.")
+
+    parser.add_argument("-m" "--missions", action="store", dest="missions",
+                        type=str.lower, nargs='+', help="The mission(s) where"
+                        " this data comes from, for the first page.  There"
+                        " must be the same number of 'obsid' values.")
+
+    parser.add_argument("-o", "--obsids", action="store", dest="obsids",
+                        type=str, nargs='+', help="The observation ID(s) to"
+                        " retrieve data from, for the first page.  There must"
+                        " be the same number of 'missions' values.")
+
+    parser.add_argument("-f", "--filters", action="store", dest="filters",
+                        type=str, nargs='+', default=FILTERS_DEFAULT,
+                        help="The FILTER value of each observation, for the"
+                        " missions that need one (e.g., IUE).")
+
+    parser.add_argument("-t", "--target", action="store", dest="target",
+                        type=str, nargs="+", default=TARGET_DEFAULT,
+                        help="The target name of each observation, for the"
+                        " missions that need one (e.g., HSLA).")
+
+    parser.add_argument("-u", "--urls", action="store", dest="urls",
+                        type=str, nargs='+', default=URLS_DEFAULT,
+                        help="The preview URL of each observation, for the"
+                        " missions that need one (e.g., GALEX).")
+
+    parser.add_argument("--page-points", action="store", dest="page_points",
+                        type=int, default=PAGE_POINTS_DEFAULT, help="The"
+                        " maximum number of data points per page.  Default = "
+                        + str(PAGE_POINTS_DEFAULT) + ".")
+
+    parser.add_argument("--wire-format", action="store", dest="wire_format",
+                        type=str, default=WIRE_FORMAT_DEFAULT,
+                        choices=WIRE_FORMATS, help="How the data points of"
+                        " each plot series are written.  Default = " +
+                        WIRE_FORMAT_DEFAULT + ".")
+
+    parser.add_argument("--token", action="store", dest="page_token",
+                        type=str, default=None, help="The \"next_token\" of"
+                        " the previous page, to return the next page.")
+
+    return parser
+#--------------------
+
+#--------------------
+if __name__ == "__main__":
+
+    # Setup command-line arguments.
+    ARGS = setup_args().parse_args()
+
+    sys.stdout.write(deliver_page(
+        ARGS.missions, ARGS.obsids, filters=ARGS.filters, urls=ARGS.urls,
+        targets=ARGS.target, page_points=ARGS.page_points,
+        wire_format=ARGS.wire_format, page_token=ARGS.page_token) + '\n')
+#--------------------
@@ -0,0 +1,165 @@
+"""
+.. module:: payload_encoding
+
+   :synopsis: Compresses and decompresses cached JSON payloads.  gzip is always
+              available, zstd only if the zstandard package is installed.  The
+              names of the encodings are the HTTP Content-Encoding names, so
+              compressed payloads can be sent to clients as-is.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import gzip
+import struct
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# The file name extension of a payload in each encoding.  An encoding of None
+# means the payload is not compressed.
+ENCODING_EXTENSIONS = {None:'', 'gzip':'.gz', 'zstd':'.zst'}
+
+# The encoding cached payloads are written in, unless configured otherwise.
+ENCODING_DEFAULT = 'gzip'
+
+#--------------------
+def get_available_encodings():
+    """
+    Returns the encodings that can be used in this environment.
+
+    :returns: list -- The names of the encodings, with None for no
+    compression.
+    """
+    encodings = [None, 'gzip']
+    if zstandard is not None:
+        encodings.append('zstd')
+    return encodings
+#--------------------
+
+#--------------------
+def check_encoding(encoding):
+    """
+    Makes sure an encoding can be used in this environment.
+
+    :param encoding: The name of the encoding, or None for no compression.
+
+    :type encoding: str
+
+    :raises: ValueError if the encoding is unknown, or is zstd and the
+    zstandard package is not installed.
+    """
+    if encoding not in get_available_encodings():
+        if encoding == 'zstd':
+            raise ValueError("The zstandard package is needed for zstd"
+                             " compression.")
+        raise ValueError("Encoding '" + str(encoding) + "' is not supported.")
+#--------------------
+
+#--------------------
+def encode_payload(payload, encoding):
+    """
+    Converts a JSON string to bytes in the given encoding.
+
+    :param payload: The JSON string.
+
+    :type payload: str
+
+    :param encoding: The name of the encoding, or None for no compression.
+
+    :type encoding: str
+
+    :returns: bytes -- The encoded payload.
+    """
+    check_encoding(encoding)
+    data = payload.encode('utf-8')
+    if encoding == 'gzip':
+        # The modification time is fixed so the same payload always gives the
+        # same bytes.
+        return gzip.compress(data, mtime=0)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+#--------------------
+
+#--------------------
+def decode_payload(data, encoding):
+    """
+    Converts bytes in the given encoding back to a JSON string.
+
+    :param data: The encoded payload.
+
+    :type data: bytes
+
+    :param encoding: The name of the encoding, or None for no compression.
+
+    :type encoding: str
+
+    :returns: str -- The JSON string.
+    """
+    check_encoding(encoding)
+    if encoding == 'gzip':
+        data = gzip.decompress(data)
+    elif encoding == 'zstd':
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return data.decode('utf-8')
+#--------------------
+
+#--------------------
+def get_decoded_size(data, encoding):
+    """
+    Returns the size of an encoded payload once decoded, without decoding it.
+
+    :param data: The encoded payload.
+
+    :type data: bytes
+
+    :param encoding: The name of the encoding, or None for no compression.
+
+    :type encoding: str
+
+    :returns: int or None -- The size in bytes, or None if it is not recorded
+    in the encoded payload.
+    """
+    if encoding == 'gzip':
+        # The last four bytes of a gzip file are the size of the original data
+        # (modulo 2^32).
+        if len(data) < 4:
+            return None
+        return struct.unpack('<I', data[-4:])[0]
+    if encoding == 'zstd':
+        size = zstandard.frame_content_size(data)
+        return size if size >= 0 else None
+    return len(data)
+#--------------------
+
+#--------------------
+def parse_accept_encoding(header):
+    """
+    Returns the encodings a client accepts, from its Accept-Encoding header.
+
+    :param header: The value of the Accept-Encoding header, or None if there
+    is not one.
+
+    :type header: str
+
+    :returns: list -- The names of the accepted encodings that can be used in
+    this environment.
+    """
+    if not header:
+        return []
+    accepted = []
+    for item in header.split(','):
+        parts = [x.strip() for x in item.split(';')]
+        quality = 1.
+        for param in parts[1:]:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.
+        if quality > 0. and parts[0].lower() in get_available_encodings():
+            accepted.append(parts[0].lower())
+    return accepted
+#--------------------
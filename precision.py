@@ -0,0 +1,669 @@
+"""
+.. module:: precision
+
+   :synopsis: Rounds whole arrays of floats to a number of decimal places or
+              significant digits, giving exactly the same floats as formatting
+              each value as a string and reading it back (e.g.,
+              float("{0:.8f}".format(x))), without the per-value string
+              conversions.
+
+              The decimal rounding is done in extended precision
+              ("double-double" arithmetic), which is exact for all but a few
+              values: those within rounding error of a halfway point (e.g.,
+              exact ties such as 2**-9 rounded to 8 decimals), and those too
+              large or small to scale by a power of ten exactly.  Those few
+              are still rounded with string formatting.
+
+              Rounded values can also be written straight to JSON text from
+              their rounded digits, without the float repr() json.dumps() uses
+              for each value.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import collections
+import json
+import numpy
+
+# How values are rounded: to a number of decimal places ('decimals'), e.g.,
+# "{0:.8f}", or to a number of significant digits ('significant'), e.g.,
+# "{0:.8e}" is 9 significant digits.
+Precision = collections.namedtuple('Precision', ['kind', 'digits'])
+DECIMALS_8 = Precision('decimals', 8)
+SIGNIFICANT_9 = Precision('significant', 9)
+
+# Splits a float64 into two halves whose products with another half are exact
+# (Dekker's algorithm).
+_SPLITTER = 2.**27 + 1.
+
+# The powers of five that are exact as float64.  The powers of ten used to
+# scale the values are applied as a power of five and a power of two, so that
+# scaling by up to 10**(2*_MAX_POW5_EXPONENT) can be done exactly.
+_MAX_POW5_EXPONENT = 22
+_POW5 = numpy.array([float(5**x) for x in range(_MAX_POW5_EXPONENT+1)])
+
+# The range of powers of ten values can be scaled by.
+_MAX_SCALE = 2 * _MAX_POW5_EXPONENT
+
+# The powers of ten that fit in an int64.
+_POW10 = numpy.array([10**x for x in range(19)], dtype=numpy.int64)
+
+# Scaled values are rounded to integers in float64, so must be smaller than
+# this for their fractional part to be kept.
+_MAX_SCALED = 2.**52
+
+# A value whose fractional part, once scaled, is this close to one half (or a
+# rounded value this close to halfway between two floats) is rounded with
+# string formatting instead.  The rounding errors of the double-double
+# arithmetic are below 2**-48 in the same units.
+_MARGIN = 2.**-40
+
+#--------------------
+def _split(a):
+    """
+    Splits floats into high and low halves, with a == high + low exactly.
+    """
+    c = _SPLITTER * a
+    high = c - (c - a)
+    return high, a - high
+#--------------------
+
+#--------------------
+def _two_product(a, b):
+    """
+    Returns the product of floats as a rounded product and its rounding error,
+    with a * b == product + error exactly.
+    """
+    product = a * b
+    a_high, a_low = _split(a)
+    b_high, b_low = _split(b)
+    error = (((a_high * b_high - product) + a_high * b_low + a_low * b_high) +
+             a_low * b_low)
+    return product, error
+#--------------------
+
+#--------------------
+def _multiply_pow5(a, scale):
+    """
+    Multiplies floats by 5**scale (0 <= scale <= _MAX_SCALE), returning the
+    result as a float and a correction that is exact to about 2**-100 of the
+    result.
+    """
+    first = numpy.minimum(scale, _MAX_POW5_EXPONENT)
+    product, error = _two_product(a, _POW5[first])
+    second = _POW5[scale - first]
+    product, error2 = _two_product(product, second)
+    return product, error2 + error * second
+#--------------------
+
+#--------------------
+def _round_to_integers(values, scale):
+    """
+    Rounds finite floats times 10**scale (0 <= scale <= _MAX_SCALE) to the
+    nearest integers, rounding halfway cases to even as string formatting
+    does.
+
+    :returns: tuple -- The integers (as floats), and a mask of the values that
+    could not be rounded exactly.
+    """
+    # values * 10**scale, as scaled + scaled_error.  Multiplying by a power of
+    # two is exact.
+    scaled, scaled_error = _multiply_pow5(values, scale)
+    scaled = numpy.ldexp(scaled, scale)
+    scaled_error = numpy.ldexp(scaled_error, scale)
+    uncertain = ~(numpy.abs(scaled) < _MAX_SCALED)
+    scaled[uncertain] = 0.
+    scaled_error[uncertain] = 0.
+    # The nearest integer, correcting the rounding of 'scaled' with its error.
+    # The subtraction is exact.
+    integers = numpy.rint(scaled)
+    fraction = (scaled - integers) + scaled_error
+    integers += (fraction > 0.5)
+    integers -= (fraction < -0.5)
+    uncertain |= numpy.abs(numpy.abs(fraction) - 0.5) < _MARGIN
+    return integers, uncertain
+#--------------------
+
+#--------------------
+def _divide_pow10(integers, scale):
+    """
+    Divides integers (as floats, smaller than _MAX_SCALED) by 10**scale
+    (0 <= scale <= _MAX_SCALE), rounding to the nearest float.
+
+    :returns: tuple -- The quotients, and a mask of those that could not be
+    rounded exactly.
+    """
+    # Dividing by 10**scale is dividing by 5**scale, then by a power of two,
+    # which is exact.  Division by an exact power of five is correctly
+    # rounded.
+    exact_pow5 = scale <= _MAX_POW5_EXPONENT
+    quotients = integers / _POW5[numpy.minimum(scale, _MAX_POW5_EXPONENT)]
+    uncertain = numpy.zeros(integers.shape, dtype=bool)
+    if not exact_pow5.all():
+        # Otherwise each quotient is corrected twice using its remainder, then
+        # checked to be within half a float spacing of the exact quotient.
+        inexact = ~exact_pow5
+        part = quotients[inexact]
+        part_scale = scale[inexact]
+        part_integers = integers[inexact]
+        first = numpy.minimum(part_scale, _MAX_POW5_EXPONENT)
+        pow5 = _POW5[first] * _POW5[part_scale - first]
+        for i in range(3):
+            product, product_error = _multiply_pow5(part, part_scale)
+            remainder = (product - part_integers) + product_error
+            if i == 2:
+                break
+            part = part - remainder / pow5
+        half_spacing = numpy.spacing(numpy.abs(part)) * pow5 / 2.
+        uncertain[inexact] = ~(numpy.abs(remainder) <
+                               half_spacing * (1. - _MARGIN))
+        quotients[inexact] = part
+    return numpy.ldexp(quotients, -scale), uncertain
+#--------------------
+
+#--------------------
+def _round(values, scale, string_format):
+    """
+    Rounds floats to the given number of decimal places (per value).  The
+    values that can not be rounded exactly with arithmetic are rounded with
+    string formatting.
+    """
+    result = values.copy()
+    # Python formats every NaN as "nan", which is read back as a positive NaN.
+    result[numpy.isnan(values)] = numpy.nan
+    # Zeros and infinities are unchanged.
+    finite = numpy.isfinite(values) & (values != 0.)
+    finite_values = values[finite]
+    scale = scale[finite]
+    in_range = (scale >= 0) & (scale <= _MAX_SCALE)
+    integers, uncertain = _round_to_integers(finite_values[in_range],
+                                             scale[in_range])
+    rounded, uncertain_quotients = _divide_pow10(integers, scale[in_range])
+    rounded_values = numpy.empty(finite_values.shape)
+    # A value rounded to zero keeps its sign, as "-0.00000000" is read back as
+    # -0.0.
+    rounded_values[in_range] = numpy.copysign(rounded,
+                                              finite_values[in_range])
+    fallback = ~in_range
+    fallback[in_range] = uncertain | uncertain_quotients
+    rounded_values[fallback] = [float(string_format.format(x)) for x in
+                                finite_values[fallback].tolist()]
+    result[finite] = rounded_values
+    return result
+#--------------------
+
+#--------------------
+def _get_significant_scale(values, digits):
+    """
+    Returns the number of decimal places to round each float to, to keep the
+    given number of significant digits.
+    """
+    # The scale is found from the exponent of each value.  log10() may give an
+    # exponent that is off by one, which is corrected if the rounded value
+    # does not have the right number of digits.  (A value that rounds up to
+    # 10**digits has the right exponent.)
+    exponents = numpy.floor(numpy.log10(numpy.abs(values)))
+    exponents[~numpy.isfinite(exponents)] = 0.
+    scale = (digits - 1) - exponents.astype(int)
+    for _ in range(2):
+        check = (numpy.isfinite(values) & (values != 0.) & (scale >= 0) &
+                 (scale <= _MAX_SCALE))
+        integers, uncertain = _round_to_integers(values[check], scale[check])
+        integers = numpy.abs(integers)
+        adjust = ((integers < 10.**(digits-1)).astype(int) -
+                  (integers > 10.**digits))
+        adjust[uncertain] = 0
+        if not adjust.any():
+            break
+        scale[check] += adjust
+    return scale
+#--------------------
+
+#--------------------
+def _get_scale(values, precision):
+    """
+    Returns the number of decimal places to round each float to, and the
+    string format that rounds one value the same way.
+    """
+    if precision.kind == 'decimals':
+        return (numpy.full(values.size, precision.digits),
+                "{0:." + str(precision.digits) + "f}")
+    return (_get_significant_scale(values, precision.digits),
+            "{0:." + str(precision.digits - 1) + "e}")
+#--------------------
+
+#--------------------
+def round_decimals(values, decimals=8):
+    """
+    Rounds floats to a number of decimal places.  Each value is the same as
+    float("{0:.<decimals>f}".format(value)).
+
+    :param values: The values to round.
+
+    :type values: numpy.ndarray or list
+
+    :param decimals: The number of decimal places.
+
+    :type decimals: int
+
+    :returns: numpy.ndarray -- The rounded values, as float64.
+    """
+    return apply_precision(values, Precision('decimals', decimals))
+#--------------------
+
+#--------------------
+def round_significant(values, digits=9):
+    """
+    Rounds floats to a number of significant digits.  Each value is the same
+    as float("{0:.<digits-1>e}".format(value)), e.g., 9 significant digits is
+    the same as float("{0:.8e}".format(value)).
+
+    :param values: The values to round.
+
+    :type values: numpy.ndarray or list
+
+    :param digits: The number of significant digits.
+
+    :type digits: int
+
+    :returns: numpy.ndarray -- The rounded values, as float64.
+    """
+    return apply_precision(values, Precision('significant', digits))
+#--------------------
+
+#--------------------
+def apply_precision(values, precision):
+    """
+    Rounds floats to a precision.
+
+    :param values: The values to round.
+
+    :type values: numpy.ndarray or list
+
+    :param precision: The precision to round to, or None to leave the values
+    as they are.
+
+    :type precision: Precision
+
+    :returns: numpy.ndarray -- The rounded values, as float64.
+    """
+    values = numpy.asarray(values, dtype=numpy.float64)
+    if precision is None:
+        return values
+    flat_values = values.ravel()
+    with numpy.errstate(all='ignore'):
+        scale, string_format = _get_scale(flat_values, precision)
+        return _round(flat_values, scale, string_format).reshape(values.shape)
+#--------------------
+
+#--------------------
+def _count_digits(integers):
+    """
+    Returns the number of decimal digits of non-negative integers (one for
+    zero).
+    """
+    return numpy.maximum(numpy.searchsorted(_POW10, integers, side='right'), 1)
+#--------------------
+
+#--------------------
+def _digit_chars(integers, width):
+    """
+    Returns the characters of the digits of non-negative integers, with
+    leading zeros, in 'width' columns.
+    """
+    chars = numpy.empty((integers.size, width), dtype=numpy.uint8)
+    remaining = integers
+    for column in range(width-1, -1, -1):
+        remaining, digits = numpy.divmod(remaining, 10)
+        chars[:, column] = digits
+    return chars + numpy.uint8(ord('0'))
+#--------------------
+
+#--------------------
+def _count_significant(chars):
+    """
+    Returns the number of columns of digit characters up to the last non-zero
+    digit of each row (at least one).
+    """
+    non_zero = chars != ord('0')
+    last = chars.shape[1] - numpy.argmax(non_zero[:, ::-1], axis=1)
+    return numpy.where(non_zero.any(axis=1), last, 1)
+#--------------------
+
+#--------------------
+def _literal_chars(text, n_rows, used=True):
+    """
+    Returns the characters of a string repeated in every row, and a mask of
+    the columns used.
+    """
+    chars = numpy.frombuffer(text.encode('ascii'), dtype=numpy.uint8)
+    return (numpy.broadcast_to(chars, (n_rows, len(text))),
+            numpy.broadcast_to(numpy.asarray(used)[..., None],
+                               (n_rows, len(text))))
+#--------------------
+
+#--------------------
+def _text_chars(texts):
+    """
+    Returns the characters of a list of ASCII strings, one per row, and a mask
+    of the columns used.
+    """
+    width = max([len(x) for x in texts] + [0])
+    chars = numpy.array([x.encode('ascii') for x in texts],
+                        dtype='S' + str(max(width, 1)))
+    chars = chars.view(numpy.uint8).reshape(len(texts), max(width, 1))
+    return chars[:, :width], chars[:, :width] != 0
+#--------------------
+
+#--------------------
+def _hstack_chars(parts):
+    """
+    Joins the (characters, mask) of several columns side by side.
+    """
+    return (numpy.hstack([x[0] for x in parts]),
+            numpy.hstack([x[1] for x in parts]))
+#--------------------
+
+#--------------------
+def _positional_chars(integers, scale):
+    """
+    Returns the characters of integers / 10**scale written as Python writes
+    floats from 1e-4 to 1e16 (e.g., "1234.5", "0.001", "15000000000.0").
+    """
+    n_rows = integers.size
+    positive_scale = numpy.maximum(scale, 0)
+    whole = numpy.where(scale > 0, integers // _POW10[positive_scale],
+                        integers * _POW10[numpy.maximum(-scale, 0)])
+    whole_width = int(_count_digits(whole).max())
+    whole_chars = _digit_chars(whole, whole_width)
+    # The integer part has no leading zeros, but is at least one digit.
+    whole_used = (numpy.arange(whole_width)[None, :] >=
+                  whole_width - _count_digits(whole)[:, None])
+    # The fractional part is shifted so that it starts in the first column,
+    # and written up to its last non-zero digit (at least one digit).
+    fraction_width = max(int(positive_scale.max()), 1)
+    fraction = (integers % _POW10[positive_scale] *
+                _POW10[fraction_width - positive_scale])
+    fraction_chars = _digit_chars(fraction, fraction_width)
+    fraction_used = (numpy.arange(fraction_width)[None, :] <
+                     _count_significant(fraction_chars)[:, None])
+    return _hstack_chars([(whole_chars, whole_used),
+                          _literal_chars('.', n_rows),
+                          (fraction_chars, fraction_used)])
+#--------------------
+
+#--------------------
+def _exponent_chars(integers, scale):
+    """
+    Returns the characters of integers / 10**scale (non-zero) written as
+    Python writes floats below 1e-4 or from 1e16 (e.g., "1e-05",
+    "1.2345e-14", "1.5e+16").
+    """
+    n_rows = integers.size
+    n_digits = _count_digits(integers)
+    exponents = n_digits - 1 - scale
+    # The digits are shifted so that they start in the first column, and
+    # written up to the last non-zero digit.
+    mantissa_width = int(n_digits.max())
+    mantissa_chars = _digit_chars(integers * _POW10[mantissa_width - n_digits],
+                                  mantissa_width)
+    mantissa_used = (numpy.arange(mantissa_width)[None, :] <
+                     _count_significant(mantissa_chars)[:, None])
+    # The exponent is at least two digits.
+    exponent_chars = _digit_chars(numpy.abs(exponents), 3)
+    exponent_used = numpy.ones((n_rows, 3), dtype=bool)
+    exponent_used[:, 0] = numpy.abs(exponents) >= 100
+    signs = numpy.where(exponents < 0, ord('-'), ord('+')).astype(numpy.uint8)
+    return _hstack_chars([
+        (mantissa_chars[:, :1], mantissa_used[:, :1]),
+        _literal_chars('.', n_rows, mantissa_used[:, 1:2].any(axis=1)),
+        (mantissa_chars[:, 1:], mantissa_used[:, 1:]),
+        _literal_chars('e', n_rows),
+        (signs[:, None], numpy.ones((n_rows, 1), dtype=bool)),
+        (exponent_chars, exponent_used)])
+#--------------------
+
+#--------------------
+def _round_for_json(values, precision):
+    """
+    Rounds floats to a precision as integers / 10**scale, and finds how
+    Python writes each rounded value.
+
+    :returns: tuple -- The absolute values of the rounded integers (as int64,
+    zero where they could not be found), the scale of each, the string format
+    that rounds one value the same way, and masks of the values written
+    without an exponent, with an exponent, and from their string formatting
+    (NaN and infinite values, and those that can not be rounded exactly with
+    arithmetic).
+    """
+    scale, string_format = _get_scale(values, precision)
+    in_range = numpy.isfinite(values) & (scale >= 0) & (scale <= _MAX_SCALE)
+    integers = numpy.zeros(values.size)
+    fallback = ~in_range
+    integers[in_range], fallback[in_range] = _round_to_integers(
+        values[in_range], scale[in_range])
+    if precision.kind == 'significant' and precision.digits > 15:
+        # The shortest representation of a float may then have fewer digits
+        # than the rounded value.
+        fallback[:] = True
+    integers = numpy.abs(integers).astype(numpy.int64)
+    # Python writes floats below 1e-4 or from 1e16 with an exponent.
+    exponents = _count_digits(integers) - 1 - scale
+    exponential = (~fallback & (integers != 0) &
+                   ((exponents < -4) | (exponents >= 16)))
+    positional = ~fallback & ~exponential
+    return integers, scale, string_format, positional, exponential, fallback
+#--------------------
+
+#--------------------
+def format_json_numbers(values, precision):
+    """
+    Writes floats rounded to a precision as JSON numbers, all at once.  The
+    JSON of each value is the same as json.dumps() of the rounded value (so
+    NaN and infinite values are written as NaN, Infinity and -Infinity), but
+    is made from the rounded digits directly instead of by rounding each value
+    and then finding its shortest representation.
+
+    :param values: The values to write.
+
+    :type values: numpy.ndarray or list
+
+    :param precision: The precision to round the values to, or None to write
+    the values as they are.
+
+    :type precision: Precision
+
+    :returns: tuple -- The ASCII characters of the JSON of each value, as a 2-D
+    array of uint8 with one row per value, and a mask of the characters used
+    in each row (the rows are padded to the same length).
+    """
+    values = numpy.asarray(values, dtype=numpy.float64).ravel()
+    if precision is None:
+        return _text_chars([json.dumps(x) for x in values.tolist()])
+    n_rows = values.size
+    with numpy.errstate(all='ignore'):
+        (integers, scale, string_format, positional, exponential,
+         fallback) = _round_for_json(values, precision)
+        groups = []
+        if positional.any():
+            groups.append((positional, _positional_chars(
+                integers[positional], scale[positional])))
+        if exponential.any():
+            groups.append((exponential, _exponent_chars(
+                integers[exponential], scale[exponential])))
+        # The values that can not be rounded exactly with arithmetic are
+        # written from their string formatting.
+        fallback_json = [json.dumps(float(string_format.format(x))) for x in
+                         values[fallback].tolist()]
+        width = max([x[1][0].shape[1] for x in groups] +
+                    [len(x) for x in fallback_json] + [0])
+
+    chars = numpy.zeros((n_rows, width + 1), dtype=numpy.uint8)
+    used = numpy.zeros((n_rows, width + 1), dtype=bool)
+    # The sign comes first, including for values rounded to zero, since
+    # "-0.00000000" is read back as -0.0.
+    chars[:, 0] = ord('-')
+    used[:, 0] = numpy.signbit(values) & ~fallback
+    for rows, (group_chars, group_used) in groups:
+        chars[rows, 1:group_chars.shape[1]+1] = group_chars
+        used[rows, 1:group_used.shape[1]+1] = group_used
+    if fallback_json:
+        fallback_rows = numpy.flatnonzero(fallback)
+        fallback_chars, fallback_used = _text_chars(fallback_json)
+        chars[fallback_rows, 1:fallback_chars.shape[1]+1] = fallback_chars
+        used[fallback_rows, 1:fallback_used.shape[1]+1] = fallback_used
+    return chars, used
+#--------------------
+
+#--------------------
+def format_json_pairs(x, y, x_precision, y_precision):
+    """
+    Writes the [x, y] pairs of two columns of floats as JSON, with each column
+    rounded to its own precision.  The JSON is the same as json.dumps() of the
+    list of pairs of rounded values, without the enclosing square brackets.
+
+    :param x: The x values.
+
+    :type x: numpy.ndarray or list
+
+    :param y: The y values.
+
+    :type y: numpy.ndarray or list
+
+    :param x_precision: The precision to round the x values to, or None.
+
+    :type x_precision: Precision
+
+    :param y_precision: The precision to round the y values to, or None.
+
+    :type y_precision: Precision
+
+    :returns: str -- The JSON of the pairs, separated by ", ".
+    """
+    x_chars, x_used = format_json_numbers(x, x_precision)
+    y_chars, y_used = format_json_numbers(y, y_precision)
+    n_rows = x_chars.shape[0]
+    if not n_rows:
+        return ''
+    chars, used = _hstack_chars([_literal_chars('[', n_rows),
+                                 (x_chars, x_used),
+                                 _literal_chars(', ', n_rows),
+                                 (y_chars, y_used),
+                                 _literal_chars('], ', n_rows)])
+    # Drops the separator after the last pair.
+    return chars[used].tobytes()[:-2].decode('ascii')
+#--------------------
+
+#--------------------
+def _count_decimal_places(values):
+    """
+    Returns the number of decimal places of the exact decimal value of each
+    float (zero for integers, NaN and infinite values).
+    """
+    finite = numpy.isfinite(values)
+    mantissas, exponents = numpy.frexp(numpy.where(finite, values, 0.))
+    integers = numpy.abs(numpy.ldexp(mantissas, 53)).astype(numpy.int64)
+    # A float is integers * 2**(exponents-53), and 2**-n has n decimal places.
+    lowest_bits = numpy.frexp((integers & -integers).astype(numpy.float64))[1]
+    places = 53 - exponents - (lowest_bits - 1)
+    places[integers == 0] = 0
+    return numpy.maximum(places, 0)
+#--------------------
+
+#--------------------
+def _count_trailing_zeros(integers):
+    """
+    Returns the number of trailing zeros of non-negative integers (none for
+    zero).
+    """
+    trailing = numpy.zeros(integers.shape, dtype=int)
+    remaining = integers
+    while True:
+        divisible = (remaining % 10 == 0) & (remaining != 0)
+        if not divisible.any():
+            return trailing
+        trailing += divisible
+        remaining = numpy.where(divisible, remaining // 10, remaining)
+#--------------------
+
+#--------------------
+def _estimate_unrounded_lengths(values):
+    """
+    Estimates the length of the JSON of floats written as they are, from
+    their magnitude and decimal places.
+    """
+    magnitudes = numpy.abs(values)
+    with numpy.errstate(all='ignore'):
+        exponents = numpy.floor(numpy.log10(magnitudes))
+    exponents[~numpy.isfinite(exponents)] = 0.
+    exponents = exponents.astype(int)
+    # The shortest representation of a float has at most 17 significant
+    # digits, and no more than its exact decimal value (e.g., a float32 flux
+    # such as 119320.4453125).
+    digits = numpy.clip(exponents + 1 + _count_decimal_places(values), 1, 17)
+    # Python writes floats below 1e-4 or from 1e16 with an exponent
+    # (e.g., "1.5e-05"), and the others with at least one decimal place.
+    lengths = numpy.where(
+        exponents >= 0,
+        exponents + 2 + numpy.maximum(digits - exponents - 1, 1),
+        digits + 1 - exponents)
+    exponential = (exponents < -4) | (exponents >= 16)
+    lengths[exponential] = (digits[exponential] +
+                            (digits[exponential] > 1) + 4 +
+                            (numpy.abs(exponents[exponential]) >= 100))
+    return lengths + numpy.signbit(values)
+#--------------------
+
+#--------------------
+def estimate_json_lengths(values, precision):
+    """
+    Finds the length of the JSON of each float once rounded to a precision,
+    without writing it.  Rounded values are rounded as format_json_numbers()
+    rounds them, and their lengths are exact: the trailing zeros that are
+    not written are not counted.  The lengths of values written as they are
+    (no precision) are estimated from their magnitude and decimal places,
+    which may count a few digits the shortest representation does not need.
+
+    :param values: The values to find the JSON lengths of.
+
+    :type values: numpy.ndarray or list
+
+    :param precision: The precision the values are rounded to, or None if
+    they are written as they are.
+
+    :type precision: Precision
+
+    :returns: numpy.ndarray -- The length of the JSON of each value.
+    """
+    values = numpy.asarray(values, dtype=numpy.float64).ravel()
+    finite = numpy.isfinite(values)
+    if precision is None:
+        lengths = _estimate_unrounded_lengths(values)
+    else:
+        with numpy.errstate(all='ignore'):
+            (integers, scale, string_format, positional, exponential,
+             fallback) = _round_for_json(values, precision)
+        n_digits = _count_digits(integers)
+        # The digits written, up to the last non-zero digit.
+        significant = n_digits - _count_trailing_zeros(integers)
+        # e.g., "1234.5": the integer part and the fractional part are at
+        # least one digit each.
+        whole_digits = n_digits - scale
+        lengths = (numpy.maximum(whole_digits, 1) + 1 +
+                   numpy.maximum(significant - whole_digits, 1))
+        lengths[integers == 0] = len('0.0')
+        # e.g., "1.2345e-14", with an exponent of at least two digits.
+        exponents = numpy.abs(n_digits - 1 - scale)
+        lengths[exponential] = (significant + (significant > 1) + 4 +
+                                (exponents >= 100))[exponential]
+        lengths = lengths + numpy.signbit(values)
+        # The values that can not be rounded exactly with arithmetic are
+        # written from their string formatting.
+        fallback &= finite
+        lengths[fallback] = [len(json.dumps(float(string_format.format(x))))
+                             for x in values[fallback].tolist()]
+    lengths[numpy.isnan(values)] = len('NaN')
+    lengths[numpy.isinf(values)] = (len('Infinity') +
+                                    (values[numpy.isinf(values)] < 0))
+    return lengths
+#--------------------
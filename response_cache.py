@@ -0,0 +1,592 @@
+"""
+.. module:: response_cache
+
+   :synopsis: On-disk cache of the JSON returned for each mission + obsid pair,
+              so that repeat requests are a single file read.  Entries are
+              checked against the source files they were read from, and are
+              ignored once any of those files changes.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from downsample import MAX_POINTS_DEFAULT
+from json_writer import WIRE_FORMAT_DEFAULT
+from mission_registry import get_reader_args, get_source_files
+from payload_encoding import (ENCODING_DEFAULT, ENCODING_EXTENSIONS,
+                              check_encoding, decode_payload, encode_payload)
+
+# The version of the cached JSON.  This must be increased whenever a change to
+# a reader or to the serialization changes the JSON returned, so that entries
+# written by older code are no longer used.
+RESPONSE_CACHE_VERSION = 4
+
+# Entries for missions whose data come from a remote service have no source
+# files to check, so they are only used for this many seconds.
+REMOTE_MAX_AGE_DEFAULT = 86400.
+
+# File name extensions of the two files that make up an entry.  The payload
+# also has the extension of its encoding, e.g., ".json.gz".
+PAYLOAD_EXTENSION = ".json"
+META_EXTENSION = ".meta"
+
+# The encoding new payloads are written in by this process (see
+# configure_response_cache()).
+_ENCODING = ENCODING_DEFAULT
+
+#--------------------
+def get_cache_key(mission, obsid, filt=' ', url=' ', targ=' ',
+                  wire_format=WIRE_FORMAT_DEFAULT,
+                  max_points=MAX_POINTS_DEFAULT):
+    """
+    Returns the key of the cache entry for a mission + obsid pair.  The key is
+    a hash of the cache version, the mission, the arguments passed to that
+    mission's reader, and the wire format and maximum number of data points
+    (if not the defaults), so request values a mission does not use (e.g., the
+    FILTER for Kepler) do not change the key.
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :param wire_format: The wire format of the JSON, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :param max_points: The maximum number of data points per plot series of
+    the JSON, or None for no limit.
+
+    :type max_points: int
+
+    :returns: str -- The key, as a hexadecimal string.
+    """
+    key_values = ([RESPONSE_CACHE_VERSION, mission] +
+                  get_reader_args(mission, obsid, filt, url, targ))
+    if wire_format != WIRE_FORMAT_DEFAULT:
+        key_values.append(wire_format)
+    if max_points != MAX_POINTS_DEFAULT:
+        key_values.append(max_points)
+    return hashlib.sha256(json.dumps(key_values).encode('utf-8')).hexdigest()
+#--------------------
+
+#--------------------
+def get_entry_path(cache_root, key):
+    """
+    Returns the path of a cache entry, without a file name extension.  Entries
+    are spread over subdirectories named after the first two characters of
+    their key, to keep the number of files in any one directory small.
+
+    :param cache_root: Directory containing the cache entries.
+
+    :type cache_root: str
+
+    :param key: The key of the entry.
+
+    :type key: str
+
+    :returns: str -- The path of the entry.
+    """
+    return os.path.join(cache_root, key[0:2], key)
+#--------------------
+
+#--------------------
+def stat_source_files(source_files):
+    """
+    Records the modification time and size of each source file.
+
+    :param source_files: The paths of the source files.
+
+    :type source_files: list
+
+    :returns: list -- The [path, modification time (ns), size] of each file.
+
+    :raises: OSError if a file does not exist.
+    """
+    sources = []
+    for source_file in source_files:
+        stat_result = os.stat(source_file)
+        sources.append([source_file, stat_result.st_mtime_ns,
+                        stat_result.st_size])
+    return sources
+#--------------------
+
+#--------------------
+def stat_request_sources(mission, obsid, filt=' ', url=' ', targ=' '):
+    """
+    Records the modification time and size of each source file of a mission +
+    obsid pair.  This is called before the data are read, and the result
+    passed to write_entry().
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :returns: list or None -- The [path, modification time (ns), size] of each
+    file, or None if a file does not exist.
+    """
+    try:
+        return stat_source_files(get_source_files(mission, obsid, filt, url,
+                                                  targ))
+    except OSError:
+        return None
+#--------------------
+
+#--------------------
+def is_entry_fresh(meta, max_age=REMOTE_MAX_AGE_DEFAULT):
+    """
+    Checks whether a cache entry can still be used.
+
+    :param meta: The contents of the entry's meta file.
+
+    :type meta: dict
+
+    :param max_age: The number of seconds an entry with no source files is
+    used for.
+
+    :type max_age: float
+
+    :returns: bool -- True if the entry was written by this cache version and
+    its source files have not changed since.
+    """
+    if meta.get('version') != RESPONSE_CACHE_VERSION:
+        return False
+    sources = meta.get('sources', [])
+    if not sources:
+        return time.time() - meta.get('created', 0.) <= max_age
+    try:
+        return stat_source_files([x[0] for x in sources]) == sources
+    except OSError:
+        return False
+#--------------------
+
+#--------------------
+def configure_response_cache(encoding):
+    """
+    Sets the encoding that this process writes new payloads in.  Entries that
+    are already cached are read in whatever encoding they were written in.
+
+    :param encoding: The name of the encoding, or None for no compression.
+
+    :type encoding: str
+
+    :raises: ValueError if the encoding can not be used.
+    """
+    global _ENCODING
+    check_encoding(encoding)
+    _ENCODING = encoding
+#--------------------
+
+#--------------------
+def write_atomically(file_name, contents):
+    """
+    Writes a string or bytes to a file by writing a temporary file in the same
+    directory and then renaming it, so that readers never see a partly written
+    file.
+
+    :param file_name: The file to write.
+
+    :type file_name: str
+
+    :param contents: The string (written as UTF-8) or bytes to write.
+
+    :type contents: str or bytes
+    """
+    if isinstance(contents, str):
+        contents = contents.encode('utf-8')
+    file_dir = os.path.dirname(file_name)
+    os.makedirs(file_dir, exist_ok=True)
+    file_handle, temp_name = tempfile.mkstemp(dir=file_dir, suffix='.tmp')
+    try:
+        with os.fdopen(file_handle, 'wb') as ofile:
+            ofile.write(contents)
+        # mkstemp() makes the file readable by its owner only.
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, file_name)
+    except BaseException:
+        if os.path.isfile(temp_name):
+            os.remove(temp_name)
+        raise
+#--------------------
+
+#--------------------
+def _read_fresh_meta(entry_path, max_age):
+    """
+    Reads the meta file of a cache entry.
+
+    :returns: dict or None -- The contents of the meta file, or None if there
+    is no meta file or the entry is not fresh.
+    """
+    try:
+        with open(entry_path + META_EXTENSION, 'r', encoding='utf-8') as ifile:
+            meta = json.load(ifile)
+    except (OSError, ValueError):
+        return None
+    if not is_entry_fresh(meta, max_age):
+        return None
+    return meta
+#--------------------
+
+#--------------------
+def _get_payload_file(entry_path, meta):
+    """
+    Returns the payload file of a cache entry, given its meta file contents.
+    """
+    return (entry_path + PAYLOAD_EXTENSION +
+            ENCODING_EXTENSIONS[meta.get('encoding')])
+#--------------------
+
+#--------------------
+def has_fresh_entry(cache_root, mission, obsid, filt=' ', url=' ', targ=' ',
+                    max_age=REMOTE_MAX_AGE_DEFAULT,
+                    wire_format=WIRE_FORMAT_DEFAULT,
+                    max_points=MAX_POINTS_DEFAULT):
+    """
+    Checks whether a mission + obsid pair has a usable cache entry, without
+    reading its payload.
+
+    :param cache_root: Directory containing the cache entries.
+
+    :type cache_root: str
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :param max_age: The number of seconds an entry with no source files is
+    used for.
+
+    :type max_age: float
+
+    :param wire_format: The wire format of the JSON, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :param max_points: The maximum number of data points per plot series of
+    the JSON, or None for no limit.
+
+    :type max_points: int
+
+    :returns: bool -- True if there is an entry and it is fresh.
+    """
+    entry_path = get_entry_path(cache_root, get_cache_key(
+        mission, obsid, filt, url, targ, wire_format, max_points))
+    meta = _read_fresh_meta(entry_path, max_age)
+    return meta is not None and os.path.isfile(_get_payload_file(entry_path,
+                                                                  meta))
+#--------------------
+
+#--------------------
+def remove_entry(cache_root, mission, obsid, filt=' ', url=' ', targ=' ',
+                 wire_format=WIRE_FORMAT_DEFAULT,
+                 max_points=MAX_POINTS_DEFAULT):
+    """
+    Removes the cache entry for a mission + obsid pair, if there is one.
+
+    :param cache_root: Directory containing the cache entries.
+
+    :type cache_root: str
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :param wire_format: The wire format of the JSON, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :param max_points: The maximum number of data points per plot series of
+    the JSON, or None for no limit.
+
+    :type max_points: int
+    """
+    entry_path = get_entry_path(cache_root, get_cache_key(
+        mission, obsid, filt, url, targ, wire_format, max_points))
+    # The meta file is removed first, so there is never a meta file without a
+    # payload.
+    for extension in [META_EXTENSION] + [PAYLOAD_EXTENSION + x for x in
+                                         ENCODING_EXTENSIONS.values()]:
+        if os.path.isfile(entry_path + extension):
+            os.remove(entry_path + extension)
+#--------------------
+
+#--------------------
+def read_encoded_entry(cache_root, mission, obsid, filt=' ', url=' ',
+                       targ=' ', max_age=REMOTE_MAX_AGE_DEFAULT,
+                       wire_format=WIRE_FORMAT_DEFAULT,
+                       max_points=MAX_POINTS_DEFAULT):
+    """
+    Reads the cached payload for a mission + obsid pair without decoding it.
+    The payload is the JSON list of the pair's DataSeries, i.e., the same JSON
+    deliver_data() returns for this pair alone.
+
+    :param cache_root: Directory containing the cache entries.
+
+    :type cache_root: str
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :param max_age: The number of seconds an entry with no source files is
+    used for.
+
+    :type max_age: float
+
+    :param wire_format: The wire format of the JSON, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :param max_points: The maximum number of data points per plot series of
+    the JSON, or None for no limit.
+
+    :type max_points: int
+
+    :returns: tuple or None -- The encoded payload, its encoding (None if it
+    is not compressed) and the length of the decoded JSON string, or None if
+    there is no usable entry.
+    """
+    entry_path = get_entry_path(cache_root, get_cache_key(
+        mission, obsid, filt, url, targ, wire_format, max_points))
+    meta = _read_fresh_meta(entry_path, max_age)
+    if meta is None or meta.get('encoding') not in ENCODING_EXTENSIONS:
+        return None
+    try:
+        with open(_get_payload_file(entry_path, meta), 'rb') as ifile:
+            data = ifile.read()
+    except OSError:
+        return None
+    # The size of the payload is recorded so that a payload from a different
+    # write is not used.
+    if len(data) != meta.get('size'):
+        return None
+    return data, meta['encoding'], meta['length']
+#--------------------
+
+#--------------------
+def read_entry(cache_root, mission, obsid, filt=' ', url=' ', targ=' ',
+               max_age=REMOTE_MAX_AGE_DEFAULT,
+               wire_format=WIRE_FORMAT_DEFAULT,
+               max_points=MAX_POINTS_DEFAULT):
+    """
+    Reads the cached JSON for a mission + obsid pair.
+
+    :param cache_root: Directory containing the cache entries.
+
+    :type cache_root: str
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :param max_age: The number of seconds an entry with no source files is
+    used for.
+
+    :type max_age: float
+
+    :param wire_format: The wire format of the JSON, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :param max_points: The maximum number of data points per plot series of
+    the JSON, or None for no limit.
+
+    :type max_points: int
+
+    :returns: list or None -- The JSON string of each DataSeries object, or
+    None if there is no usable entry.
+    """
+    entry = read_encoded_entry(cache_root, mission, obsid, filt, url, targ,
+                               max_age, wire_format, max_points)
+    if entry is None:
+        return None
+    try:
+        payload = decode_payload(entry[0], entry[1])
+    except (OSError, ValueError, EOFError):
+        return None
+    # The payload is the JSON list of this pair's DataSeries.
+    payload = payload[1:-1]
+    return [payload] if payload else []
+#--------------------
+
+#--------------------
+def write_entry(cache_root, mission, obsid, filt, url, targ, fragments,
+                sources, wire_format=WIRE_FORMAT_DEFAULT,
+                max_points=MAX_POINTS_DEFAULT):
+    """
+    Writes the JSON for a mission + obsid pair to the cache, in the encoding
+    set by configure_response_cache().  The source files must have been
+    stat'ed before the data were read (see stat_request_sources()), and are
+    stat'ed again here: if any of them changed while the data were being read,
+    nothing is written, since the JSON may be a mix of old and new data.
+
+    :param cache_root: Directory containing the cache entries.
+
+    :type cache_root: str
+
+    :param mission: The mission where the data come from.
+
+    :type mission: str
+
+    :param obsid: The observation ID to retrieve the data from.
+
+    :type obsid: str
+
+    :param filt: The FILTER value for the observation ID.
+
+    :type filt: str
+
+    :param url: The preview plot URL for the observation ID.
+
+    :type url: str
+
+    :param targ: The target name for the observation ID.
+
+    :type targ: str
+
+    :param fragments: The JSON string of each DataSeries object.
+
+    :type fragments: list
+
+    :param sources: The source files as stat'ed before the data were read, as
+    returned by stat_request_sources().  Nothing is written if this is None.
+
+    :type sources: list
+
+    :param wire_format: The wire format of the JSON, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :param max_points: The maximum number of data points per plot series of
+    the JSON, or None for no limit.
+
+    :type max_points: int
+    """
+    if sources is None or stat_request_sources(mission, obsid, filt, url,
+                                               targ) != sources:
+        return
+    entry_path = get_entry_path(cache_root, get_cache_key(
+        mission, obsid, filt, url, targ, wire_format, max_points))
+    payload = '[' + ', '.join(fragments) + ']'
+    data = encode_payload(payload, _ENCODING)
+    meta = {'version':RESPONSE_CACHE_VERSION, 'mission':mission,
+            'obsid':obsid, 'wire_format':wire_format,
+            'max_points':max_points, 'sources':sources,
+            'encoding':_ENCODING, 'length':len(payload), 'size':len(data),
+            'created':time.time()}
+    # The payload is written first, so a meta file always has a payload.
+    payload_file = _get_payload_file(entry_path, meta)
+    write_atomically(payload_file, data)
+    write_atomically(entry_path + META_EXTENSION, json.dumps(meta))
+    # Remove the payload of an older entry written in a different encoding.
+    for extension in ENCODING_EXTENSIONS.values():
+        old_payload_file = entry_path + PAYLOAD_EXTENSION + extension
+        if old_payload_file != payload_file and os.path.isfile(
+                old_payload_file):
+            os.remove(old_payload_file)
+#--------------------
@@ -0,0 +1,123 @@
+"""
+.. module:: size_estimator
+
+   :synopsis: Estimates the length of the JSON of DataSeries objects before
+              they are serialized, from the number of data points in each
+              plot series and the precision their values are written with, so
+              that what is too big can be left out without building its JSON
+              first.
+
+              The estimates are exact, except for the numbers of PlotSeries
+              objects written without a precision, whose lengths are
+              estimated from their magnitude and decimal places by
+              precision.estimate_json_lengths(), so may be slightly longer
+              than the JSON.  The numbers of PlotSeries objects with a
+              precision are rounded to find their exact lengths, without
+              the trailing zeros that are not written.
+
+.. moduleauthor:: Scott W. Fleming <fleming@stsci.edu>
+"""
+
+from data_series import DataSeries, PlotSeries
+from json_writer import WIRE_FORMAT_DEFAULT, dumps, find_x_axis, get_columns
+from precision import estimate_json_lengths
+
+#--------------------
+def _list_size(sizes):
+    """
+    Returns the length of a JSON list given the lengths of its elements.
+    """
+    return sum(sizes) + 2 * max(len(sizes) - 1, 0) + 2
+#--------------------
+
+#--------------------
+def _column_size(values, precision):
+    """
+    Returns the estimated length of the JSON list of a column of floats.
+    """
+    if not len(values):
+        return 2
+    return int(estimate_json_lengths(values, precision).sum() +
+               2 * (len(values) - 1) + 2)
+#--------------------
+
+#--------------------
+def estimate_plot_series_size(plot_series):
+    """
+    Estimates the length of the JSON of a plot series, as a list of [x, y]
+    pairs.
+
+    :param plot_series: The plot series, a PlotSeries or anything else that
+    can be serialized (e.g., the '' placeholders some readers return).
+
+    :type plot_series: PlotSeries
+
+    :returns: int -- The estimated length of the JSON, in characters.
+    """
+    if not isinstance(plot_series, PlotSeries):
+        return len(dumps(plot_series))
+    n_points = len(plot_series)
+    if not n_points:
+        return 2
+    # Each pair is "[x, y]", and the pairs are separated by ", ".
+    return int(estimate_json_lengths(plot_series.raw_x,
+                                     plot_series.x_precision).sum() +
+               estimate_json_lengths(plot_series.raw_y,
+                                     plot_series.y_precision).sum() +
+               6 * n_points - 2 + 2)
+#--------------------
+
+#--------------------
+def estimate_json_size(data_series, wire_format=WIRE_FORMAT_DEFAULT):
+    """
+    Estimates the length of the JSON of a DataSeries object, or of a list of
+    them.
+
+    :param data_series: The DataSeries object(s).
+
+    :type data_series: DataSeries or list
+
+    :param wire_format: How the plot series are written, one of
+    json_writer.WIRE_FORMATS.
+
+    :type wire_format: str
+
+    :returns: int -- The estimated length of the JSON, in characters.
+    """
+    if not isinstance(data_series, DataSeries):
+        return _list_size([estimate_json_size(x, wire_format) for x in
+                           data_series])
+    obj = data_series.to_dict()
+    x_axes = []
+    x_axis_sizes = []
+    series_sizes = []
+    for series in obj['plot_series']:
+        columns = (None if wire_format == 'pairs' else
+                   (series.raw_x, series.raw_y) if
+                   isinstance(series, PlotSeries) else get_columns(series))
+        if columns is None:
+            series_sizes.append(estimate_plot_series_size(series))
+            continue
+        if isinstance(series, PlotSeries):
+            x_size = _column_size(series.raw_x, series.x_precision)
+            y_size = _column_size(series.raw_y, series.y_precision)
+        else:
+            x_size = len(dumps(columns[0]))
+            y_size = len(dumps(columns[1]))
+        if wire_format == 'columns':
+            series_sizes.append(len('{"x": , "y": }') + x_size + y_size)
+        else:
+            x_index = find_x_axis(x_axes, columns[0])
+            if x_index == len(x_axis_sizes):
+                x_axis_sizes.append(x_size)
+            series_sizes.append(len('{"x_axis": , "y": }') +
+                                len(str(x_index)) + y_size)
+    # The rest of the JSON is serialized as it is, with the lists of plot
+    # series (and x axes) empty.
+    obj['plot_series'] = []
+    size = _list_size(series_sizes) - 2
+    if wire_format == 'shared_x':
+        obj['x_axes'] = []
+        size += _list_size(x_axis_sizes) - 2
+    return len(dumps(obj)) + size
+#--------------------